@@ -0,0 +1,83 @@
+"""Time the serializers writing the document of a large registry.
+
+python -m benchmarks.dump [size]
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import sys
+from time import perf_counter
+from typing import Any
+
+import yaml
+from loguru import logger
+
+from benchmarks.registry import build_registry
+from sqlalchemy_schema.command.serializers import (
+    OrjsonSerializer,
+    Serializer,
+    SerializerOptions,
+    YAMLSerializer,
+    build_serializer,
+)
+from sqlalchemy_schema.command.transformer import OpenAPI2Transformer
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.types import Format, JSONBackend
+from sqlalchemy_schema.walkers import StructuralWalker
+
+STYLES: dict[str, dict[str, Any]] = {
+    "default": {},
+    "compact": {"compact": True},
+    "indent=2": {"indent": 2},
+    "indent=2 sorted": {"indent": 2, "sort_keys": True},
+}
+
+
+def main(size: int, /) -> None:
+    logger.remove()
+    models = build_registry(size)
+    transformer = OpenAPI2Transformer(SchemaFactory(StructuralWalker))
+    document = transformer.transform(models, 3)
+
+    backends = [JSONBackend.STDLIB]
+    if OrjsonSerializer.is_available():
+        backends.append(JSONBackend.ORJSON)
+
+    runs: list[tuple[str, Serializer]] = [
+        (
+            f"json/{backend.value} {style}",
+            build_serializer(Format.JSON, SerializerOptions(backend, **options)),
+        )
+        for style, options in STYLES.items()
+        for backend in backends
+        if backend != JSONBackend.ORJSON
+        or OrjsonSerializer.supports(
+            indent=options.get("indent"), compact=bool(options.get("compact"))
+        )
+    ]
+    runs.append(("yaml/python", YAMLSerializer(dumper=yaml.SafeDumper)))
+    runs.append(("yaml", build_serializer(Format.YAML)))
+
+    # what Driver.dump did before the serializers: the pure-Python encoder of json.dump
+    stream = io.StringIO()
+    start = perf_counter()
+    json.dump(document, stream)
+    report("json.dump", perf_counter() - start, stream)
+
+    for label, serializer in runs:
+        stream = io.StringIO()
+
+        start = perf_counter()
+        serializer.dump(document, stream)
+        report(label, perf_counter() - start, stream)
+
+
+def report(label: str, elapsed: float, stream: io.StringIO, /) -> None:
+    size_bytes = len(stream.getvalue().encode())
+    print(f"{label:>28}: {elapsed * 1000:8.1f} ms, {size_bytes:10d} bytes")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
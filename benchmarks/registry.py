@@ -0,0 +1,43 @@
+"""Synthetic declarative registries for the benchmarks."""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from sqlalchemy.orm import DeclarativeMeta, declarative_base
+
+
+def build_registry(size: int, /, *, fanout: int = 2) -> list[DeclarativeMeta]:
+    """Build ``size`` models where model ``i`` references the next ``fanout`` models.
+
+    Every reference is a many-to-one relationship with a one-to-many backref, so the
+    relationship graph is densely connected and full of cycles.
+    """
+    Base = declarative_base()
+    models: list[DeclarativeMeta] = []
+
+    for i in reversed(range(size)):
+        attrs: dict[str, object] = {
+            "__tablename__": f"model_{i}",
+            "pk": sa.Column(sa.Integer, primary_key=True, doc="primary key"),
+            "name": sa.Column(sa.String(255), nullable=False),
+            "created_at": sa.Column(sa.DateTime, nullable=True),
+        }
+
+        for offset in range(1, fanout + 1):
+            target = i + offset
+            if target >= size:
+                break
+
+            column = sa.Column(sa.Integer, sa.ForeignKey(f"model_{target}.pk"), nullable=True)
+            attrs[f"ref_{offset}_id"] = column
+            attrs[f"ref_{offset}"] = orm.relationship(
+                f"Model{target}", foreign_keys=[column], backref=f"back_{offset}_{i}"
+            )
+
+        models.append(type(f"Model{i}", (Base,), attrs))  # type: ignore[arg-type]
+
+    orm.configure_mappers()
+    models.reverse()
+
+    return models
@@ -0,0 +1,57 @@
+"""Count walker traversals per generated mapper.
+
+python -m benchmarks.walks [size]
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator
+from time import perf_counter
+from typing import Any
+
+from loguru import logger
+
+from benchmarks.registry import build_registry
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.walkers import AbstractWalker, StructuralWalker
+
+
+class CountingWalker(StructuralWalker):
+    walks = 0
+
+    def walk(self) -> Iterator[Any]:
+        CountingWalker.walks += 1
+        return super().walk()
+
+
+def main(size: int, /) -> None:
+    logger.remove()
+    models = build_registry(size)
+
+    for shared_definitions in (False, True):
+        factory = SchemaFactory(CountingWalker, shared_definitions=shared_definitions)
+        builds = 0
+        iter_properties = factory._iter_properties
+
+        def counting_iter_properties(walker: AbstractWalker, *args: Any, **kwargs: Any) -> Any:
+            nonlocal builds
+            builds += 1
+            return iter_properties(walker, *args, **kwargs)
+
+        factory._iter_properties = counting_iter_properties  # type: ignore[method-assign]
+        CountingWalker.walks = 0
+
+        start = perf_counter()
+        factory(models[0], depth=None if shared_definitions else 4)
+        elapsed = perf_counter() - start
+
+        mode = "shared" if shared_definitions else "default (depth=4)"
+        print(
+            f"{mode:>18}: {builds:6d} mappers built, {CountingWalker.walks:6d} walks, "
+            f"{CountingWalker.walks / builds:.2f} walks/mapper, {elapsed * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
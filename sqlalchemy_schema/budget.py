@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from time import monotonic
+
+from loguru import logger
+
+
+class GenerationBudget:
+    """Limits for a single schema generation.
+
+    Once any limit is reached the factory stops expanding relationships: a relationship
+    that would have been expanded is emitted as a ``$ref`` to a placeholder definition and
+    its dotted path is recorded in ``truncated_paths``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_nodes: int | None = None,
+        max_definitions: int | None = None,
+        timeout: float | None = None,
+    ) -> None:
+        self.max_nodes = max_nodes
+        self.max_definitions = max_definitions
+        self.timeout = timeout
+        self.start()
+
+    def start(self) -> None:
+        self.nodes = 0
+        self.definitions = 0
+        self.truncated_paths: list[str] = []
+        self.deadline = None if self.timeout is None else monotonic() + self.timeout
+
+    @property
+    def exhausted(self) -> bool:
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        if self.max_definitions is not None and self.definitions >= self.max_definitions:
+            return True
+        if self.deadline is not None and monotonic() >= self.deadline:
+            return True
+
+        return False
+
+    def spend_node(self) -> None:
+        self.nodes += 1
+
+    def spend_definition(self) -> None:
+        self.definitions += 1
+
+    def truncate(self, path: str, /) -> None:
+        logger.warning("Generation budget exceeded, not expanding {path}", path=path)
+
+        self.truncated_paths.append(path)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import ast
+import json
+import os
+import shutil
+import sys
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from hashlib import blake2b
+from importlib.machinery import PathFinder
+from pathlib import Path
+from typing import Any, Optional
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+
+def source_roots(module_name: str, /) -> Optional[list[Path]]:
+    """The files behind the top-level package of ``module_name``, found without importing it.
+
+    A target's models may import anything in their package, so the whole package is
+    covered. A top-level module is covered with the modules and packages next to it
+    that it imports, directly or not. Returns ``None`` when the package is not backed
+    by source files.
+    """
+    roots = top_level_roots(module_name.split(".", 1)[0])
+
+    if roots is None or roots[0].is_dir():
+        return roots
+
+    pending = list(roots)
+    while pending:
+        path = pending.pop()
+        for name in imported_names(path):
+            sibling_roots = top_level_roots(name)
+            if (
+                sibling_roots is not None
+                and sibling_roots[0].parent == path.parent
+                and sibling_roots[0] not in roots
+            ):
+                roots.extend(sibling_roots)
+                pending.extend(root for root in sibling_roots if not root.is_dir())
+
+    return roots
+
+
+def imported_names(path: Path, /) -> Iterator[str]:
+    """The top-level names the absolute imports of a source file refer to."""
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name.split(".", 1)[0]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            yield node.module.split(".", 1)[0]
+
+
+def top_level_roots(top_level: str, /) -> Optional[list[Path]]:
+    module = sys.modules.get(top_level)
+
+    if module is not None:
+        locations = getattr(module, "__path__", None)
+        origin = getattr(module, "__file__", None)
+    else:
+        spec = PathFinder.find_spec(top_level)
+        if spec is None:
+            return None
+        locations = spec.submodule_search_locations
+        origin = spec.origin
+
+    if locations:
+        return [Path(location) for location in locations]
+    elif origin is not None and origin.endswith(".py"):
+        return [Path(origin)]
+
+    return None
+
+
+def iter_sources(root: Path, /) -> Iterator[Path]:
+    if root.is_dir():
+        yield from sorted(root.rglob("*.py"))
+    else:
+        yield root
+
+
+def hash_sources(digest: Any, roots: Iterable[Path], /) -> None:
+    for root in roots:
+        for path in iter_sources(root):
+            digest.update(os.fsencode(path))
+            digest.update(path.read_bytes())
+
+
+class OutputCache:
+    """Documents written by earlier runs, keyed on everything they depend on.
+
+    The key covers the targets and options of the run, the Python version, the sources
+    of this package and sqlalchemy's version module (instead of the installed versions,
+    which are slow to look up) and the sources of every package the targets live in.
+    An entry is a directory holding one file per output, in the order of the outputs.
+
+    Nothing here imports sqlalchemy or the targets, so a hit is served before any model
+    is loaded.
+    """
+
+    def __init__(self, directory: Path, /) -> None:
+        self.directory = directory
+
+    def key(self, targets: Sequence[str], options: Mapping[str, Any], /) -> Optional[str]:
+        """The key of a run, ``None`` if the sources of a target cannot be found."""
+        roots: dict[Path, None] = {}
+
+        for target in targets:
+            target_roots = source_roots(target.split(":", 1)[0])
+            if target_roots is None:
+                return None
+            roots.update(dict.fromkeys(target_roots))
+
+        sqlalchemy_roots = source_roots("sqlalchemy")
+        versions = [PACKAGE_ROOT]
+        if sqlalchemy_roots is not None:
+            versions.extend(root / "__init__.py" for root in sqlalchemy_roots)
+
+        digest = blake2b(digest_size=20)
+        header = {"targets": list(targets), "options": options, "python": sys.version}
+        digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+        hash_sources(digest, versions)
+        hash_sources(digest, roots)
+
+        return digest.hexdigest()
+
+    def entry(self, key: str, /) -> Path:
+        return self.directory / key
+
+    def restore(self, key: str, destinations: Sequence[Optional[Path]], /) -> bool:
+        """Copy a cached entry to ``destinations`` (``None`` is stdout); ``False`` on a miss."""
+        entry = self.entry(key)
+        cached = [entry / str(i) for i in range(len(destinations))]
+
+        if not all(path.is_file() for path in cached):
+            return False
+
+        for path, destination in zip(cached, destinations):
+            if destination is None:
+                sys.stdout.write(path.read_text(encoding="utf-8"))
+            else:
+                shutil.copyfile(path, destination)
+
+        return True
+
+    def stage(self, key: str, count: int, /) -> list[Path]:
+        """Files for a run to write its outputs to before :meth:`commit`."""
+        staging = self.directory / f"{key}.{os.getpid()}.tmp"
+        staging.mkdir(parents=True, exist_ok=True)
+
+        return [staging / str(i) for i in range(count)]
+
+    def commit(self, key: str, staged: Sequence[Path], /) -> None:
+        staging = staged[0].parent
+
+        try:
+            # atomic, so concurrent runs never see a partial entry
+            staging.rename(self.entry(key))
+        except OSError:
+            # another run committed the same key first
+            self.discard(staged)
+
+    def discard(self, staged: Sequence[Path], /) -> None:
+        shutil.rmtree(staged[0].parent, ignore_errors=True)
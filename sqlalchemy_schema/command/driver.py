@@ -1,20 +1,29 @@
 import inspect
-import json
+import os
+import shutil
 import sys
 from collections.abc import Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
 from pathlib import Path
 from types import ModuleType
-from typing import Any, Callable, Optional, Union, cast
+from typing import Any, Callable, Optional, TextIO, Union
 
-import yaml
 from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.orm import registry
 
+from sqlalchemy_schema.command.intermediate import GeneratedSchemas
+from sqlalchemy_schema.command.serializers import (
+    Serializer,
+    SerializerOptions,
+    build_serializer,
+)
 from sqlalchemy_schema.command.transformer import (
     AbstractTransformer,
     AsyncAPI2Transformer,
     JSONSchemaTransformer,
     OpenAPI2Transformer,
     OpenAPI3Transformer,
+    Target,
 )
 from sqlalchemy_schema.decisions import (
     AbstractDecision,
@@ -23,6 +32,7 @@ from sqlalchemy_schema.decisions import (
 )
 from sqlalchemy_schema.schema_factory import Schema, SchemaFactory
 from sqlalchemy_schema.types import Decision, Format, Layout, Walker
+from sqlalchemy_schema.utils.discovery import DiscoveryIndex, models_of, registry_of
 from sqlalchemy_schema.utils.imports import load_module_or_symbol
 from sqlalchemy_schema.walkers import (
     AbstractWalker,
@@ -51,19 +61,89 @@ DECISION_MAP: Mapping[Decision, type[AbstractDecision]] = {
 }
 
 
+@contextmanager
+def open_replacing(filename: Path, /) -> Iterator[TextIO]:
+    """Write ``filename`` through a file next to it, moved over it only once complete.
+
+    A run failing halfway leaves the previous output as it was. Anything but a regular
+    file, e.g. ``/dev/stdout``, is written directly.
+    """
+    if filename.exists() and not filename.is_file():
+        with filename.open("w", encoding="utf-8") as output_stream:
+            yield output_stream
+        return
+
+    temporary = filename.with_name(f".{filename.name}.{os.getpid()}.tmp")
+    try:
+        with temporary.open("w", encoding="utf-8") as output_stream:
+            yield output_stream
+        if filename.exists():
+            shutil.copymode(filename, temporary)
+        os.replace(temporary, filename)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
+
+
 class Driver:
-    def __init__(self, walker: Walker, decision: Decision, layout: Layout, /):
-        self.transformer = self.build_transformer(walker, decision, layout)
+    def __init__(
+        self,
+        walker: Walker,
+        decision: Decision,
+        layout: Layout,
+        /,
+        *,
+        serializer_options: Optional[SerializerOptions] = None,
+    ):
+        self.walker = walker
+        self.decision = decision
+        self.layout = layout
+        self.layout_transformer = self.build_transformer(walker, decision, layout)
+        self.transformer: Callable[[Iterable[Target], Optional[int]], Schema] = (
+            self.layout_transformer.transform
+        )
+        # packages already walked by recursive runs
+        self.discovery = DiscoveryIndex()
+        self.serializer_options = (
+            SerializerOptions() if serializer_options is None else serializer_options
+        )
 
     def build_transformer(
         self, walker: Walker, decision: Decision, layout: Layout, /
-    ) -> Callable[[Iterable[Union[ModuleType, DeclarativeMeta]], Optional[int]], Schema]:
+    ) -> AbstractTransformer:
         walker_factory = WALKER_MAP[walker]
         relation_decision = DECISION_MAP[decision]()
-        schema_factory = SchemaFactory(walker_factory, relation_decision=relation_decision)
         transformer_factory = TRANSFORMER_MAP[layout]
+        schema_factory = SchemaFactory(
+            walker_factory,
+            relation_decision=relation_decision,
+            ref_prefix=transformer_factory.ref_prefix,
+        )
+
+        return transformer_factory(schema_factory)
+
+    def build_schema_factory(self, ref_prefix: str = "#/definitions/", /) -> SchemaFactory:
+        return SchemaFactory(
+            WALKER_MAP[self.walker],
+            relation_decision=DECISION_MAP[self.decision](),
+            ref_prefix=ref_prefix,
+        )
+
+    def build_transformers(
+        self, layouts: Sequence[Layout], /, *, schemas: Optional[GeneratedSchemas] = None
+    ) -> list[AbstractTransformer]:
+        """Transformers for ``layouts`` rendering a single generation of the schemas."""
+        transformer_factories = [TRANSFORMER_MAP[layout] for layout in layouts]
+        generated = (
+            GeneratedSchemas(self.build_schema_factory(transformer_factories[0].ref_prefix))
+            if schemas is None
+            else schemas
+        )
 
-        return transformer_factory(schema_factory).transform
+        return [
+            transformer_factory(generated.view(transformer_factory.ref_prefix))
+            for transformer_factory in transformer_factories
+        ]
 
     def run(
         self,
@@ -73,19 +153,85 @@ class Driver:
         filename: Optional[Path] = None,
         format: Optional[Format] = None,
         depth: Optional[int] = None,
+        stream: bool = True,
+        recursive: bool = False,
+        outputs: Optional[Sequence[tuple[Layout, Optional[Path]]]] = None,
+        schemas: Optional[GeneratedSchemas] = None,
     ) -> None:
+        """Write the schemas of ``targets``.
+
+        By default the driver's layout is written to ``filename``; ``outputs`` pairs
+        several layouts with the file each is written to instead, and every model is
+        walked once for all of them. ``schemas`` keeps the generated schemas across runs.
+        """
         modules_and_types = (load_module_or_symbol(target) for target in targets)
-        modules_and_models = cast(
-            Iterator[Union[ModuleType, DeclarativeMeta]],
-            (
-                item
-                for item in modules_and_types
-                if inspect.ismodule(item) or isinstance(item, DeclarativeMeta)
-            ),
-        )
+        modules_and_models = [
+            target
+            for target in (self.resolve(item, recursive=recursive) for item in modules_and_types)
+            if target is not None
+        ]
+
+        if outputs is None and schemas is None:
+            self.write(
+                self.layout_transformer,
+                modules_and_models,
+                depth,
+                filename=filename,
+                format=format,
+                stream=stream,
+            )
+            return
+
+        if outputs is None:
+            outputs = [(self.layout, filename)]
 
-        result = self.transformer(modules_and_models, depth)
-        self.dump(result, filename=filename, format=format)
+        transformers = self.build_transformers([layout for layout, _ in outputs], schemas=schemas)
+        for transformer, (_, output) in zip(transformers, outputs):
+            self.write(
+                transformer,
+                modules_and_models,
+                depth,
+                filename=output,
+                format=format,
+                stream=stream,
+            )
+
+    def write(
+        self,
+        transformer: AbstractTransformer,
+        targets: Sequence[Target],
+        depth: Optional[int],
+        /,
+        *,
+        filename: Optional[Path] = None,
+        format: Optional[Format] = None,
+        stream: bool = True,
+    ) -> None:
+        # a YAML stream has a document per entry, so it is always written entry by entry;
+        # sorted entries are buffered anyway, so those go through the whole document
+        streaming = stream and self.serializer(format).streaming
+        if (streaming or format == Format.YAML_STREAM) and transformer.streamable(targets):
+            entries = transformer.transform_iter(targets, depth)
+            self.dump_iter(entries, transformer.envelope, filename=filename, format=format)
+        else:
+            self.dump(transformer.transform(targets, depth), filename=filename, format=format)
+
+    def resolve(
+        self, item: Union[ModuleType, type, registry], /, *, recursive: bool = False
+    ) -> Optional[Target]:
+        """The transformer target for a loaded module or symbol, ``None`` to skip it."""
+        if registry_of(item) is not None:
+            # a declarative base is a DeclarativeMeta as well, so this goes first
+            return models_of(item)
+        elif inspect.ismodule(item):
+            return self.discovery(item) if recursive and hasattr(item, "__path__") else item
+        elif isinstance(item, DeclarativeMeta):
+            return item
+
+        return None
+
+    def serializer(self, format: Optional[Format], /) -> Serializer:
+        return build_serializer(format, self.serializer_options)
 
     def dump(
         self,
@@ -95,11 +241,28 @@ class Driver:
         filename: Optional[Path] = None,
         format: Optional[Format] = None,
     ) -> None:
-        dump_function = yaml.dump if format == Format.YAML else json.dump
+        serializer = self.serializer(format)
 
         if filename is None:
-            output_stream = sys.stdout
+            serializer.dump(data, sys.stdout)
         else:
-            output_stream = filename.open("w")
+            with open_replacing(filename) as output_stream:
+                serializer.dump(data, output_stream)
+
+    def dump_iter(
+        self,
+        entries: Iterable[tuple[str, Schema]],
+        envelope: Sequence[str],
+        /,
+        *,
+        filename: Optional[Path] = None,
+        format: Optional[Format] = None,
+    ) -> None:
+        """Write ``{envelope[0]: {envelope[1]: {name: schema, ...}}}`` one entry at a time."""
+        serializer = self.serializer(format)
 
-        dump_function(data, output_stream)
+        if filename is None:
+            serializer.write_entries(sys.stdout, entries, envelope)
+        else:
+            with open_replacing(filename) as output_stream:
+                serializer.write_entries(output_stream, entries, envelope)
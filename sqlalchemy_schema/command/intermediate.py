@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from collections.abc import Hashable
+from typing import Any, Optional, Protocol
+
+from sqlalchemy_schema.schema_factory import Schema, SchemaFactory
+
+
+class SchemaSource(Protocol):
+    """What a transformer needs from a :class:`SchemaFactory`."""
+
+    ref_prefix: str
+
+    def __call__(self, model: Any, /, *, depth: Optional[int] = None) -> Schema: ...
+
+
+class GeneratedSchemas:
+    """The schemas of one run, generated once and rendered for every layout.
+
+    Each model is walked the first time any layout asks for it; the schema is kept, with
+    the factory's ``ref_prefix``, and every layout reads it through a :meth:`view` that
+    copies it with the layout's own prefix.
+    """
+
+    def __init__(self, schema_factory: SchemaFactory, /) -> None:
+        self.schema_factory = schema_factory
+        self.schemas: dict[Hashable, Schema] = {}
+
+    def key(self, model: Any, depth: Optional[int], /) -> Hashable:
+        return (model, depth)
+
+    def get(self, model: Any, depth: Optional[int], /) -> Schema:
+        key = self.key(model, depth)
+        schema = self.schemas.get(key)
+
+        if schema is None:
+            schema = self.schemas[key] = self.schema_factory(model, depth=depth)
+
+        return schema
+
+    def view(self, ref_prefix: str, /) -> GeneratedSchemasView:
+        return GeneratedSchemasView(self, ref_prefix)
+
+
+class GeneratedSchemasView:
+    """A :class:`SchemaSource` over :class:`GeneratedSchemas` for one ref prefix."""
+
+    def __init__(self, generated: GeneratedSchemas, ref_prefix: str, /) -> None:
+        self.generated = generated
+        self.ref_prefix = ref_prefix
+
+    def __call__(self, model: Any, /, *, depth: Optional[int] = None) -> Schema:
+        schema = self.generated.get(model, depth)
+        rendered: Schema = render(
+            schema, self.generated.schema_factory.ref_prefix, self.ref_prefix
+        )
+
+        return rendered
+
+
+def render(schema: Any, old_prefix: str, new_prefix: str, /) -> Any:
+    """A copy of ``schema`` with ``$ref``s moved from ``old_prefix`` to ``new_prefix``."""
+    if isinstance(schema, dict):
+        copied = {}
+        for key, value in schema.items():
+            if key == "$ref" and isinstance(value, str) and value.startswith(old_prefix):
+                copied[key] = new_prefix + value.removeprefix(old_prefix)
+            else:
+                copied[key] = render(value, old_prefix, new_prefix)
+        return copied
+    elif isinstance(schema, list):
+        return [render(item, old_prefix, new_prefix) for item in schema]
+
+    return schema
@@ -1,16 +1,48 @@
+from __future__ import annotations
+
+import sys
 from collections.abc import Sequence
+from importlib import import_module
 from pathlib import Path
-from typing import Final, Optional
+from typing import TYPE_CHECKING, Any, Final, Optional
 
 import click
 
-from sqlalchemy_schema.command.driver import Driver
-from sqlalchemy_schema.types import Decision, Format, Layout, Walker
+from sqlalchemy_schema.command.cache import OutputCache
+from sqlalchemy_schema.command.serializers import SerializerOptions, build_serializer
+from sqlalchemy_schema.types import Decision, Format, JSONBackend, Layout, Walker
+
+if TYPE_CHECKING:
+    from sqlalchemy_schema.command.driver import Driver
+    from sqlalchemy_schema.command.watch import Watcher
 
 DEFAULT_WALKER: Final = Walker.STRUCTURAL
 DEFAULT_DECISION: Final = Decision.DEFAULT
 DEFAULT_LAYOUT: Final = Layout.SWAGGER_2
 
+# imported on first use, so --help, usage errors and cache hits never load sqlalchemy
+LAZY_IMPORTS: Final = {
+    "Driver": "sqlalchemy_schema.command.driver",
+    "Watcher": "sqlalchemy_schema.command.watch",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = LAZY_IMPORTS.get(name)
+
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name), name)
+    globals()[name] = value
+
+    return value
+
+
+def lazy(name: str, /) -> Any:
+    """A name of ``LAZY_IMPORTS`` as this module has it now, e.g. patched in tests."""
+    return getattr(sys.modules[__name__], name)
+
 
 @click.command()
 @click.option("--format", type=click.Choice([format.value for format in Format]))
@@ -27,25 +59,152 @@ DEFAULT_LAYOUT: Final = Layout.SWAGGER_2
 @click.option(
     "--layout",
     type=click.Choice([layout.value for layout in Layout]),
-    default=DEFAULT_LAYOUT.value,
+    default=[DEFAULT_LAYOUT.value],
+    multiple=True,
+    help="Repeat together with --out to write several layouts from one generation.",
 )
 @click.option(
     "--out",
     type=click.Path(
         file_okay=True, dir_okay=False, resolve_path=True, writable=True, path_type=Path
     ),
+    multiple=True,
+)
+@click.option(
+    "--recursive",
+    is_flag=True,
+    help="Discover the models of every submodule of package targets.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True, path_type=Path),
+    help="Reuse the output of an earlier run with the same options and sources.",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and regenerate the output whenever the models' sources change.",
+)
+@click.option("--compact", is_flag=True, help="Write JSON without any whitespace.")
+@click.option(
+    "--indent", type=click.IntRange(min=0), help="Indent nested values by this many spaces."
+)
+@click.option(
+    "--sort-keys/--no-sort-keys",
+    default=None,
+    help="Sort the keys of every mapping; YAML output is sorted by default.",
+)
+@click.option(
+    "--json-backend",
+    type=click.Choice([backend.value for backend in JSONBackend]),
+    default=JSONBackend.STDLIB.value,
+    help="The JSON encoder; orjson writes some floats differently, see the README.",
 )
 @click.argument("targets", type=str, nargs=-1)
 def main(
     targets: Sequence[str],
     walker: str,
     decision: str,
-    layout: str,
-    out: Optional[Path] = None,
+    layout: Sequence[str],
+    out: Sequence[Path] = (),
     format: Optional[str] = None,
+    recursive: bool = False,
+    cache_dir: Optional[Path] = None,
+    watch: bool = False,
+    compact: bool = False,
+    indent: Optional[int] = None,
+    sort_keys: Optional[bool] = None,
+    json_backend: str = JSONBackend.STDLIB.value,
+) -> None:
+    layouts = [Layout(value) for value in layout]
+
+    if len(layouts) == 1 and len(out) <= 1:
+        outputs = [(layouts[0], out[0] if out else None)]
+    elif len(out) != len(layouts):
+        raise click.UsageError("--layout and --out must be given in pairs for several layouts")
+    else:
+        outputs = list(zip(layouts, out))
+
+    output_format = None if format is None else Format(format)
+    serializer_options = SerializerOptions(JSONBackend(json_backend), indent, sort_keys, compact)
+
+    try:
+        build_serializer(output_format, serializer_options)
+    except ValueError as e:
+        raise click.UsageError(str(e)) from e
+
+    if watch:
+        driver = build_driver(walker, decision, layouts[0], serializer_options)
+        watcher: Watcher = lazy("Watcher")(
+            driver, targets, outputs, format=output_format, recursive=recursive
+        )
+        watcher.watch()
+        return
+
+    cache = None if cache_dir is None else OutputCache(cache_dir)
+    options = {
+        "walker": walker,
+        "decision": decision,
+        "layouts": layout,
+        "format": format,
+        "recursive": recursive,
+        "compact": compact,
+        "indent": indent,
+        "sort_keys": sort_keys,
+        "json_backend": json_backend,
+    }
+    key = None if cache is None else cache.key(targets, options)
+
+    if cache is not None and key is not None:
+        if cache.restore(key, [filename for _, filename in outputs]):
+            return
+
+    driver = build_driver(walker, decision, layouts[0], serializer_options)
+
+    if cache is None or key is None:
+        run_driver(driver, targets, outputs, format=output_format, recursive=recursive)
+        return
+
+    staged = cache.stage(key, len(outputs))
+    try:
+        run_driver(
+            driver,
+            targets,
+            [(layout, filename) for (layout, _), filename in zip(outputs, staged)],
+            format=output_format,
+            recursive=recursive,
+        )
+    except BaseException:
+        cache.discard(staged)
+        raise
+
+    cache.commit(key, staged)
+    cache.restore(key, [filename for _, filename in outputs])
+
+
+def build_driver(
+    walker: str, decision: str, layout: Layout, serializer_options: SerializerOptions, /
+) -> Driver:
+    driver: Driver = lazy("Driver")(
+        Walker(walker), Decision(decision), layout, serializer_options=serializer_options
+    )
+
+    return driver
+
+
+def run_driver(
+    driver: Driver,
+    targets: Sequence[str],
+    outputs: Sequence[tuple[Layout, Optional[Path]]],
+    /,
+    *,
+    format: Optional[Format],
+    recursive: bool,
 ) -> None:
-    driver = Driver(Walker(walker), Decision(decision), Layout(layout))
-    driver.run(targets, filename=out, format=None if format is None else Format(format))
+    if len(outputs) == 1:
+        driver.run(targets, filename=outputs[0][1], format=format, recursive=recursive)
+    else:
+        driver.run(targets, format=format, recursive=recursive, outputs=outputs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from importlib import import_module
+from importlib.util import find_spec
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional, TextIO, Union
+
+from sqlalchemy_schema.types import Format, JSONBackend
+
+if TYPE_CHECKING:
+    # both are slow to import; yaml is imported once a YAML serializer is built
+    import yaml
+
+    from sqlalchemy_schema.schema_factory import Schema
+
+    Entries = Iterable[tuple[str, Schema]]
+    YAMLDumper = type[Union[yaml.SafeDumper, yaml.CSafeDumper]]
+
+
+class SerializerOptions(NamedTuple):
+    """How documents are written; ``None`` keeps the format's own default."""
+
+    backend: JSONBackend = JSONBackend.STDLIB
+    indent: Optional[int] = None
+    sort_keys: Optional[bool] = None
+    compact: bool = False
+
+
+class Serializer(ABC):
+    @abstractmethod
+    def dumps(self, data: Any, /) -> str: ...
+
+    def dump(self, data: Any, stream: TextIO, /) -> None:
+        stream.write(self.dumps(data))
+
+    @abstractmethod
+    def write_entries(self, stream: TextIO, entries: Entries, envelope: Sequence[str], /) -> None:
+        """Write ``{envelope[0]: {envelope[1]: {name: schema, ...}}}`` one entry at a time.
+
+        The text is the same :meth:`dump` writes for the whole document.
+        """
+
+    @property
+    def streaming(self) -> bool:
+        """Whether :meth:`write_entries` writes every entry as it comes.
+
+        Sorted entries can only be written once all of them are known.
+        """
+        return True
+
+
+class JSONSerializer(Serializer):
+    """The standard library's encoder.
+
+    The default style is the one of plain :func:`json.dumps`. Compact and indented output
+    leave non-ASCII characters unescaped, as the accelerated encoder does.
+    """
+
+    def __init__(
+        self, *, indent: Optional[int] = None, sort_keys: bool = False, compact: bool = False
+    ) -> None:
+        self.indent = indent
+        self.sort_keys = sort_keys
+        self.ensure_ascii = indent is None and not compact
+        self.item_separator = "," if compact or indent is not None else ", "
+        self.key_separator = ":" if compact else ": "
+
+    def dumps(self, data: Any, /) -> str:
+        return json.dumps(
+            data,
+            indent=self.indent,
+            sort_keys=self.sort_keys,
+            ensure_ascii=self.ensure_ascii,
+            separators=(self.item_separator, self.key_separator),
+        )
+
+    @property
+    def streaming(self) -> bool:
+        return not self.sort_keys
+
+    def write_entries(self, stream: TextIO, entries: Entries, envelope: Sequence[str], /) -> None:
+        if self.sort_keys:
+            entries = sorted(entries, key=itemgetter(0))
+
+        # every entry is encoded as a document of its own, {name: schema}, and spliced in
+        if self.indent is None:
+            for key in envelope:
+                stream.write(f"{{{self.dumps(key)}{self.key_separator}")
+
+            stream.write("{")
+            for i, (name, schema) in enumerate(entries):
+                if i:
+                    stream.write(self.item_separator)
+                stream.write(self.dumps({name: schema})[1:-1])
+            stream.write("}" * (len(envelope) + 1))
+            return
+
+        indent = " " * self.indent
+        depth = len(envelope)
+
+        for level, key in enumerate(envelope, start=1):
+            stream.write(f"{{\n{indent * level}{self.dumps(key)}{self.key_separator}")
+
+        stream.write("{")
+        empty = True
+        for name, schema in entries:
+            stream.write("\n" if empty else f"{self.item_separator}\n")
+            empty = False
+            lines = self.dumps({name: schema}).split("\n")[1:-1]
+            stream.write("\n".join(indent * depth + line for line in lines))
+        if not empty:
+            stream.write(f"\n{indent * depth}")
+        stream.write("}")
+
+        for level in reversed(range(depth)):
+            stream.write(f"\n{indent * level}}}")
+
+
+class OrjsonSerializer(JSONSerializer):
+    """orjson, for the compact and 2-space indented styles; only used when asked for.
+
+    The output differs from the standard library's for some floats: exponents are
+    written without a sign or padding (``1e16``, ``1e-7`` rather than ``1e+16``,
+    ``1e-07``) and NaN and infinities become ``null``. Documents orjson rejects, e.g.
+    integers beyond 64 bits, are left to the standard library.
+    """
+
+    def __init__(
+        self, *, indent: Optional[int] = None, sort_keys: bool = False, compact: bool = False
+    ) -> None:
+        if not self.supports(indent=indent, compact=compact):
+            raise ValueError("orjson only writes compact output or an indent of 2")
+
+        super().__init__(indent=indent, sort_keys=sort_keys, compact=compact)
+        self.orjson = import_module("orjson")
+        self.option = self.orjson.OPT_NON_STR_KEYS
+        if indent is not None:
+            self.option |= self.orjson.OPT_INDENT_2
+        if sort_keys:
+            self.option |= self.orjson.OPT_SORT_KEYS
+
+    @staticmethod
+    def is_available() -> bool:
+        return find_spec("orjson") is not None
+
+    @staticmethod
+    def supports(*, indent: Optional[int], compact: bool) -> bool:
+        return compact or indent == 2
+
+    def dumps(self, data: Any, /) -> str:
+        try:
+            encoded: bytes = self.orjson.dumps(data, option=self.option)
+        except self.orjson.JSONEncodeError:
+            return super().dumps(data)
+
+        return encoded.decode()
+
+
+class YAMLSerializer(Serializer):
+    """PyYAML's safe dumper, with LibYAML's emitter when PyYAML was built with it."""
+
+    # PyYAML's default, the column long scalars are folded at
+    width = 80
+
+    def __init__(
+        self,
+        *,
+        indent: Optional[int] = None,
+        sort_keys: bool = True,
+        dumper: Optional[YAMLDumper] = None,
+    ) -> None:
+        self.yaml = import_module("yaml")
+        self.indent = indent
+        self.sort_keys = sort_keys
+        # CSafeDumper only exists when PyYAML is built with LibYAML
+        self.dumper = (
+            getattr(self.yaml, "CSafeDumper", self.yaml.SafeDumper) if dumper is None else dumper
+        )
+
+    def dumps(self, data: Any, /, *, width: Optional[int] = None) -> str:
+        dumped: str = self.yaml.dump(
+            data,
+            Dumper=self.dumper,
+            indent=self.indent,
+            sort_keys=self.sort_keys,
+            width=self.width if width is None else width,
+        )
+
+        return dumped
+
+    def dump(self, data: Any, stream: TextIO, /) -> None:
+        self.yaml.dump(
+            data,
+            stream,
+            Dumper=self.dumper,
+            indent=self.indent,
+            sort_keys=self.sort_keys,
+            width=self.width,
+        )
+
+    @property
+    def streaming(self) -> bool:
+        return not self.sort_keys
+
+    def write_entries(self, stream: TextIO, entries: Entries, envelope: Sequence[str], /) -> None:
+        if self.sort_keys:
+            entries = sorted(entries, key=itemgetter(0))
+
+        step = " " * (2 if self.indent is None else self.indent)
+        indent = ""
+        for i, key in enumerate(envelope):
+            if i:
+                stream.write("\n")
+            stream.write(f"{indent}{key}:")
+            indent += step
+
+        empty = True
+        for name, schema in entries:
+            if empty:
+                stream.write("\n")
+                empty = False
+            # dumped at column 0 and indented, so folded that much earlier
+            dumped = self.dumps({name: schema}, width=self.width - len(indent))
+            for line in dumped.splitlines(keepends=True):
+                stream.write(indent + line)
+
+        if empty:
+            stream.write(" {}\n")
+
+
+class YAMLDocumentsSerializer(YAMLSerializer):
+    """A YAML stream with one document per entry, each inside its own envelope.
+
+    Entries are written in the order they come, so nothing is kept once written; merging
+    the documents gives the single-document output.
+    """
+
+    def dumps(self, data: Any, /, *, width: Optional[int] = None) -> str:
+        dumped: str = self.yaml.dump(
+            data,
+            Dumper=self.dumper,
+            indent=self.indent,
+            sort_keys=self.sort_keys,
+            width=self.width if width is None else width,
+            explicit_start=True,
+        )
+
+        return dumped
+
+    def dump(self, data: Any, stream: TextIO, /) -> None:
+        stream.write(self.dumps(data))
+
+    @property
+    def streaming(self) -> bool:
+        # the keys are sorted within each document, the documents are not
+        return True
+
+    def write_entries(self, stream: TextIO, entries: Entries, envelope: Sequence[str], /) -> None:
+        for name, schema in entries:
+            data: dict[str, Any] = {name: schema}
+            for key in reversed(envelope):
+                data = {key: data}
+            stream.write(self.dumps(data))
+
+
+def build_serializer(
+    format: Optional[Format], options: SerializerOptions = SerializerOptions(), /
+) -> Serializer:
+    """The serializer writing ``format`` with ``options``.
+
+    JSON is written by the standard library unless orjson is requested. Raises
+    ``ValueError`` for options that cannot be honoured.
+    """
+    if options.compact and options.indent is not None:
+        raise ValueError("Compact output cannot be indented")
+
+    if format in (Format.YAML, Format.YAML_STREAM):
+        if options.compact:
+            raise ValueError("Compact output is only available for JSON")
+        if options.indent is not None and not 2 <= options.indent <= 9:
+            # the range PyYAML accepts; it silently ignores any other indent
+            raise ValueError("YAML is indented by 2 to 9 spaces")
+        sort_keys = True if options.sort_keys is None else options.sort_keys
+        yaml_serializer_class = (
+            YAMLDocumentsSerializer if format == Format.YAML_STREAM else YAMLSerializer
+        )
+        return yaml_serializer_class(indent=options.indent, sort_keys=sort_keys)
+
+    serializer_class: type[JSONSerializer] = JSONSerializer
+
+    # never picked on its own: its output differs, so it would depend on what is installed
+    if options.backend == JSONBackend.ORJSON:
+        if not OrjsonSerializer.is_available():
+            raise ValueError("orjson is not installed")
+        serializer_class = OrjsonSerializer
+
+    return serializer_class(
+        indent=options.indent, sort_keys=bool(options.sort_keys), compact=options.compact
+    )
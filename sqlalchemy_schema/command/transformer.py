@@ -1,40 +1,67 @@
 import inspect
 from abc import ABC, abstractmethod
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable, Iterator, Sequence
 from types import ModuleType
-from typing import Optional, Union
+from typing import ClassVar, Optional, Union, cast
 
 from loguru import logger
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.orm import Mapper
 from typing_extensions import TypeGuard
 
-from sqlalchemy_schema.schema_factory import Schema, SchemaFactory
+from sqlalchemy_schema.command.intermediate import SchemaSource
+from sqlalchemy_schema.schema_factory import Schema
+from sqlalchemy_schema.utils.definitions import DefinitionIndex
+from sqlalchemy_schema.utils.discovery import DiscoveredModels
+
+# a model, or a collection of models: a module or the result of a discovery
+Target = Union[ModuleType, DeclarativeMeta, DiscoveredModels]
 
 
 class AbstractTransformer(ABC):
-    def __init__(self, schema_factory: SchemaFactory, /):
+    # where transform_iter's (name, schema) pairs go in the document
+    envelope: ClassVar[tuple[str, ...]] = ("definitions",)
+    # what "$ref"s in the document must start with
+    ref_prefix: ClassVar[str] = "#/definitions/"
+
+    def __init__(self, schema_factory: SchemaSource, /):
         self.schema_factory = schema_factory
 
     @abstractmethod
-    def transform(
-        self, rawtargets: Iterable[Union[ModuleType, DeclarativeMeta]], depth: Optional[int], /
-    ) -> Schema: ...
+    def transform(self, rawtargets: Iterable[Target], depth: Optional[int], /) -> Schema: ...
+
+    @abstractmethod
+    def transform_iter(
+        self, rawtargets: Iterable[Target], depth: Optional[int], /
+    ) -> Iterator[tuple[str, Schema]]:
+        """Yield the entries of the envelope one model at a time.
+
+        Each name is yielded once. A model's own schema wins over a definition of the
+        same name pulled in through a relationship; otherwise the first one wins.
+        """
+
+    def streamable(self, rawtargets: Sequence[Target], /) -> bool:
+        return True
 
 
 class JSONSchemaTransformer(AbstractTransformer):
-    def transform(
-        self, rawtargets: Iterable[Union[ModuleType, DeclarativeMeta]], depth: Optional[int], /
-    ) -> Schema:
-        definitions = {}
+    def transform(self, rawtargets: Iterable[Target], depth: Optional[int], /) -> Schema:
+        definitions: Schema = {}
 
         for item in rawtargets:
             if inspect.isclass(item) and isinstance(item, DeclarativeMeta):
                 partial_definitions = self.transform_by_model(item, depth)
-            elif inspect.ismodule(item):
+            elif is_collection(item):
                 partial_definitions = self.transform_by_module(item, depth)
             else:
                 TypeError(f"Expected a class or module, got {item}")
 
+            if "definitions" in definitions and "definitions" in partial_definitions:
+                # every module adds its models; the first one of a name wins, as when streamed
+                for name, schema in partial_definitions.pop("definitions").items():
+                    definitions["definitions"].setdefault(name, schema)
+
             definitions.update(partial_definitions)
 
         return definitions
@@ -42,7 +69,30 @@ class JSONSchemaTransformer(AbstractTransformer):
     def transform_by_model(self, model: DeclarativeMeta, depth: Optional[int], /) -> Schema:
         return self.schema_factory(model, depth=depth)
 
-    def transform_by_module(self, module: ModuleType, depth: Optional[int], /) -> Schema:
+    def transform_iter(
+        self, rawtargets: Iterable[Target], depth: Optional[int], /
+    ) -> Iterator[tuple[str, Schema]]:
+        seen: set[str] = set()
+
+        for item in rawtargets:
+            if not is_collection(item):
+                raise TypeError(f"Expected a module or discovered models, got {item}")
+
+            for basemodel in collect_models(item):
+                schema = self.schema_factory(basemodel, depth=depth)
+                schema.pop("definitions", None)
+
+                if schema["title"] not in seen:
+                    seen.add(schema["title"])
+                    yield schema["title"], schema
+
+    def streamable(self, rawtargets: Sequence[Target], /) -> bool:
+        # a single model is emitted as a bare schema rather than inside "definitions"
+        return all(is_collection(item) for item in rawtargets)
+
+    def transform_by_module(
+        self, module: Union[ModuleType, DiscoveredModels], depth: Optional[int], /
+    ) -> Schema:
         subdefinitions = {}
         definitions = {}
         for basemodel in collect_models(module):
@@ -57,54 +107,66 @@ class JSONSchemaTransformer(AbstractTransformer):
 
 
 class OpenAPI2Transformer(AbstractTransformer):
-    def transform(
-        self, rawtargets: Iterable[Union[ModuleType, DeclarativeMeta]], depth: Optional[int], /
-    ) -> Schema:
-        definitions = {}
-
-        for target in rawtargets:
+    def __init__(self, schema_factory: SchemaSource, /):
+        super().__init__(schema_factory)
+        # names reused with different content by the last transform
+        self.conflicts: list[str] = []
+
+    def transform(self, rawtargets: Iterable[Target], depth: Optional[int], /) -> Schema:
+        return {"definitions": dict(self.transform_iter(rawtargets, depth))}
+
+    def transform_iter(
+        self, rawtargets: Iterable[Target], depth: Optional[int], /
+    ) -> Iterator[tuple[str, Schema]]:
+        """Yield the entries of the envelope one model at a time.
+
+        Definitions are deduplicated by content (see :class:`DefinitionIndex`): identical
+        definitions are emitted once and references to the others are rewritten.
+        """
+        targets = list(rawtargets)
+        models = {
+            model.__name__
+            for target in targets
+            for model in (
+                collect_models(target)
+                if is_collection(target)
+                else [cast(DeclarativeMeta, target)]
+            )
+        }
+        index = DefinitionIndex(ref_prefix=self.schema_factory.ref_prefix)
+        self.conflicts = index.conflicts
+
+        for target in targets:
             if inspect.isclass(target) and isinstance(target, DeclarativeMeta):
-                partial_definitions = self.transform_by_model(target, depth)
-            elif inspect.ismodule(target):
-                partial_definitions = self.transform_by_module(target, depth)
+                schema = self.schema_factory(target, depth=depth)
+                batch = [
+                    (name, definition)
+                    for name, definition in schema.pop("definitions", {}).items()
+                    if name not in models
+                ]
+                batch.append((schema["title"], schema))
+                kept = [(name, schema) for name, schema in batch if index.add(name, schema)]
+
+                for name, schema in kept:
+                    # an alias found later in the batch may be referenced by an earlier entry
+                    index.rewrite_refs(schema)
+
+                    yield name, schema
+            elif is_collection(target):
+                for basemodel in collect_models(target):
+                    schema = self.schema_factory(basemodel, depth=depth)
+                    schema.pop("definitions", None)
+
+                    if index.add(schema["title"], schema):
+                        yield schema["title"], schema
             else:
                 raise TypeError(f"Expected a class or module, got {target}")
 
-            definitions.update(partial_definitions)
-
-        return {"definitions": definitions}
-
-    def transform_by_model(self, model: DeclarativeMeta, depth: Optional[int], /) -> Schema:
-        definitions = {}
-        schema = self.schema_factory(model, depth=depth)
-
-        if "definitions" in schema:
-            definitions.update(schema.pop("definitions"))
-
-        definitions[schema["title"]] = schema
-
-        return definitions
-
-    def transform_by_module(self, module: ModuleType, depth: Optional[int], /) -> Schema:
-        subdefinitions = {}
-        definitions = {}
-
-        for basemodel in collect_models(module):
-            schema = self.schema_factory(basemodel, depth=depth)
-
-            if "definitions" in schema:
-                subdefinitions.update(schema.pop("definitions"))
-
-            definitions[schema["title"]] = schema
-
-        d = {}
-        d.update(subdefinitions)
-        d.update(definitions)
-
-        return definitions
-
 
 class OpenAPI3Transformer(OpenAPI2Transformer):
+    envelope = ("components", "schemas")
+    ref_prefix = "#/components/schemas/"
+
     def replace_ref(self, d: Union[dict, list], old_prefix: str, new_prefix: str, /) -> None:
         if isinstance(d, dict):
             for k, v in d.items():
@@ -116,27 +178,32 @@ class OpenAPI3Transformer(OpenAPI2Transformer):
             for item in d:
                 self.replace_ref(item, old_prefix, new_prefix)
 
-    def transform(
-        self, rawtargets: Iterable[Union[ModuleType, DeclarativeMeta]], depth: Optional[int], /
-    ) -> Schema:
-        definitions = super().transform(rawtargets, depth)
+    def transform(self, rawtargets: Iterable[Target], depth: Optional[int], /) -> Schema:
+        return {"components": {"schemas": dict(self.transform_iter(rawtargets, depth))}}
 
-        self.replace_ref(definitions, "#/definitions/", "#/components/schemas/")
+    def transform_iter(
+        self, rawtargets: Iterable[Target], depth: Optional[int], /
+    ) -> Iterator[tuple[str, Schema]]:
+        rewrite = self.schema_factory.ref_prefix != self.ref_prefix
 
-        if "components" not in definitions:
-            definitions["components"] = {}
-        if "schemas" not in definitions["components"]:
-            definitions["components"]["schemas"] = {}
-        definitions["components"]["schemas"] = definitions.pop("definitions", {})
-        return definitions
+        for name, schema in super().transform_iter(rawtargets, depth):
+            if rewrite:
+                self.replace_ref(schema, self.schema_factory.ref_prefix, self.ref_prefix)
+
+            yield name, schema
+
+
+def is_collection(target: object, /) -> TypeGuard[Union[ModuleType, DiscoveredModels]]:
+    return inspect.ismodule(target) or isinstance(target, DiscoveredModels)
 
 
-def collect_models(module: ModuleType, /) -> Iterator[DeclarativeMeta]:
+def collect_models(module: Union[ModuleType, DiscoveredModels], /) -> Iterator[DeclarativeMeta]:
     def is_alchemy_model(maybe_model: type, /) -> TypeGuard[DeclarativeMeta]:
         if not inspect.isclass(maybe_model):
             return False
 
-        if not (hasattr(maybe_model, "__table__") or hasattr(maybe_model, "__tablename__")):
+        # mixins and declarative bases may carry __tablename__, but are not mapped
+        if not isinstance(sa_inspect(maybe_model, raiseerr=False), Mapper):
             return False
 
         logger.debug("{maybe_model} is a SQLAlchemy model", maybe_model=maybe_model)
@@ -145,7 +212,9 @@ def collect_models(module: ModuleType, /) -> Iterator[DeclarativeMeta]:
 
     items: Iterable[type]
 
-    if hasattr(module, "__all__"):
+    if isinstance(module, DiscoveredModels):
+        return iter(module.models)  # type: ignore[arg-type]  # mapped, by construction
+    elif hasattr(module, "__all__"):
         logger.debug("Module {module} has an __all__ attribute", module=module)
 
         items = (getattr(module, name) for name in module.__all__)
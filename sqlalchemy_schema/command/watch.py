@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import time
+from collections.abc import Collection, Hashable, Iterable, Sequence
+from hashlib import blake2b
+from importlib.util import cache_from_source
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from loguru import logger
+from sqlalchemy.orm import Mapper, configure_mappers, registry
+
+from sqlalchemy_schema.command.cache import source_roots
+from sqlalchemy_schema.command.driver import TRANSFORMER_MAP, Driver
+from sqlalchemy_schema.command.intermediate import GeneratedSchemas
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.types import Format, Layout
+
+
+def mapper_fingerprint(mapper: Mapper, /) -> str:
+    """What a mapper contributes to a schema: its class, columns and relationships."""
+    cls = mapper.class_
+    parts: list[Any] = [
+        cls.__module__,
+        cls.__qualname__,
+        cls.__doc__,
+        None if mapper.inherits is None else mapper.inherits.class_.__qualname__,
+        repr(mapper.polymorphic_identity),
+    ]
+
+    for prop in mapper.column_attrs:
+        parts.append(prop.key)
+        parts.extend((repr(column), column.doc, column.comment) for column in prop.columns)
+
+    for relationship in mapper.relationships:
+        target = relationship.mapper.class_
+        parts.append(
+            (
+                relationship.key,
+                target.__module__,
+                target.__qualname__,
+                relationship.direction.name,
+                relationship.uselist,
+            )
+        )
+
+    return blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+class FingerprintedSchemas(GeneratedSchemas):
+    """Generated schemas kept by the structure of the mappers they were built from.
+
+    A model's key covers every mapper reachable from it through relationships and
+    inheritance, so after a reload only the models whose mappers, or related mappers,
+    changed are walked again.
+    """
+
+    def __init__(self, schema_factory: SchemaFactory, /) -> None:
+        super().__init__(schema_factory)
+        self.fingerprints: dict[Mapper, str] = {}
+        self.used: set[Hashable] = set()
+
+    def key(self, model: Any, depth: Optional[int], /) -> Hashable:
+        root = sa.inspect(model)
+        reachable = {root}
+        pending = [root]
+
+        while pending:
+            mapper = pending.pop()
+            related = [prop.mapper for prop in mapper.relationships]
+            if mapper.inherits is not None:
+                related.append(mapper.inherits)
+            for other in related:
+                if other not in reachable:
+                    reachable.add(other)
+                    pending.append(other)
+
+        fingerprints = sorted(self.fingerprint(mapper) for mapper in reachable)
+        key = (self.fingerprint(root), tuple(fingerprints), depth)
+        self.used.add(key)
+
+        return key
+
+    def fingerprint(self, mapper: Mapper, /) -> str:
+        fingerprint = self.fingerprints.get(mapper)
+
+        if fingerprint is None:
+            fingerprint = self.fingerprints[mapper] = mapper_fingerprint(mapper)
+
+        return fingerprint
+
+    def reset(self) -> None:
+        """Forget the mappers of the last run, e.g. before the models are reloaded."""
+        self.fingerprints.clear()
+        self.used.clear()
+        self.schema_factory.relation_decision.cache_clear()
+
+    def prune(self) -> None:
+        """Drop the schemas the last run did not use."""
+        for key in self.schemas.keys() - self.used:
+            del self.schemas[key]
+
+
+class Watcher:
+    """Regenerates the outputs of a run whenever the sources of its models change.
+
+    The source files of the modules loaded from the targets' packages are polled. A
+    changed module is reloaded together with the other modules mapping classes in the
+    same registries, since sqlalchemy can only re-map a registry as a whole; the schemas
+    of models whose mappers did not change are reused. New modules are not picked up
+    until the command is restarted.
+    """
+
+    def __init__(
+        self,
+        driver: Driver,
+        targets: Sequence[str],
+        outputs: Sequence[tuple[Layout, Optional[Path]]],
+        /,
+        *,
+        format: Optional[Format] = None,
+        recursive: bool = False,
+        interval: float = 1.0,
+    ) -> None:
+        self.driver = driver
+        self.targets = targets
+        self.outputs = outputs
+        self.format = format
+        self.recursive = recursive
+        self.interval = interval
+        ref_prefix = TRANSFORMER_MAP[outputs[0][0]].ref_prefix
+        self.schemas = FingerprintedSchemas(driver.build_schema_factory(ref_prefix))
+        # module name -> (source file, its last seen stat)
+        self.sources: dict[str, tuple[Path, tuple[int, int]]] = {}
+        # modules whose reload failed, retried with the next change
+        self.pending: set[str] = set()
+
+    def generate(self) -> None:
+        self.driver.run(
+            self.targets,
+            format=self.format,
+            recursive=self.recursive,
+            outputs=self.outputs,
+            schemas=self.schemas,
+        )
+        self.schemas.prune()
+        self.sources = self.find_sources()
+
+    def find_sources(self) -> dict[str, tuple[Path, tuple[int, int]]]:
+        roots = [
+            root for target in self.targets for root in source_roots(target.split(":", 1)[0]) or ()
+        ]
+        sources = {}
+
+        for name, module in list(sys.modules.items()):
+            filename = getattr(module, "__file__", None)
+            if filename is None:
+                continue
+            path = Path(filename)
+            if any(path == root or path.is_relative_to(root) for root in roots):
+                sources[name] = (path, _stat(path))
+
+        return sources
+
+    def poll(self) -> set[str]:
+        return {
+            name
+            for name, (path, stat) in self.sources.items()
+            if (_stat(path) if path.exists() else (-1, -1)) != stat
+        }
+
+    def reload(self, changed: Collection[str], /) -> None:
+        modules = [sys.modules[name] for name in sys.modules if name in changed]
+        registries = _dependent_registries(_registries_of(modules), _registries_of(self.modules()))
+        names = set(changed)
+        tables: list[sa.Table] = []
+
+        for source_registry in registries:
+            for mapper in source_registry.mappers:
+                names.add(mapper.class_.__module__)
+                tables.extend(table for table in mapper.tables if isinstance(table, sa.Table))
+
+        # in import order, so a module is reloaded after the ones it depends on
+        to_reload = [module for name, module in list(sys.modules.items()) if name in names]
+        tables.extend(
+            value
+            for module in to_reload
+            for value in vars(module).values()
+            if isinstance(value, sa.Table)
+        )
+
+        logger.info("Reloading {modules}", modules=[module.__name__ for module in to_reload])
+
+        for source_registry in registries:
+            source_registry.dispose(cascade=True)
+        for table in tables:
+            if table.metadata.tables.get(table.key) is table:
+                table.metadata.remove(table)
+
+        self.schemas.reset()
+        self.driver.discovery.clear()
+
+        for module in to_reload:
+            filename = getattr(module, "__file__", None)
+            if filename is not None:
+                # the bytecode only records the source's mtime in seconds
+                Path(cache_from_source(filename)).unlink(missing_ok=True)
+            importlib.reload(module)
+
+        configure_mappers()
+
+    def modules(self) -> list[ModuleType]:
+        return [sys.modules[name] for name in self.sources if name in sys.modules]
+
+    def watch(self, *, iterations: Optional[int] = None) -> None:
+        """Generate, then regenerate on every change until interrupted.
+
+        ``iterations`` limits the number of polls.
+        """
+        self.generate()
+
+        polls = 0
+        while iterations is None or polls < iterations:
+            try:
+                time.sleep(self.interval)
+            except KeyboardInterrupt:
+                return
+            polls += 1
+
+            changed = self.poll()
+            if not changed:
+                continue
+            changed |= self.pending
+
+            try:
+                self.reload(changed)
+                self.generate()
+            except Exception:
+                logger.exception("Regeneration failed, waiting for the next change")
+                self.pending = set(changed)
+                # remember the new stats so the broken files are not retried until saved
+                for name in changed & self.sources.keys():
+                    path, _ = self.sources[name]
+                    if path.exists():
+                        self.sources[name] = (path, _stat(path))
+            else:
+                self.pending = set()
+
+
+def _stat(path: Path, /) -> tuple[int, int]:
+    stat = os.stat(path)
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _registries_of(modules: Iterable[ModuleType], /) -> set[registry]:
+    registries: set[registry] = set()
+
+    for module in modules:
+        for value in vars(module).values():
+            mapper = sa.inspect(value, raiseerr=False) if isinstance(value, type) else None
+            if isinstance(mapper, Mapper) and value.__module__ == module.__name__:
+                registries.add(mapper.registry)
+
+    return registries
+
+
+def _dependent_registries(changed: set[registry], known: set[registry], /) -> set[registry]:
+    """``changed`` and the registries with relationships into them, which sqlalchemy
+    disposes along with them."""
+    registries = set(changed)
+    grew = True
+
+    while grew:
+        grew = False
+        for other in known - registries:
+            if any(
+                prop.mapper.registry in registries
+                for mapper in other.mappers
+                for prop in mapper.relationships
+            ):
+                registries.add(other)
+                grew = True
+
+    return registries
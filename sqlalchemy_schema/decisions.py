@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from collections.abc import Iterator
-from typing import Any, Union
+from collections.abc import Hashable, Iterator
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any, Union
 
 from sqlalchemy.orm import MapperProperty
 from sqlalchemy.orm.base import MANYTOMANY, MANYTOONE
@@ -10,12 +11,17 @@ from sqlalchemy.orm.relationships import RelationshipProperty
 from sqlalchemy_schema.types import ColumnPropertyType
 from sqlalchemy_schema.walkers import AbstractWalker
 
+if TYPE_CHECKING:
+    from sqlalchemy_schema.graph import RegistryGraph
+
 DecisionResult = tuple[
     ColumnPropertyType, Union[ColumnProperty, RelationshipProperty, MapperProperty], dict[str, Any]
 ]
 
 
 class AbstractDecision(ABC):
+    _decisions: dict[Hashable, tuple[DecisionResult, ...]]
+
     @abstractmethod
     def decision(
         self,
@@ -27,8 +33,72 @@ class AbstractDecision(ABC):
     ) -> Iterator[DecisionResult]:
         pass
 
+    def cache_key(
+        self,
+        walker: AbstractWalker,
+        prop: MapperProperty,
+        /,
+        *,
+        toplevel: bool = False,
+    ) -> Hashable | None:
+        """Return a key that determines the outcome of ``decision``, or None to not cache it.
+
+        Subclasses opt in to caching by returning everything ``decision`` depends on. The
+        built-in keys only cover the built-in ``decision``s; a subclass overriding
+        ``decision`` is not cached unless it overrides this as well.
+        """
+        return None
+
+    def decide(
+        self,
+        walker: AbstractWalker,
+        prop: MapperProperty,
+        /,
+        *,
+        toplevel: bool = False,
+    ) -> tuple[DecisionResult, ...]:
+        key = self.cache_key(walker, prop, toplevel=toplevel)
+
+        if key is None:
+            return tuple(self.decision(walker, prop, toplevel=toplevel))
+
+        cache = self.__dict__.get("_decisions")
+        if cache is None:
+            cache = self._decisions = {}
+
+        results = cache.get(key)
+        if results is None:
+            results = cache[key] = tuple(self.decision(walker, prop, toplevel=toplevel))
+
+        # an immediate schema ends up in the output, so every caller gets its own copy
+        return tuple(
+            (
+                (deepcopy(action), prop, opts)  # type: ignore[misc]
+                if isinstance(action, dict)
+                else (action, prop, opts)
+            )
+            for action, prop, opts in results
+        )
+
+    def cache_clear(self) -> None:
+        self._decisions = {}
+
 
 class RelationDecision(AbstractDecision):
+    def cache_key(
+        self,
+        walker: AbstractWalker,
+        prop: MapperProperty,
+        /,
+        *,
+        toplevel: bool = False,
+    ) -> Hashable | None:
+        # a subclass deciding differently has to opt in with a key of its own
+        if type(self).decision is not RelationDecision.decision:
+            return None
+
+        return prop
+
     def decision(
         self,
         walker: AbstractWalker,
@@ -46,6 +116,22 @@ class RelationDecision(AbstractDecision):
 
 
 class UseForeignKeyIfPossibleDecision(AbstractDecision):
+    def cache_key(
+        self,
+        walker: AbstractWalker,
+        prop: MapperProperty,
+        /,
+        *,
+        toplevel: bool = False,
+    ) -> Hashable | None:
+        if type(self).decision is not UseForeignKeyIfPossibleDecision.decision:
+            return None
+
+        # below the top level a many-to-one is compared with the relationship followed first
+        root = None if toplevel or not walker.history else walker.history[0]
+
+        return walker.mapper, prop, toplevel, root
+
     def decision(
         self,
         walker: AbstractWalker,
@@ -55,7 +141,10 @@ class UseForeignKeyIfPossibleDecision(AbstractDecision):
         toplevel: bool = False,
     ) -> Iterator[DecisionResult]:
         if hasattr(prop, "mapper"):
-            if prop.direction == MANYTOONE:
+            graph = getattr(walker, "graph", None)
+            if graph is not None:
+                yield from self._graph_decision(graph, walker, prop, toplevel=toplevel)
+            elif prop.direction == MANYTOONE:
                 if toplevel:
                     for c in prop.local_columns:
                         yield ColumnPropertyType.FOREIGNKEY, walker.mapper._props[c.name], {
@@ -82,3 +171,30 @@ class UseForeignKeyIfPossibleDecision(AbstractDecision):
             yield ColumnPropertyType.FOREIGNKEY, prop, {}
         else:
             raise NotImplementedError(prop)
+
+    def _graph_decision(
+        self,
+        graph: "RegistryGraph",
+        walker: AbstractWalker,
+        prop: MapperProperty,
+        /,
+        *,
+        toplevel: bool = False,
+    ) -> Iterator[DecisionResult]:
+        # the same decision, reading the precomputed relation instead of the property
+        relation = graph.relation(prop)
+
+        if relation.direction == MANYTOONE:
+            if toplevel or relation.local_columns != graph.relation(walker.history[0]).remote_side:
+                for name in relation.local_column_names:
+                    yield ColumnPropertyType.FOREIGNKEY, walker.mapper._props[name], {
+                        "relation": prop.key
+                    }
+        elif relation.direction == MANYTOMANY:
+            yield (
+                {"type": "array", "items": {"type": "string"}},  # type: ignore[misc]
+                prop,
+                {},
+            )
+        else:
+            yield ColumnPropertyType.RELATIONSHIP, prop, {}
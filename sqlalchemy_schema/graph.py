@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+from sqlalchemy.orm import Mapper, MapperProperty, RelationshipDirection, registry
+from sqlalchemy.orm.relationships import RelationshipProperty
+from sqlalchemy.sql.elements import ColumnElement
+
+
+class Relation(NamedTuple):
+    """A relationship between two mappers of a :class:`RegistryGraph`."""
+
+    id: int
+    source: int
+    target: int
+    prop: RelationshipProperty
+    direction: RelationshipDirection
+    local_columns: frozenset[ColumnElement[Any]]
+    remote_side: frozenset[ColumnElement[Any]]
+    # names of the local columns, in the order sqlalchemy reports them
+    local_column_names: tuple[str, ...]
+
+
+def _mapper_key(mapper: Mapper) -> tuple[str, str]:
+    return mapper.class_.__module__, mapper.class_.__qualname__
+
+
+def _mappers_of(source: Any) -> Iterable[Mapper]:
+    if isinstance(source, registry):
+        return source.mappers
+    elif isinstance(getattr(source, "registry", None), registry):
+        return source.registry.mappers  # type: ignore[no-any-return]  # a declarative base
+
+    return source  # type: ignore[no-any-return]
+
+
+class RegistryGraph:
+    """The relationships of a set of mappers, read once.
+
+    Mappers are numbered in a stable order (module, then class name) and relationships
+    are stored per source mapper in adjacency arrays: the relations of mapper ``i`` are
+    ``relations[offsets[i]:offsets[i + 1]]``, in the order of ``mapper.relationships``.
+    Mappers that are only reachable through a relationship are added as nodes as well.
+
+    The graph is a snapshot; build a new one after mappers are added or reconfigured.
+    """
+
+    def __init__(self, mappers: registry | Any | Iterable[Mapper], /) -> None:
+        self.mappers: list[Mapper] = sorted(_mappers_of(mappers), key=_mapper_key)
+        self.ids: dict[Mapper, int] = {mapper: i for i, mapper in enumerate(self.mappers)}
+        self.relations: list[Relation] = []
+        self.offsets = array("l", [0])
+        self._by_prop: dict[MapperProperty, Relation] = {}
+
+        i = 0
+        while i < len(self.mappers):  # grows while unknown targets are discovered
+            for prop in self.mappers[i].relationships:
+                self._add_relation(i, prop)
+            self.offsets.append(len(self.relations))
+            i += 1
+
+        self.targets = array("l", (relation.target for relation in self.relations))
+        self.components = self._strongly_connected_components()
+        self.component_of = array("l", [0] * len(self.mappers))
+        for index, component in enumerate(self.components):
+            for node in component:
+                self.component_of[node] = index
+
+    def _add_relation(self, source: int, prop: RelationshipProperty, /) -> None:
+        target_mapper = prop.mapper
+        target = self.ids.get(target_mapper)
+
+        if target is None:
+            target = self.ids[target_mapper] = len(self.mappers)
+            self.mappers.append(target_mapper)
+
+        local_columns = tuple(prop.local_columns)
+        relation = Relation(
+            len(self.relations),
+            source,
+            target,
+            prop,
+            prop.direction,
+            frozenset(local_columns),
+            frozenset(prop.remote_side),
+            tuple(str(c.name) for c in local_columns),
+        )
+        self.relations.append(relation)
+        self._by_prop[prop] = relation
+
+    def _strongly_connected_components(self) -> tuple[tuple[int, ...], ...]:
+        # Tarjan's algorithm with an explicit stack; components are emitted after every
+        # component they have a relationship to
+        size = len(self.mappers)
+        index = [-1] * size
+        lowlink = [0] * size
+        on_stack = [False] * size
+        stack: list[int] = []
+        components: list[tuple[int, ...]] = []
+        counter = 0
+
+        for root in range(size):
+            if index[root] != -1:
+                continue
+
+            work = [(root, self.offsets[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                node, edge = work[-1]
+
+                if edge < self.offsets[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = self.targets[edge]
+
+                    if index[target] == -1:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, self.offsets[target]))
+                    elif on_stack[target]:
+                        lowlink[node] = min(lowlink[node], index[target])
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                if lowlink[node] == index[node]:
+                    component: list[int] = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(tuple(sorted(component)))
+
+        return tuple(components)
+
+    def id(self, mapper: Mapper, /) -> int:
+        return self.ids[mapper]
+
+    def relations_of(self, mapper: Mapper, /) -> list[Relation]:
+        i = self.ids[mapper]
+        start, stop = self.offsets[i], self.offsets[i + 1]
+
+        return self.relations[start:stop]
+
+    def relation(self, prop: MapperProperty, /) -> Relation:
+        return self._by_prop[prop]
+
+    def is_cyclic(self, mapper: Mapper, /) -> bool:
+        i = self.ids[mapper]
+        component = self.components[self.component_of[i]]
+
+        return len(component) > 1 or any(r.target == i for r in self.relations_of(mapper))
+
+    def cyclic_components(self) -> list[list[Mapper]]:
+        return [
+            [self.mappers[i] for i in component]
+            for component in self.components
+            if self.is_cyclic(self.mappers[component[0]])
+        ]
+
+    def topological_order(self) -> list[Mapper]:
+        """Mappers ordered so that each comes after the mappers it has relationships to.
+
+        Mappers in the same strongly connected component are adjacent, in id order.
+        """
+        return [self.mappers[i] for component in self.components for i in component]
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, Callable
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.orm import MapperProperty
+
+from sqlalchemy_schema.exceptions import InvalidStatus
+from sqlalchemy_schema.schema_factory import (
+    CollectionForOverrides,
+    Schema,
+    SchemaFactory,
+    sort_required,
+)
+from sqlalchemy_schema.types import ColumnPropertyType
+from sqlalchemy_schema.walkers import PropertyPath
+
+Thunk = Callable[[], Any]
+
+
+class LazyProperties(Mapping[str, Any]):
+    """The ``properties`` of a :class:`LazySchema`.
+
+    The model is walked on first use to learn the property names; each property's
+    subschema, and for relationships the definitions it needs, is built on first access.
+    """
+
+    def __init__(self, schema: LazySchema, /) -> None:
+        self._schema = schema
+        self._thunks: dict[str, Thunk] | None = None
+        self._relationships: list[str] = []
+        self._values: dict[str, Any] = {}
+        self._definitions: dict[str, dict[str, Schema]] = {}
+        self._required: set[str] = set()
+
+    def _plan(self) -> dict[str, Thunk]:
+        if self._thunks is not None:
+            return self._thunks
+
+        schema = self._schema
+        factory = schema.factory
+        walker = factory.root_walker(
+            schema.model, includes=schema.includes, excludes=schema.excludes
+        )
+        thunks: dict[str, Thunk] = {}
+
+        if schema.depth is not None and schema.depth <= 0:
+            for walked_prop in walker.walk():
+                factory._collect_required(
+                    walked_prop, self._required, adjust_required=schema.adjust_required
+                )
+            self._thunks = thunks
+            # no property is built, so no override can apply
+            schema.check_overrides()
+            return thunks
+
+        for walked_prop in walker.walk():
+            factory._collect_required(
+                walked_prop, self._required, adjust_required=schema.adjust_required
+            )
+
+            for action, prop, opts in factory.relation_decision.decide(
+                walker, walked_prop, toplevel=True
+            ):
+                if action == ColumnPropertyType.RELATIONSHIP:
+                    if prop.key not in self._relationships:
+                        self._relationships.append(prop.key)
+                    thunks[prop.key] = self._relationship_thunk(walker, prop)
+                elif action == ColumnPropertyType.FOREIGNKEY:
+                    for column in prop.columns:
+                        thunks[str(column.name)] = self._column_thunk(column, opts)
+                else:  # immediate
+                    thunks[prop.key] = self._immediate_thunk(action)
+
+        self._thunks = thunks
+        return thunks
+
+    def _column_thunk(self, column: Any, opts: dict[str, Any], /) -> Thunk:
+        schema = self._schema
+
+        return lambda: schema.factory._build_column(column, schema.overrides_manager, opts)
+
+    def _immediate_thunk(self, action: Any, /) -> Thunk:
+        return lambda: action
+
+    def _relationship_thunk(self, walker: Any, prop: MapperProperty, /) -> Thunk:
+        schema = self._schema
+
+        def build() -> Any:
+            factory = schema.factory
+
+            if factory.shared_definitions:
+                # shared definitions are only meaningful for the relationship graph as a whole
+                eager = schema.eager()
+                self._definitions[prop.key] = eager.get("definitions", {})
+                return eager["properties"][prop.key]
+
+            root_schema: Schema = {}
+            history = PropertyPath([prop])
+            subwalker = factory.child_factory.child_walker(prop, walker, history=history)
+            suboverrides = factory.child_factory.child_overrides(prop, schema.overrides_manager)
+            value, subrequired = factory._child_schema(
+                prop, root_schema, subwalker, suboverrides, depth=schema.depth, history=history
+            )
+            current_schema: dict[str, Any] = {}
+            factory._add_property_with_reference(
+                walker, root_schema, current_schema, prop, value, required=subrequired
+            )
+            self._definitions[prop.key] = root_schema["definitions"]
+
+            return current_schema[prop.key]
+
+        return build
+
+    def __getitem__(self, key: str, /) -> Any:
+        if key in self._values:
+            return self._values[key]
+
+        thunk = self._plan()[key]
+        value = self._values[key] = thunk()
+
+        if len(self._values) == len(self._thunks or ()):
+            self._schema.check_overrides()
+
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._plan())
+
+    def __len__(self) -> int:
+        return len(self._plan())
+
+    @property
+    def has_relationships(self) -> bool:
+        self._plan()
+
+        return bool(self._relationships)
+
+    @property
+    def required(self) -> set[str]:
+        self._plan()
+
+        return self._required
+
+    def definitions(self) -> dict[str, Schema]:
+        if not self.has_relationships:
+            raise KeyError("definitions")
+
+        # merged in walk order, so the result matches eager generation
+        definitions: dict[str, Schema] = {}
+
+        for key in self._relationships:
+            self[key]
+            definitions.update(self._definitions[key])
+
+        return definitions
+
+    def materialize(self) -> dict[str, Any]:
+        return {key: self[key] for key in self}
+
+
+class LazySchema(Mapping[str, Any]):
+    """A schema that is built piecemeal as its keys are read.
+
+    Compares equal to the dict returned by :class:`SchemaFactory` for the same arguments;
+    use :meth:`materialize` to get that dict.
+    """
+
+    def __init__(
+        self,
+        factory: SchemaFactory,
+        model: DeclarativeMeta,
+        /,
+        *,
+        includes: Sequence[str] | None = None,
+        excludes: Sequence[str] | None = None,
+        overrides: dict | None = None,
+        depth: int | None = None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
+    ) -> None:
+        self.factory = factory
+        self.model = model
+        self.includes = includes
+        self.excludes = excludes
+        self.overrides = overrides
+        self.depth = depth
+        self.adjust_required = adjust_required
+        self.overrides_manager = CollectionForOverrides(
+            overrides or {}, splitter=factory.child_factory.splitter
+        )
+        self.properties = LazyProperties(self)
+        self._eager: Schema | None = None
+        self._definitions: dict[str, Schema] | None = None
+        # an allOf schema is mostly definitions; it is built eagerly on first access
+        self._all_of = factory.all_of_inheritance and inspect(model).mapper.inherits is not None
+
+    def eager(self) -> Schema:
+        if self._eager is None:
+            self._eager = self.factory._generate(
+                self.model,
+                includes=self.includes,
+                excludes=self.excludes,
+                overrides=self.overrides,
+                depth=self.depth,
+                adjust_required=self.adjust_required,
+                overrides_manager=self.overrides_manager,
+            )
+
+        return self._eager
+
+    def check_overrides(self) -> None:
+        if self.overrides_manager.not_used_keys:
+            raise InvalidStatus(f"invalid overrides: {self.overrides_manager.not_used_keys}")
+
+    def _keys(self) -> list[str]:
+        if self._all_of:
+            return list(self.eager())
+
+        keys = ["title", "type"]
+
+        if self.properties.has_relationships:
+            keys.append("definitions")
+
+        keys.append("properties")
+
+        if self.model.__doc__:
+            keys.append("description")
+        if self.properties.required:
+            keys.append("required")
+
+        return keys
+
+    def __getitem__(self, key: str, /) -> Any:
+        if self._all_of:
+            return self.eager()[key]
+        elif key == "title":
+            return self.model.__name__
+        elif key == "type":
+            return "object"
+        elif key == "properties":
+            return self.properties
+        elif key == "description" and self.model.__doc__:
+            return self.model.__doc__
+        elif key == "definitions":
+            if self._definitions is None:
+                self._definitions = self.properties.definitions()
+            return self._definitions
+        elif key == "required" and self.properties.required:
+            return sort_required(self.properties.required)
+
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def materialize(self) -> Schema:
+        if self._all_of:
+            return self.eager()
+
+        return {
+            key: self.properties.materialize() if key == "properties" else self[key]
+            for key in self
+        }
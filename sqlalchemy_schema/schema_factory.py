@@ -22,26 +22,40 @@ JSON Schema defines seven primitive types for JSON values:
 
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
-from typing import Any, Callable
+from collections import deque
+from collections.abc import Collection, Generator, Hashable, Mapping, Sequence
+from copy import deepcopy
+from functools import cache
+from inspect import Parameter, signature
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
 
 import sqlalchemy.types as t
-from sqlalchemy import Enum
-from sqlalchemy.dialects import postgresql as postgresql_types
+from loguru import logger
+from sqlalchemy import Enum, inspect
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.orm import MapperProperty
+from sqlalchemy.orm import Mapper, MapperProperty
 from sqlalchemy.orm.base import ONETOMANY
 from sqlalchemy.sql.elements import NamedColumn
 from sqlalchemy.sql.type_api import TypeEngine
 from sqlalchemy.sql.visitors import Visitable
 
+from sqlalchemy_schema.budget import GenerationBudget
 from sqlalchemy_schema.decisions import AbstractDecision, RelationDecision
 from sqlalchemy_schema.exceptions import InvalidStatus
 from sqlalchemy_schema.types import ColumnPropertyType
-from sqlalchemy_schema.walkers import AbstractWalker
+from sqlalchemy_schema.utils.cache import CacheInfo, LRUCache
+from sqlalchemy_schema.utils.paths import PathTrie
+from sqlalchemy_schema.walkers import AbstractWalker, PropertyPath
+
+if TYPE_CHECKING:
+    from sqlalchemy_schema.graph import RegistryGraph
+    from sqlalchemy_schema.lazy import LazySchema
 
 Schema = dict[str, Any]
 
+# ancestors' allOf levels kept per factory; one entry per ancestor and set of options
+ANCESTOR_CACHE_SIZE = 256
+
 #  tentative
 DefaultColumnToSchemaDict = Mapping[type[TypeEngine], str]
 
@@ -64,7 +78,7 @@ default_column_to_schema: DefaultColumnToSchemaDict = {
     t.Enum: "string",
     t.LargeBinary: "xxx",
     t.JSON: "object",
-    postgresql_types.UUID: "string",
+    t.UUID: "string",
 }
 
 
@@ -103,11 +117,18 @@ default_restriction_dict: RestrictionDict = {
     t.DateTime: datetime_format,
     t.Date: date_format,
     t.Time: time_format,
-    postgresql_types.UUID: uuid_format,
+    t.UUID: uuid_format,
 }
 
 
 class Classifier:
+    """Resolve a column type to its JSON Schema type name.
+
+    Resolutions are memoized per type class. The cache is dropped whenever ``mapping``,
+    ``see_mro`` or ``see_impl`` is reassigned; call :meth:`cache_clear` after mutating
+    ``mapping`` in place.
+    """
+
     def __init__(
         self,
         mapping: DefaultColumnToSchemaDict = default_column_to_schema,
@@ -116,24 +137,69 @@ class Classifier:
         see_mro: bool = True,
         see_impl: bool = True,
     ) -> None:
+        self._cache: dict[type[TypeEngine], str | None] = {}
+        self.hits = 0
+        self.misses = 0
         self.mapping = mapping
         self.see_mro = see_mro
         self.see_impl = see_impl
 
+    @property
+    def mapping(self) -> DefaultColumnToSchemaDict:
+        return self._mapping
+
+    @mapping.setter
+    def mapping(self, mapping: DefaultColumnToSchemaDict, /) -> None:
+        self._mapping = mapping
+        self.cache_clear()
+
+    @property
+    def see_mro(self) -> bool:
+        return self._see_mro
+
+    @see_mro.setter
+    def see_mro(self, see_mro: bool, /) -> None:
+        self._see_mro = see_mro
+        self.cache_clear()
+
+    @property
+    def see_impl(self) -> bool:
+        return self._see_impl
+
+    @see_impl.setter
+    def see_impl(self, see_impl: bool, /) -> None:
+        self._see_impl = see_impl
+        self.cache_clear()
+
     def __getitem__(self, k: TypeEngine, /) -> tuple[type[TypeEngine], str]:
         cls = k.__class__
 
-        _, mapped = get_class_mapping(
-            self.mapping,  # type: ignore[arg-type]
-            cls,
-            see_mro=self.see_mro,
-            see_impl=self.see_impl,
-        )
+        try:
+            mapped = self._cache[cls]
+        except KeyError:
+            self.misses += 1
+            _, mapped = get_class_mapping(  # type: ignore[assignment]
+                self.mapping,  # type: ignore[arg-type]
+                cls,
+                see_mro=self.see_mro,
+                see_impl=self.see_impl,
+            )
+            self._cache[cls] = mapped
+        else:
+            self.hits += 1
 
         if mapped is None:
             raise InvalidStatus(f"notfound: {k}. (cls={cls})")
 
-        return cls, mapped  # type: ignore[return-value]
+        return cls, mapped
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, None, len(self._cache))
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
 
 
 def get_class_mapping(
@@ -192,22 +258,118 @@ def get_children(
 pop_marker = object()
 
 
+def sort_required(required_properties_set: set[str], /) -> list[str]:
+    # Ensure that the column name is a string object
+    # It can be a quoted_name() instance
+    return sorted(str(item) for item in required_properties_set)
+
+
+@cache
+def accepted_keywords(fn: Callable[..., Any], /) -> frozenset[str] | None:
+    """The keyword arguments ``fn`` accepts, or ``None`` when it takes ``**kwargs``."""
+    keywords = set()
+    for parameter in signature(fn).parameters.values():
+        if parameter.kind == Parameter.VAR_KEYWORD:
+            return None
+        if parameter.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY):
+            keywords.add(parameter.name)
+
+    return frozenset(keywords)
+
+
+def freeze(value: Any, /) -> Hashable:
+    """A hashable form of ``value``, equal only for values giving the same schema.
+
+    Everything is tagged with its kind, so ``1`` and ``True``, or a mapping and a list of
+    its pairs, are never confused.
+    """
+    if isinstance(value, Mapping):
+        return ("mapping", frozenset((freeze(k), freeze(v)) for k, v in value.items()))
+    elif isinstance(value, (list, tuple)):
+        return ("sequence", tuple(freeze(item) for item in value))
+    elif isinstance(value, (set, frozenset)):
+        return ("set", frozenset(freeze(item) for item in value))
+    else:
+        return (type(value), value)
+
+
+class _UnusedOverrides:
+    """The keys of a :class:`CollectionForOverrides`, one bit each until applied."""
+
+    def __init__(self, keys: list[str], /) -> None:
+        self.keys = keys
+        self.bits = (1 << len(keys)) - 1
+
+
 class CollectionForOverrides:
-    def __init__(self, params: dict[str, Any], /, *, pop_marker: object = pop_marker) -> None:
-        self.params = params or {}
-        self.not_used_keys = set(params.keys())
+    """Overrides for column subschemas, keyed by dotted path (``"users.name"``).
+
+    The keys are indexed once by relationship path and column name; :meth:`child`
+    returns the overrides below a relationship without copying anything. Which keys
+    have been applied is tracked in a bitmap shared by the whole tree.
+    """
+
+    def __init__(
+        self,
+        params: dict[str, Any],
+        /,
+        *,
+        pop_marker: object = pop_marker,
+        splitter: str = ".",
+    ) -> None:
+        params = params or {}
         self.pop_marker = pop_marker
+        self.columns: dict[str, Any] = {}
+        self._bits: dict[str, int] = {}
+        self._children: dict[str, CollectionForOverrides] = {}
+        self._unused = _UnusedOverrides(list(params))
+
+        for bit, (key, value) in enumerate(params.items()):
+            *path, name = key.split(splitter)
+            node = self
+            for step in path:
+                if step not in node._children:
+                    node._children[step] = node._node()
+                node = node._children[step]
+            node.columns[name] = value
+            node._bits[name] = bit
+
+    def _node(self) -> CollectionForOverrides:
+        node = self.__class__({}, pop_marker=self.pop_marker)
+        node._unused = self._unused
+
+        return node
+
+    @property
+    def not_used_keys(self) -> set[str]:
+        unused = self._unused
+
+        return {key for bit, key in enumerate(unused.keys) if unused.bits >> bit & 1}
 
     def __contains__(self, k: str, /) -> bool:
-        return k in self.params
+        return k in self.columns
 
-    def overrides(self, basedict: dict[str, Any], /) -> None:
-        for k, v in self.params.items():
-            if v == self.pop_marker:
+    def child(self, name: str, /) -> CollectionForOverrides:
+        node = self._children.get(name)
+
+        return self._node() if node is None else node
+
+    def overrides(self, name: str, basedict: dict[str, Any], /) -> None:
+        for k, v in self.columns[name].items():
+            if v is self.pop_marker:
                 basedict.pop(k, None)
             else:
                 basedict[k] = v
-            self.not_used_keys.remove(k)
+
+        self._unused.bits &= ~(1 << self._bits[name])
+
+    def mark_used(self, keys: Collection[str], /) -> None:
+        """Count ``keys`` as applied, e.g. when a schema built with them is reused."""
+        unused = self._unused
+
+        for bit, key in enumerate(unused.keys):
+            if key in keys:
+                unused.bits &= ~(1 << bit)
 
 
 class ChildFactory:
@@ -228,9 +390,13 @@ class ChildFactory:
         return excludes
 
     def child_overrides(self, prop: MapperProperty, overrides: Any, /) -> Any:
-        name = prop.key
-        children = get_children(name, overrides.params, splitter=self.splitter)
-        return overrides.__class__(children, pop_marker=overrides.pop_marker)
+        return overrides.child(prop.key)
+
+    def paths(self, params: Collection[str] | None, /) -> PathTrie | None:
+        if params is None or isinstance(params, PathTrie):
+            return params
+
+        return PathTrie.parse(params, splitter=self.splitter)
 
     def child_walker(
         self,
@@ -239,15 +405,16 @@ class ChildFactory:
         /,
         *,
         history: Any | None = None,
+        exclude_backrefs: bool = True,
     ) -> AbstractWalker:
         name = prop.key
-        includes = get_children(name, walker.includes, splitter=self.splitter)
-        excludes = get_children(name, walker.includes, splitter=self.splitter, default=[])
+        parent_includes = self.paths(walker.includes)
+        parent_excludes = self.paths(walker.excludes)
+        includes = None if parent_includes is None else parent_includes.child(name)
+        excludes = PathTrie() if parent_excludes is None else parent_excludes.child(name)
 
-        if excludes is None:
-            excludes = self.default_excludes(prop)
-        else:
-            excludes.extend(self.default_excludes(prop))
+        if exclude_backrefs:
+            excludes = excludes.with_names(self.default_excludes(prop))
 
         return walker.clone(
             name,
@@ -268,6 +435,8 @@ class ChildFactory:
         *,
         depth: int | None = None,
         history: Any | None = None,
+        budget: GenerationBudget | None = None,
+        required: set[str] | None = None,
     ) -> dict[str, Any]:
         subschema = schema_factory._build_properties(
             walker,
@@ -276,13 +445,66 @@ class ChildFactory:
             depth=(depth and depth - 1),
             history=history,
             toplevel=False,
+            budget=budget,
+            required=required,
         )
+        return self.wrap_child_schema(prop, subschema)
+
+    def wrap_child_schema(self, prop: MapperProperty, subschema: dict[str, Any], /) -> Schema:
         if prop.direction == ONETOMANY:
             return {"type": "array", "items": subschema}
         else:
             return {"type": "object", "properties": subschema}
 
 
+class AncestorLevel(NamedTuple):
+    """An ancestor's allOf level, with what building it added to the root schema."""
+
+    level: Schema
+    definitions: Schema
+    used_overrides: frozenset[str]
+
+
+class PendingChild(NamedTuple):
+    """A relationship whose properties the traversal engine has to build next."""
+
+    prop: MapperProperty
+    walker: AbstractWalker
+    overrides: CollectionForOverrides
+    depth: int | None
+    history: PropertyPath
+    required: set[str]
+
+
+class SharedDefinitions:
+    """Mappers already scheduled for a definition when generating with shared definitions.
+
+    Every mapper is queued once, the first time a relationship reaches it; the queue is
+    drained breadth-first so each definition is built from its shortest path.
+    """
+
+    def __init__(self) -> None:
+        self.seen: set[Mapper] = set()
+        self.pending: deque[
+            tuple[MapperProperty, AbstractWalker, CollectionForOverrides, int | None, PropertyPath]
+        ] = deque()
+
+    def add(
+        self,
+        prop: MapperProperty,
+        walker: AbstractWalker,
+        overrides: CollectionForOverrides,
+        depth: int | None,
+        history: PropertyPath,
+        /,
+    ) -> None:
+        if prop.mapper in self.seen:
+            return
+
+        self.seen.add(prop.mapper)
+        self.pending.append((prop, walker, overrides, depth, PropertyPath([*history, prop])))
+
+
 class SchemaFactory:
     def __init__(
         self,
@@ -293,14 +515,30 @@ class SchemaFactory:
         restriction_dict: RestrictionDict = default_restriction_dict,
         child_factory: ChildFactory | None = None,
         relation_decision: AbstractDecision | None = None,
+        cache_size: int | None = None,
+        shared_definitions: bool = False,
+        graph: RegistryGraph | None = None,
+        all_of_inheritance: bool = False,
+        ref_prefix: str = "#/definitions/",
     ) -> None:
         self.classifier = classifier
+        # where "$ref"s point to; the schemas themselves are always under "definitions"
+        self.ref_prefix = ref_prefix
+        self.shared_definitions = shared_definitions
+        self.all_of_inheritance = all_of_inheritance
+        self.graph = graph
         self.walker = walker  # class
+        self._restriction_plans: dict[
+            tuple[type[TypeEngine], bool, bool], tuple[TypeFormatFn, ...]
+        ] = {}
         self.restriction_set = [{k: v} for k, v in restriction_dict.items()]
         self.child_factory = ChildFactory() if child_factory is None else child_factory
         self.relation_decision = (
             RelationDecision() if relation_decision is None else relation_decision
         )
+        self.cache: LRUCache[Schema] | None = None if cache_size is None else LRUCache(cache_size)
+        # shared by the subclasses of a model, so no subclass walks its ancestors again
+        self._ancestor_levels: LRUCache[AncestorLevel] = LRUCache(ANCESTOR_CACHE_SIZE)
 
     def __call__(
         self,
@@ -312,27 +550,321 @@ class SchemaFactory:
         overrides: dict | None = None,
         depth: int | None = None,
         adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
+        budget: GenerationBudget | None = None,
     ) -> Schema:
-        walker = self.walker(model, includes=includes, excludes=excludes)
-        overrides_manager = CollectionForOverrides(overrides or {})
+        cache = self.cache
+        key = (
+            # a budgeted schema depends on how far generation got, so it is never cached
+            None
+            if cache is None or budget is not None
+            else self._cache_key(
+                model,
+                includes=includes,
+                excludes=excludes,
+                overrides=overrides,
+                depth=depth,
+                adjust_required=adjust_required,
+            )
+        )
+        schema = None if cache is None or key is None else cache.get(key)
 
-        schema: dict[str, Any] = {"title": model.__name__, "type": "object"}
-        schema["properties"] = self._build_properties(
-            walker, schema, overrides_manager, depth=depth
+        if schema is not None:
+            # copy-on-read: callers are free to mutate what they get back
+            return deepcopy(schema)
+
+        schema = self._generate(
+            model,
+            includes=includes,
+            excludes=excludes,
+            overrides=overrides,
+            depth=depth,
+            adjust_required=adjust_required,
+            budget=budget,
         )
 
+        if cache is not None and key is not None:
+            cache.put(key, deepcopy(schema))
+
+        return schema
+
+    def lazy(
+        self,
+        model: DeclarativeMeta,
+        /,
+        *,
+        includes: Sequence[str] | None = None,
+        excludes: Sequence[str] | None = None,
+        overrides: dict | None = None,
+        depth: int | None = None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
+    ) -> LazySchema:
+        from sqlalchemy_schema.lazy import LazySchema
+
+        return LazySchema(
+            self,
+            model,
+            includes=includes,
+            excludes=excludes,
+            overrides=overrides,
+            depth=depth,
+            adjust_required=adjust_required,
+        )
+
+    def cache_info(self) -> CacheInfo:
+        if self.cache is None:
+            return CacheInfo(0, 0, 0, 0)
+
+        return self.cache.cache_info()
+
+    def cache_clear(self) -> None:
+        self._ancestor_levels.cache_clear()
+        if self.cache is not None:
+            self.cache.cache_clear()
+
+    def _cache_key(
+        self,
+        model: DeclarativeMeta | Mapper,
+        /,
+        *,
+        includes: Sequence[str] | None,
+        excludes: Sequence[str] | None,
+        overrides: dict | None,
+        depth: int | None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None,
+    ) -> Hashable | None:
+        key = (
+            model,
+            self.walker,
+            self.relation_decision,
+            None if includes is None else tuple(includes),
+            None if excludes is None else tuple(excludes),
+            freeze(overrides or {}),
+            depth,
+            adjust_required,
+        )
+
+        try:
+            hash(key)
+        except TypeError:
+            logger.debug("Schema for {model} is not cacheable", model=model)
+            return None
+
+        return key
+
+    def root_walker(
+        self,
+        model: DeclarativeMeta | Mapper,
+        /,
+        *,
+        includes: Collection[str] | None = None,
+        excludes: Collection[str] | None = None,
+    ) -> AbstractWalker:
+        # dotted paths are parsed once here; child walkers are handed the subtrees
+        include_paths = self.child_factory.paths(includes)
+        exclude_paths = self.child_factory.paths(excludes)
+
+        if self.graph is None:
+            return self.walker(model, includes=include_paths, excludes=exclude_paths)
+
+        return self.walker(model, includes=include_paths, excludes=exclude_paths, graph=self.graph)
+
+    def _generate(
+        self,
+        model: DeclarativeMeta,
+        /,
+        *,
+        includes: Sequence[str] | None = None,
+        excludes: Sequence[str] | None = None,
+        overrides: dict | None = None,
+        depth: int | None = None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
+        budget: GenerationBudget | None = None,
+        overrides_manager: CollectionForOverrides | None = None,
+    ) -> Schema:
+        # a lazy schema passes its own, so overrides applied here count as used there too
+        if overrides_manager is None:
+            overrides_manager = CollectionForOverrides(
+                overrides or {}, splitter=self.child_factory.splitter
+            )
+
+        shared = SharedDefinitions() if self.shared_definitions else None
+
+        if budget is not None:
+            budget.start()
+
+        mapper = inspect(model).mapper
+        schema: dict[str, Any] = {"title": model.__name__}
+
+        if self.all_of_inheritance and mapper.inherits is not None:
+            # every ancestor becomes a definition holding only the properties it adds
+            body = self._build_inheritance_level(
+                mapper,
+                schema,
+                overrides_manager,
+                includes=includes,
+                excludes=excludes,
+                depth=depth,
+                shared=shared,
+                budget=budget,
+                adjust_required=adjust_required,
+            )
+            ancestors = [
+                self._build_ancestor_level(
+                    level,
+                    schema,
+                    overrides_manager,
+                    overrides=overrides,
+                    includes=includes,
+                    excludes=excludes,
+                    depth=depth,
+                    shared=shared,
+                    budget=budget,
+                    adjust_required=adjust_required,
+                )
+                for level in mapper.inherits.iterate_to_root()
+            ]
+            definitions = schema.setdefault("definitions", {})
+            for parent, definition in zip(mapper.inherits.iterate_to_root(), ancestors):
+                definitions[parent.class_.__name__] = definition
+            schema.update(body)
+            required: set[str] = set()
+        else:
+            walker = self.root_walker(model, includes=includes, excludes=excludes)
+            required = set()
+
+            schema["type"] = "object"
+            schema["properties"] = self._build_properties(
+                walker,
+                schema,
+                overrides_manager,
+                depth=depth,
+                shared=shared,
+                budget=budget,
+                required=required,
+                adjust_required=adjust_required,
+            )
+
+        if shared is not None:
+            self._build_shared_definitions(schema, shared, budget=budget)
+
         if overrides_manager.not_used_keys:
             raise InvalidStatus(f"invalid overrides: {overrides_manager.not_used_keys}")
 
         if model.__doc__:
             schema["description"] = model.__doc__
 
-        required = self._detect_required(walker, adjust_required=adjust_required)
-
         if required:
-            schema["required"] = required
+            schema["required"] = sort_required(required)
         return schema
 
+    def _build_ancestor_level(
+        self,
+        mapper: Mapper,
+        root_schema: dict[str, Any],
+        overrides_manager: CollectionForOverrides,
+        /,
+        *,
+        overrides: dict | None,
+        includes: Sequence[str] | None,
+        excludes: Sequence[str] | None,
+        depth: int | None,
+        shared: SharedDefinitions | None,
+        budget: GenerationBudget | None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None,
+    ) -> Schema:
+        options: dict[str, Any] = {
+            "includes": includes,
+            "excludes": excludes,
+            "depth": depth,
+            "shared": shared,
+            "budget": budget,
+            "adjust_required": adjust_required,
+        }
+        # shared definitions and budgets depend on what was generated before
+        key = (
+            None
+            if shared is not None or budget is not None
+            else self._cache_key(
+                mapper,
+                includes=includes,
+                excludes=excludes,
+                overrides=overrides,
+                depth=depth,
+                adjust_required=adjust_required,
+            )
+        )
+        if key is None:
+            return self._build_inheritance_level(mapper, root_schema, overrides_manager, **options)
+
+        cached = self._ancestor_levels.get(key)
+        if cached is None:
+            unused = overrides_manager.not_used_keys
+            # built on its own, so the definitions it adds can be replayed on a hit
+            scratch: Schema = {}
+            level = self._build_inheritance_level(mapper, scratch, overrides_manager, **options)
+            cached = AncestorLevel(
+                level,
+                scratch.get("definitions", {}),
+                frozenset(unused - overrides_manager.not_used_keys),
+            )
+            self._ancestor_levels.put(key, deepcopy(cached))
+        else:
+            # copy-on-read, as for whole schemas
+            cached = deepcopy(cached)
+            overrides_manager.mark_used(cached.used_overrides)
+
+        if cached.definitions:
+            root_schema.setdefault("definitions", {}).update(cached.definitions)
+
+        return cached.level
+
+    def _build_inheritance_level(
+        self,
+        mapper: Mapper,
+        root_schema: dict[str, Any],
+        overrides: CollectionForOverrides,
+        /,
+        *,
+        includes: Collection[str] | None,
+        excludes: Collection[str] | None,
+        depth: int | None,
+        shared: SharedDefinitions | None,
+        budget: GenerationBudget | None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None,
+    ) -> Schema:
+        include_paths = self.child_factory.paths(includes)
+        exclude_paths = self.child_factory.paths(excludes)
+
+        if mapper.inherits is not None:
+            # walk only what this mapper adds; inherited properties come from the parent
+            inherited = mapper.inherits._props.keys()
+            if include_paths is None:
+                exclude_paths = (exclude_paths or PathTrie()).with_names(inherited)
+            else:
+                include_paths = include_paths.without_names(inherited)
+
+        walker = self.root_walker(mapper, includes=include_paths, excludes=exclude_paths)
+
+        required: set[str] = set()
+        own: dict[str, Any] = {"type": "object"}
+        own["properties"] = self._build_properties(
+            walker,
+            root_schema,
+            overrides,
+            depth=depth,
+            shared=shared,
+            budget=budget,
+            required=required,
+            adjust_required=adjust_required,
+        )
+        if required:
+            own["required"] = sort_required(required)
+
+        if mapper.inherits is None:
+            return own
+
+        return {"allOf": [{"$ref": f"{self.ref_prefix}{mapper.inherits.class_.__name__}"}, own]}
+
     def _add_items_if_array(
         self, data: dict[str, Any], column: NamedColumn, itype: type[TypeEngine], /
     ) -> None:
@@ -343,9 +875,18 @@ class SchemaFactory:
 
         data["items"] = {"type": item_type}
 
-    def _add_restriction_if_found(
-        self, data: dict[str, Any], column: NamedColumn, itype: type[TypeEngine], /
-    ) -> None:
+    @property
+    def restriction_set(self) -> list[RestrictionDict]:
+        return self._restriction_set
+
+    @restriction_set.setter
+    def restriction_set(self, restriction_set: list[RestrictionDict], /) -> None:
+        self._restriction_set = restriction_set
+        self._restriction_plans.clear()
+
+    def _compile_restrictions(self, itype: type[TypeEngine], /) -> tuple[TypeFormatFn, ...]:
+        plan: list[TypeFormatFn] = []
+
         for restriction_dict in self.restriction_set:
             _, fn = get_class_mapping(
                 restriction_dict,
@@ -355,10 +896,24 @@ class SchemaFactory:
             )
             if fn is not None:
                 if isinstance(fn, (list, tuple)):
-                    for f in fn:
-                        f(column, data)
+                    plan.extend(fn)
                 else:
-                    fn(column, data)
+                    plan.append(fn)
+
+        return tuple(plan)
+
+    def _add_restriction_if_found(
+        self, data: dict[str, Any], column: NamedColumn, itype: type[TypeEngine], /
+    ) -> None:
+        key = (itype, self.classifier.see_mro, self.classifier.see_impl)
+
+        try:
+            plan = self._restriction_plans[key]
+        except KeyError:
+            plan = self._restriction_plans[key] = self._compile_restrictions(itype)
+
+        for fn in plan:
+            fn(column, data)
 
     def _add_property_with_reference(
         self,
@@ -368,25 +923,117 @@ class SchemaFactory:
         prop: MapperProperty,
         val: dict[str, Any],
         /,
+        *,
+        required: set[str] | None = None,
     ) -> None:
         clsname = prop.mapper.class_.__name__
         if "definitions" not in root_schema:
             root_schema["definitions"] = {}
 
+        if required is None:
+            # a custom ChildFactory did not collect them while building the child
+            required_properties = self._detect_required(walker.from_child(prop.mapper))
+        else:
+            required_properties = sort_required(required)
+
         if val["type"] == "object":
-            current_schema[prop.key] = {"$ref": f"#/definitions/{clsname}"}
-            val["required"] = self._detect_required(walker.from_child(prop.mapper))
+            current_schema[prop.key] = {"$ref": f"{self.ref_prefix}{clsname}"}
+            val["required"] = required_properties
             root_schema["definitions"][clsname] = val
         else:  # array
             current_schema[prop.key] = {
                 "type": "array",
-                "items": {"$ref": f"#/definitions/{clsname}"},
+                "items": {"$ref": f"{self.ref_prefix}{clsname}"},
             }
             val["type"] = "object"
             val["properties"] = val.pop("items")
-            val["required"] = self._detect_required(walker.from_child(prop.mapper))
+            val["required"] = required_properties
             root_schema["definitions"][clsname] = val
 
+    def _add_reference(
+        self, root_schema: Schema, current_schema: dict[str, Any], prop: MapperProperty, /
+    ) -> None:
+        clsname = prop.mapper.class_.__name__
+        if "definitions" not in root_schema:
+            root_schema["definitions"] = {}
+
+        if prop.direction == ONETOMANY:
+            current_schema[prop.key] = {
+                "type": "array",
+                "items": {"$ref": f"{self.ref_prefix}{clsname}"},
+            }
+        else:
+            current_schema[prop.key] = {"$ref": f"{self.ref_prefix}{clsname}"}
+
+    def _add_placeholder_definition(self, root_schema: Schema, prop: MapperProperty, /) -> None:
+        if "definitions" not in root_schema:
+            root_schema["definitions"] = {}
+
+        root_schema["definitions"].setdefault(prop.mapper.class_.__name__, {"type": "object"})
+
+    def _build_shared_definitions(
+        self,
+        root_schema: Schema,
+        shared: SharedDefinitions,
+        /,
+        *,
+        budget: GenerationBudget | None = None,
+    ) -> None:
+        while shared.pending:
+            prop, walker, overrides, depth, history = shared.pending.popleft()
+
+            if budget is not None and budget.exhausted:
+                budget.truncate(".".join(p.key for p in history))
+                self._add_placeholder_definition(root_schema, prop)
+                continue
+
+            subwalker, suboverrides = self._expand_definition(
+                prop, walker, overrides, history, budget=budget, exclude_backrefs=False
+            )
+            required: set[str] = set()
+            properties = self._build_properties(
+                subwalker,
+                root_schema,
+                suboverrides,
+                depth=(depth and depth - 1),
+                history=history,
+                toplevel=False,
+                shared=shared,
+                budget=budget,
+                required=required,
+            )
+
+            root_schema["definitions"][prop.mapper.class_.__name__] = {
+                "type": "object",
+                "properties": properties,
+                "required": sort_required(required),
+            }
+
+    def _expand_definition(
+        self,
+        prop: MapperProperty,
+        walker: AbstractWalker,
+        overrides: CollectionForOverrides,
+        history: PropertyPath,
+        /,
+        *,
+        budget: GenerationBudget | None,
+        exclude_backrefs: bool = True,
+    ) -> tuple[AbstractWalker, CollectionForOverrides]:
+        """Start expanding ``prop`` into a definition: the walker and overrides below it.
+
+        The definition is spent before anything below it, so its subtree sees it spent.
+        """
+        if budget is not None:
+            budget.spend_definition()
+
+        # only passed when set, as ChildFactory subclasses may not take it
+        options = {} if exclude_backrefs else {"exclude_backrefs": False}
+        subwalker = self.child_factory.child_walker(prop, walker, history=history, **options)
+        suboverrides = self.child_factory.child_overrides(prop, overrides)
+
+        return subwalker, suboverrides
+
     def _build_properties(
         self,
         walker: AbstractWalker,
@@ -395,68 +1042,233 @@ class SchemaFactory:
         /,
         *,
         depth: int | None = None,
-        history: list[MapperProperty] | None = None,
+        history: PropertyPath | None = None,
         toplevel: bool = True,
+        shared: SharedDefinitions | None = None,
+        budget: GenerationBudget | None = None,
+        required: set[str] | None = None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
     ) -> dict[str, Any]:
+        # Relationships are expanded with an explicit stack of property builders instead of
+        # recursion: a builder yields the child it needs and is resumed with its properties.
+        stack = [
+            self._iter_properties(
+                walker,
+                root_schema,
+                overrides,
+                depth=depth,
+                history=PropertyPath() if history is None else history,
+                toplevel=toplevel,
+                shared=shared,
+                budget=budget,
+                required=required,
+                adjust_required=adjust_required,
+            )
+        ]
+        subschema: dict[str, Any] | None = None
+
+        while True:
+            try:
+                child = stack[-1].send(subschema)
+            except StopIteration as finished:
+                stack.pop()
+                subschema = finished.value
+
+                if not stack:
+                    return subschema
+            else:
+                stack.append(
+                    self._iter_properties(
+                        child.walker,
+                        root_schema,
+                        child.overrides,
+                        depth=(child.depth and child.depth - 1),
+                        history=child.history,
+                        toplevel=False,
+                        budget=budget,
+                        required=child.required,
+                    )
+                )
+                subschema = None
+
+    def _iter_properties(
+        self,
+        walker: AbstractWalker,
+        root_schema: Schema,
+        overrides: CollectionForOverrides,
+        /,
+        *,
+        depth: int | None,
+        history: PropertyPath,
+        toplevel: bool,
+        shared: SharedDefinitions | None = None,
+        budget: GenerationBudget | None = None,
+        required: set[str] | None = None,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
+    ) -> Generator[PendingChild, dict[str, Any] | None, dict[str, Any]]:
         definitions: dict[str, Any] = {}
 
         if depth is not None and depth <= 0:
+            # the definition is still emitted, so its required columns are still wanted
+            if required is not None:
+                for walked_prop in walker.walk():
+                    self._collect_required(walked_prop, required, adjust_required=adjust_required)
             return definitions
 
-        if history is None:
-            history = []
+        # a ChildFactory that overrides child_schema gets the recursive call it expects
+        custom_child_schema = self._has_custom_child_schema()
 
         for walked_prop in walker.walk():
-            for action, prop, opts in self.relation_decision.decision(
+            if required is not None:
+                self._collect_required(walked_prop, required, adjust_required=adjust_required)
+
+            for action, prop, opts in self.relation_decision.decide(
                 walker, walked_prop, toplevel=toplevel
             ):
-                if action == ColumnPropertyType.RELATIONSHIP:  # RelationshipProperty
+                if budget is not None:
+                    budget.spend_node()
+
+                if action == ColumnPropertyType.RELATIONSHIP and shared is not None:
+                    self._add_reference(root_schema, definitions, prop)
+                    shared.add(prop, walker, overrides, depth, history)
+                elif (
+                    action == ColumnPropertyType.RELATIONSHIP
+                    and budget is not None
+                    and budget.exhausted
+                ):
+                    budget.truncate(".".join(p.key for p in [*history, prop]))
+                    self._add_reference(root_schema, definitions, prop)
+                    self._add_placeholder_definition(root_schema, prop)
+                elif action == ColumnPropertyType.RELATIONSHIP:  # RelationshipProperty
                     history.append(prop)
-                    subwalker = self.child_factory.child_walker(prop, walker, history=history)
-                    suboverrides = self.child_factory.child_overrides(prop, overrides)
-                    value = self.child_factory.child_schema(
-                        prop,
-                        self,
-                        root_schema,
-                        subwalker,
-                        suboverrides,
-                        depth=depth,
-                        history=history,
+                    subwalker, suboverrides = self._expand_definition(
+                        prop, walker, overrides, history, budget=budget
                     )
+                    subrequired: set[str] | None
+
+                    if custom_child_schema:
+                        value, subrequired = self._child_schema(
+                            prop,
+                            root_schema,
+                            subwalker,
+                            suboverrides,
+                            depth=depth,
+                            history=history,
+                            budget=budget,
+                        )
+                    else:
+                        subrequired = set()
+                        subschema = yield PendingChild(
+                            prop, subwalker, suboverrides, depth, history, subrequired
+                        )
+                        value = self.child_factory.wrap_child_schema(
+                            prop, {} if subschema is None else subschema
+                        )
+
                     self._add_property_with_reference(
-                        walker, root_schema, definitions, prop, value
+                        walker,
+                        root_schema,
+                        definitions,
+                        prop,
+                        value,
+                        required=subrequired,
                     )
                     history.pop()
                 elif action == ColumnPropertyType.FOREIGNKEY:  # ColumnProperty
                     for column in prop.columns:
-                        sub = {}
-                        if type(column.type) is not Visitable:
-                            itype, sub["type"] = self.classifier[column.type]
+                        # Ensure that the column name is a string object
+                        # It can be a quoted_name() instance
+                        column_name = str(column.name)
+
+                        definitions[column_name] = self._build_column(column, overrides, opts)
+                else:  # immediate
+                    definitions[prop.key] = action
+        return definitions
 
-                            self._add_restriction_if_found(sub, column, itype)
-                            self._add_items_if_array(sub, column, itype)
+    def _has_custom_child_schema(self) -> bool:
+        return type(self.child_factory).child_schema is not ChildFactory.child_schema
 
-                            if column.doc:
-                                sub["description"] = column.doc
+    def _child_schema(
+        self,
+        prop: MapperProperty,
+        root_schema: Schema,
+        walker: AbstractWalker,
+        overrides: CollectionForOverrides,
+        /,
+        *,
+        depth: int | None,
+        history: PropertyPath,
+        budget: GenerationBudget | None = None,
+    ) -> tuple[dict[str, Any], set[str] | None]:
+        """Call ``child_factory.child_schema``; returns its value and the required columns.
+
+        An override is only passed the keywords its signature accepts. It may build the
+        child without collecting the required columns, so it gets ``required=None`` and
+        ``None`` is returned for them, to be detected once the child is built.
+        """
+        required: set[str] | None = None if self._has_custom_child_schema() else set()
+        keywords: dict[str, Any] = {
+            "depth": depth,
+            "history": history,
+            "budget": budget,
+            "required": required,
+        }
+        accepted = accepted_keywords(type(self.child_factory).child_schema)
+        if accepted is not None:
+            keywords = {name: arg for name, arg in keywords.items() if name in accepted}
+
+        value = self.child_factory.child_schema(
+            prop, self, root_schema, walker, overrides, **keywords
+        )
 
-                            if overrides is None:
-                                raise RuntimeError("overrides is None")
+        return value, required
 
-                            if column.name in overrides:
-                                overrides.overrides(sub)
-                            if opts:
-                                sub.update(opts)
+    def _build_column(
+        self,
+        column: NamedColumn,
+        overrides: CollectionForOverrides,
+        opts: dict[str, Any],
+        /,
+    ) -> dict[str, Any]:
+        if type(column.type) is Visitable:
+            raise NotImplementedError
 
-                            # Ensure that the column name is a string object
-                            # It can be a quoted_name() instance
-                            column_name = str(column.name)
+        sub: dict[str, Any] = {}
+        itype, sub["type"] = self.classifier[column.type]
 
-                            definitions[column_name] = sub
-                        else:
-                            raise NotImplementedError
-                else:  # immediate
-                    definitions[prop.key] = action
-        return definitions
+        self._add_restriction_if_found(sub, column, itype)
+        self._add_items_if_array(sub, column, itype)
+
+        if column.doc:
+            sub["description"] = column.doc
+
+        if overrides is None:
+            raise RuntimeError("overrides is None")
+
+        if column.name in overrides:
+            overrides.overrides(column.name, sub)
+        if opts:
+            sub.update(opts)
+
+        return sub
+
+    def _collect_required(
+        self,
+        prop: MapperProperty,
+        required_properties_set: set[str],
+        /,
+        *,
+        adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
+    ) -> None:
+        columns = getattr(prop, "columns", {})
+
+        for column in columns:
+            required = not column.nullable
+
+            if adjust_required is not None:
+                required = adjust_required(prop, required)
+            if required:
+                required_properties_set.add(column.key)
 
     def _detect_required(
         self,
@@ -465,21 +1277,9 @@ class SchemaFactory:
         *,
         adjust_required: Callable[[MapperProperty, bool], bool] | None = None,
     ) -> list[str]:
-        required_properties_set = set()
+        required_properties_set: set[str] = set()
 
         for prop in walker.walk():
-            columns = getattr(prop, "columns", {})
-
-            for column in columns:
-                required = not column.nullable
-
-                if adjust_required is not None:
-                    required = adjust_required(prop, required)
-                if required:
-                    required_properties_set.add(column.key)
-
-        # Ensure that the column name is a string object
-        # It can be a quoted_name() instance
-        required_properties = sorted(str(item) for item in required_properties_set)
+            self._collect_required(prop, required_properties_set, adjust_required=adjust_required)
 
-        return required_properties
+        return sort_required(required_properties_set)
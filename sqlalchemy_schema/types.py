@@ -20,6 +20,14 @@ class Layout(Enum):
 class Format(Enum):
     JSON = "json"
     YAML = "yaml"
+    # one YAML document per model
+    YAML_STREAM = "yaml-stream"
+
+
+@unique
+class JSONBackend(Enum):
+    STDLIB = "json"
+    ORJSON = "orjson"
 
 
 @unique
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic, NamedTuple, Optional, TypeVar
+
+V = TypeVar("V")
+
+_missing = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class LRUCache(Generic[V]):
+    def __init__(self, maxsize: int, /) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be a positive integer, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable, /) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, /) -> Optional[V]:
+        value = self._data.get(key, _missing)
+
+        if value is _missing:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._data.move_to_end(key)
+
+        return value  # type: ignore[return-value]
+
+    def put(self, key: Hashable, value: V, /) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def cache_clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
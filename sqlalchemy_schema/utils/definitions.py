@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+from hashlib import blake2b
+from typing import Any
+
+from loguru import logger
+
+
+def digest(schema: Any, /) -> str:
+    """A hash of ``schema`` that does not depend on the order of its keys."""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), default=str)
+
+    return blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class DefinitionIndex:
+    """The definitions emitted into one document, keyed by content.
+
+    A definition identical to one already emitted under another name becomes an alias of
+    it: it is not emitted again and :meth:`rewrite_refs` points references to it at the
+    first name. A definition reusing a name with different content is a conflict; the
+    first one is kept and the name is recorded in ``conflicts``.
+    """
+
+    def __init__(self, *, ref_prefix: str = "#/definitions/") -> None:
+        self.ref_prefix = ref_prefix
+        self.digests: dict[str, str] = {}  # name -> digest
+        self.names: dict[str, str] = {}  # digest -> first name emitted with it
+        self.aliases: dict[str, str] = {}
+        self.conflicts: list[str] = []
+
+    def add(self, name: str, schema: Any, /) -> bool:
+        """Record ``schema`` under ``name``; returns whether it has to be emitted."""
+        self.rewrite_refs(schema)
+        key = digest(schema)
+        known = self.digests.get(self.aliases.get(name, name))
+
+        if known is not None:
+            if known != key:
+                logger.warning("Conflicting definitions for {name}, keeping the first", name=name)
+                self.conflicts.append(name)
+            return False
+
+        canonical = self.names.get(key)
+
+        if canonical is not None:
+            logger.debug("{name} is identical to {canonical}", name=name, canonical=canonical)
+            self.aliases[name] = canonical
+            return False
+
+        self.digests[name] = key
+        self.names[key] = name
+
+        return True
+
+    def rewrite_refs(self, schema: Any, /) -> None:
+        """Point references to aliases at the definition they are identical to, in place."""
+        if not self.aliases:
+            return
+
+        prefix = self.ref_prefix
+        stack = [schema]
+
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, dict):
+                ref = node.get("$ref")
+                if isinstance(ref, str) and ref.startswith(prefix):
+                    target = self.aliases.get(ref.removeprefix(prefix))
+                    if target is not None:
+                        node["$ref"] = prefix + target
+                stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+            elif isinstance(node, list):
+                stack.extend(v for v in node if isinstance(v, (dict, list)))
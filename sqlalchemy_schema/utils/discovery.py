@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import pkgutil
+from importlib import import_module
+from types import ModuleType
+from typing import Any, NamedTuple
+
+from loguru import logger
+from sqlalchemy import inspect
+from sqlalchemy.orm import Mapper, registry
+
+
+class DiscoveredModels(NamedTuple):
+    """Models found through their registry; used as a target the way a module is."""
+
+    name: str
+    models: tuple[type, ...]
+
+
+def _mapper_key(mapper: Mapper) -> tuple[str, str]:
+    return mapper.class_.__module__, mapper.class_.__qualname__
+
+
+def registry_of(source: Any, /) -> registry | None:
+    """The registry of a declarative base, or ``source`` itself if it is a registry."""
+    if isinstance(source, registry):
+        return source
+
+    candidate = getattr(source, "registry", None)
+
+    # mapped classes have a registry too; only an unmapped base names a whole registry
+    if isinstance(candidate, registry) and inspect(source, raiseerr=False) is None:
+        return candidate
+
+    return None
+
+
+def models_of(source: Any, /) -> DiscoveredModels:
+    """Every model mapped in a declarative base or registry, by module and class name."""
+    source_registry = registry_of(source)
+
+    if source_registry is None:
+        raise TypeError(f"Expected a declarative base or registry, got {source}")
+
+    mappers = sorted(source_registry.mappers, key=_mapper_key)
+
+    return DiscoveredModels(
+        getattr(source, "__name__", type(source).__name__),
+        tuple(mapper.class_ for mapper in mappers),
+    )
+
+
+class DiscoveryIndex:
+    """Models of every module in a package, found in one pass.
+
+    The first lookup of a package imports all of its submodules, in name order, and
+    records the models mapped in the registries they use, grouped by the module that
+    defines them. Later lookups of the package, or of a package below it, are answered
+    from the index.
+    """
+
+    def __init__(self) -> None:
+        self.packages: set[str] = set()
+        self.modules: dict[str, tuple[type, ...]] = {}
+
+    def __call__(self, package: ModuleType, /) -> DiscoveredModels:
+        name = package.__name__
+
+        if not self.is_indexed(name):
+            self._index(package)
+
+        prefix = f"{name}."
+        models = tuple(
+            model
+            for module_name, module_models in sorted(self.modules.items())
+            if module_name == name or module_name.startswith(prefix)
+            for model in module_models
+        )
+
+        return DiscoveredModels(name, models)
+
+    def is_indexed(self, name: str, /) -> bool:
+        return any(name == package or name.startswith(f"{package}.") for package in self.packages)
+
+    def clear(self) -> None:
+        self.packages.clear()
+        self.modules.clear()
+
+    def _index(self, package: ModuleType, /) -> None:
+        name = package.__name__
+        modules = [package]
+
+        if hasattr(package, "__path__"):
+            submodules = pkgutil.walk_packages(package.__path__, prefix=f"{name}.")
+            module_names = sorted(info.name for info in submodules)
+            modules.extend(import_module(module_name) for module_name in module_names)
+
+        logger.debug("Indexing {count} modules of {name}", count=len(modules), name=name)
+
+        registries: dict[registry, None] = {}
+        for module in modules:
+            for value in vars(module).values():
+                mapper = inspect(value, raiseerr=False) if isinstance(value, type) else None
+                if isinstance(mapper, Mapper):
+                    registries[mapper.registry] = None
+
+        found: dict[str, list[type]] = {module.__name__: [] for module in modules}
+        for source_registry in registries:
+            for mapper in sorted(source_registry.mappers, key=_mapper_key):
+                models = found.get(mapper.class_.__module__)
+                if models is not None:
+                    models.append(mapper.class_)
+
+        self.modules.update((module_name, tuple(models)) for module_name, models in found.items())
+        self.packages.add(name)
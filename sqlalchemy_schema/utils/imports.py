@@ -1,12 +1,14 @@
 import inspect
+from functools import reduce
 from importlib import import_module
 from types import ModuleType
 from typing import Union
 
 from loguru import logger
+from sqlalchemy.orm import registry
 
 
-def load_module_or_symbol(module_path: str, /) -> Union[ModuleType, type]:
+def load_module_or_symbol(module_path: str, /) -> Union[ModuleType, type, registry]:
     logger.info("Loading module or symbol from {module_path}", module_path=module_path)
 
     module_path_split = module_path.split(":", maxsplit=1)
@@ -20,9 +22,10 @@ def load_module_or_symbol(module_path: str, /) -> Union[ModuleType, type]:
         module_name, symbol_name = module_path_split
 
         module = import_module(module_name)
-        symbol = getattr(module, symbol_name)
+        # dotted names reach attributes, e.g. "Base.registry"
+        symbol = reduce(getattr, symbol_name.split("."), module)
 
-        if not inspect.isclass(symbol):
-            raise TypeError(f"{symbol} is not a class")
+        if not (inspect.isclass(symbol) or isinstance(symbol, registry)):
+            raise TypeError(f"{symbol} is not a class or registry")
 
         return symbol
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping, Set
+
+
+class PathTrie(Set[str]):
+    """Dotted property paths (``["pk", "users", "users.pk"]``) split into a prefix tree.
+
+    As a set it holds the names given at this level (``{"pk", "users"}``), which is what
+    the walkers filter on; :meth:`child` returns the paths below a relationship.
+    """
+
+    def __init__(
+        self,
+        names: Iterable[str] = (),
+        children: Mapping[str, PathTrie] | None = None,
+        /,
+    ) -> None:
+        self.names = frozenset(names)
+        self.children: Mapping[str, PathTrie] = children or {}
+
+    @classmethod
+    def parse(cls, paths: Iterable[str], /, *, splitter: str = ".") -> PathTrie:
+        names: list[str] = []
+        nested: dict[str, list[str]] = {}
+
+        for path in paths:
+            if splitter in path:
+                head, rest = path.split(splitter, 1)
+                nested.setdefault(head, []).append(rest)
+            else:
+                names.append(path)
+
+        children = {name: cls.parse(rest, splitter=splitter) for name, rest in nested.items()}
+
+        return cls(names, children)
+
+    def child(self, name: str, /) -> PathTrie:
+        return self.children.get(name, _empty)
+
+    def with_names(self, names: Iterable[str], /) -> PathTrie:
+        return self.__class__(self.names.union(names), self.children)
+
+    def without_names(self, names: Iterable[str], /) -> PathTrie:
+        return self.__class__(self.names.difference(names), self.children)
+
+    def __contains__(self, name: object, /) -> bool:
+        return name in self.names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __eq__(self, other: object, /) -> bool:
+        if isinstance(other, PathTrie):
+            return self.names == other.names and dict(self.children) == dict(other.children)
+
+        return super().__eq__(other)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({sorted(self.names)!r}, {dict(self.children)!r})"
+
+
+_empty = PathTrie()
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections.abc import Iterator, Sequence
-from typing import Any
+from collections.abc import Collection, Iterable, Iterator, Sequence
+from typing import TYPE_CHECKING, Any, NamedTuple, overload
+from weakref import WeakKeyDictionary
 
 from loguru import logger
 from sqlalchemy.ext.declarative import DeclarativeMeta
@@ -12,6 +13,63 @@ from sqlalchemy.orm.properties import ColumnProperty
 from sqlalchemy.orm.relationships import RelationshipProperty
 
 from sqlalchemy_schema.exceptions import InvalidStatus
+from sqlalchemy_schema.utils.paths import PathTrie
+
+if TYPE_CHECKING:
+    from sqlalchemy_schema.graph import RegistryGraph
+
+Filter = frozenset[str] | None
+
+
+class PropertyPath(Sequence[MapperProperty]):
+    """The relationships followed from the root model, in order.
+
+    Behaves like the list it replaces but answers membership in O(1), which the walkers
+    check for every property they visit.
+    """
+
+    def __init__(self, props: Iterable[MapperProperty] = (), /) -> None:
+        self._props: list[MapperProperty] = []
+        self._counts: dict[MapperProperty, int] = {}
+
+        for prop in props:
+            self.append(prop)
+
+    @overload
+    def __getitem__(self, index: int, /) -> MapperProperty: ...
+
+    @overload
+    def __getitem__(self, index: slice, /) -> list[MapperProperty]: ...
+
+    def __getitem__(self, index: int | slice, /) -> MapperProperty | list[MapperProperty]:
+        return self._props[index]
+
+    def __len__(self) -> int:
+        return len(self._props)
+
+    def __iter__(self) -> Iterator[MapperProperty]:
+        return iter(self._props)
+
+    def __contains__(self, prop: object, /) -> bool:
+        return prop in self._counts
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._props!r})"
+
+    def append(self, prop: MapperProperty, /) -> None:
+        self._props.append(prop)
+        self._counts[prop] = self._counts.get(prop, 0) + 1
+
+    def pop(self) -> MapperProperty:
+        prop = self._props.pop()
+        count = self._counts[prop] - 1
+
+        if count:
+            self._counts[prop] = count
+        else:
+            del self._counts[prop]
+
+        return prop
 
 
 class AbstractWalker(ABC):
@@ -20,16 +78,20 @@ class AbstractWalker(ABC):
         model: DeclarativeMeta | Mapper,
         /,
         *,
-        includes: Sequence[str] | None = None,
-        excludes: Sequence[str] | None = None,
+        includes: Collection[str] | None = None,
+        excludes: Collection[str] | None = None,
         history: Any | None = None,
+        graph: RegistryGraph | None = None,
     ) -> None:
         logger.debug("Walking model {model}, {type}", model=model, type=type(model))
 
         self.mapper = inspect(model).mapper
         self.includes = includes
         self.excludes = excludes
-        self.history = history or []
+        self.graph = graph
+        self.history = (
+            history if isinstance(history, PropertyPath) else PropertyPath(history or ())
+        )
         if includes and excludes:
             if set(includes).intersection(excludes):
                 raise InvalidStatus(f"Conflict includes={includes}, exclude={excludes}")
@@ -40,14 +102,27 @@ class AbstractWalker(ABC):
         mapper: Mapper,
         /,
         *,
-        includes: Sequence[str] | None = None,
-        excludes: Sequence[str] | None = None,
+        includes: Collection[str] | None = None,
+        excludes: Collection[str] | None = None,
         history: Any | None = None,
     ) -> AbstractWalker:
-        return self.__class__(mapper, includes=includes, excludes=excludes, history=history)
+        return self.__class__(
+            mapper, includes=includes, excludes=excludes, history=history, graph=self.graph
+        )
 
     def from_child(self, model: Mapper) -> AbstractWalker:
-        return self.__class__(model, history=self.history)
+        return self.__class__(model, history=self.history, graph=self.graph)
+
+    def iterate(self) -> Iterator[MapperProperty]:
+        return iter(column_index(self.mapper).properties)  # danger!! not immutable
+
+    def compile(self, includes: Filter, excludes: Filter, /) -> Iterator[MapperProperty]:
+        """Yield the properties ``walk`` may produce, independent of the history.
+
+        The result is cached per walker class, mapper, includes and excludes by
+        :func:`walk_plan`, so it must not depend on any other state of the walker.
+        """
+        raise NotImplementedError(self.__class__.__name__)
 
     @abstractmethod
     def walk(self) -> Iterator[MapperProperty]:
@@ -57,67 +132,124 @@ class AbstractWalker(ABC):
 # mapper.column_attrs and mapper.attrs is not ordered. define our custom iterate function `iterate'
 
 
-class ForeignKeyWalker(AbstractWalker):
-    def iterate(self) -> Iterator[MapperProperty]:
-        for c in self.mapper.local_table.columns:
-            if c.name not in self.mapper._props:
-                for prop in self.mapper.iterate_properties:
-                    if isinstance(prop, ColumnProperty):
-                        columns = {column.name for column in prop.columns}
+class ColumnIndex(NamedTuple):
+    """The column properties of a mapper, in the order of its table's columns."""
 
-                        if c.name in columns:
-                            yield prop  # danger!! not immutable
-            else:
-                yield self.mapper._props[c.name]  # danger!! not immutable
+    # the mapper's memoized ``attrs``; replaced whenever the mapper is reconfigured
+    token: object
+    by_column: dict[str, tuple[MapperProperty, ...]]
+    properties: tuple[MapperProperty, ...]
 
-    def walk(self) -> Iterator[MapperProperty]:
-        for prop in self.iterate():
-            if self.includes is None or prop.key in self.includes:
-                if self.excludes is None or prop.key not in self.excludes:
-                    yield prop
 
+_column_indexes: WeakKeyDictionary[Mapper, ColumnIndex] = WeakKeyDictionary()
 
-class NoForeignKeyWalker(AbstractWalker):
-    def iterate(self) -> Iterator[MapperProperty]:
-        for c in self.mapper.local_table.columns:
-            if c.name not in self.mapper._props:
-                for prop in self.mapper.iterate_properties:
-                    if isinstance(prop, ColumnProperty):
-                        columns = {column.name for column in prop.columns}
 
-                        if c.name in columns:
-                            yield prop  # danger!! not immutable
-            else:
-                yield self.mapper._props[c.name]  # danger!! not immutable
+def column_index(mapper: Mapper, /) -> ColumnIndex:
+    token = mapper.attrs
+    index = _column_indexes.get(mapper)
+
+    if index is not None and index.token is token:
+        return index
+
+    # columns that are not mapped under their own name, e.g. `name = Column("_name", ...)`
+    renamed: dict[str, list[MapperProperty]] = {}
+    for prop in mapper.iterate_properties:
+        if isinstance(prop, ColumnProperty):
+            for name in dict.fromkeys(column.name for column in prop.columns):
+                renamed.setdefault(name, []).append(prop)
+
+    by_column: dict[str, tuple[MapperProperty, ...]] = {}
+    for c in mapper.local_table.columns:
+        if c.name not in mapper._props:
+            by_column[c.name] = tuple(renamed.get(c.name, ()))
+        else:
+            by_column[c.name] = (mapper._props[c.name],)
+
+    properties = tuple(prop for props in by_column.values() for prop in props)
+    index = _column_indexes[mapper] = ColumnIndex(token, by_column, properties)
+
+    return index
+
+
+class _WalkPlans(NamedTuple):
+    # the column index the plans were compiled against
+    source: ColumnIndex
+    plans: dict[tuple[type[AbstractWalker], Filter, Filter], tuple[MapperProperty, ...]]
+
+
+_walk_plans: WeakKeyDictionary[Mapper, _WalkPlans] = WeakKeyDictionary()
+
+
+def _as_filter(params: Iterable[str] | None, /) -> Filter:
+    if params is None:
+        return None
+
+    return params.names if isinstance(params, PathTrie) else frozenset(params)
+
+
+def walk_plan(walker: AbstractWalker, /) -> tuple[MapperProperty, ...]:
+    mapper = walker.mapper
+    index = column_index(mapper)
+    entry = _walk_plans.get(mapper)
+
+    if entry is None or entry.source is not index:
+        entry = _walk_plans[mapper] = _WalkPlans(index, {})
+
+    includes = _as_filter(walker.includes)
+    excludes = _as_filter(walker.excludes)
+    key = (walker.__class__, includes, excludes)
+    plan = entry.plans.get(key)
+
+    if plan is None:
+        plan = entry.plans[key] = tuple(walker.compile(includes, excludes))
+
+    return plan
+
+
+def _is_selected(prop: MapperProperty, includes: Filter, excludes: Filter, /) -> bool:
+    return (includes is None or prop.key in includes) and (
+        excludes is None or prop.key not in excludes
+    )
+
+
+def _has_foreign_key(prop: MapperProperty, /) -> bool:
+    return any(c.foreign_keys for c in getattr(prop, "columns", {}))
+
+
+class ForeignKeyWalker(AbstractWalker):
+    def compile(self, includes: Filter, excludes: Filter, /) -> Iterator[MapperProperty]:
+        for prop in self.iterate():
+            if _is_selected(prop, includes, excludes):
+                yield prop
 
     def walk(self) -> Iterator[MapperProperty]:
+        yield from walk_plan(self)
+
+
+class NoForeignKeyWalker(AbstractWalker):
+    def compile(self, includes: Filter, excludes: Filter, /) -> Iterator[MapperProperty]:
         for prop in self.iterate():
-            if self.includes is None or prop.key in self.includes:
-                if self.excludes is None or prop.key not in self.excludes:
-                    if not any(c.foreign_keys for c in getattr(prop, "columns", {})):
-                        yield prop
+            if _is_selected(prop, includes, excludes) and not _has_foreign_key(prop):
+                yield prop
+
+    def walk(self) -> Iterator[MapperProperty]:
+        yield from walk_plan(self)
 
 
 class StructuralWalker(AbstractWalker):
     def iterate(self) -> Iterator[MapperProperty]:
-        for c in self.mapper.local_table.columns:
-            if c.name not in self.mapper._props:
-                for prop in self.mapper.iterate_properties:
-                    if isinstance(prop, ColumnProperty):
-                        columns = {column.name for column in prop.columns}
-
-                        if c.name in columns:
-                            yield prop  # danger!! not immutable
-            else:
-                yield self.mapper._props[c.name]  # danger!! not immutable
+        yield from super().iterate()
         for prop in self.mapper.relationships:
             yield prop
 
-    def walk(self) -> Iterator[MapperProperty]:
+    def compile(self, includes: Filter, excludes: Filter, /) -> Iterator[MapperProperty]:
         for prop in self.iterate():
             if isinstance(prop, (ColumnProperty, RelationshipProperty)):
-                if self.includes is None or prop.key in self.includes:
-                    if self.excludes is None or prop.key not in self.excludes:
-                        if prop not in self.history:
-                            if not any(c.foreign_keys for c in getattr(prop, "columns", {})):
-                                yield prop
+                if _is_selected(prop, includes, excludes) and not _has_foreign_key(prop):
+                    yield prop
+
+    def walk(self) -> Iterator[MapperProperty]:
+        # the history is the only part of the walk that differs between calls
+        for prop in walk_plan(self):
+            if prop not in self.history:
+                yield prop
@@ -0,0 +1,136 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from sqlalchemy_schema.command.cache import OutputCache, source_roots
+
+OPTIONS = {"walker": "structural", "layouts": ["swagger2.0"]}
+
+
+@pytest.fixture
+def package(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path / "src" / "cached_models"
+    root.mkdir(parents=True)
+    (root / "__init__.py").write_text("")
+    (root / "models.py").write_text("NAME = 'first'\n")
+    monkeypatch.syspath_prepend(str(tmp_path / "src"))
+
+    return root
+
+
+def test_source_roots__found_without_importing(package: Path) -> None:
+    """
+    ARRANGE a package that has not been imported
+    ACT call the `source_roots` function for one of its modules
+    ASSERT the package directory is returned
+    """
+    assert source_roots("cached_models.models") == [package]
+    assert source_roots("not_a_package_anywhere") is None
+
+
+def test_source_roots__top_level_module_with_its_imports(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """
+    ARRANGE a top-level module importing a module and a package next to it
+    ACT call the `source_roots` function for it
+    ASSERT the modules and packages it imports, directly or not, are returned too
+    """
+    (tmp_path / "cached_base.py").write_text("import cached_types\nimport json\n")
+    (tmp_path / "cached_types").mkdir()
+    (tmp_path / "cached_types" / "__init__.py").write_text("")
+    (tmp_path / "cached_unused.py").write_text("")
+    (tmp_path / "cached_app.py").write_text("from cached_base import Base\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    assert source_roots("cached_app") == [
+        tmp_path / "cached_app.py",
+        tmp_path / "cached_base.py",
+        tmp_path / "cached_types",
+    ]
+
+
+class TestOutputCache:
+    def test_key__depends_on_options_and_sources(self, tmp_path: Path, package: Path) -> None:
+        # arrange
+        cache = OutputCache(tmp_path / "cache")
+        key = cache.key(["cached_models.models"], OPTIONS)
+
+        # act
+        same = cache.key(["cached_models.models"], OPTIONS)
+        other_options = cache.key(["cached_models.models"], {**OPTIONS, "walker": "foreignkey"})
+        (package / "models.py").write_text("NAME = 'second'\n")
+        other_sources = cache.key(["cached_models.models"], OPTIONS)
+
+        # assert
+        assert key is not None
+        assert same == key
+        assert other_options != key
+        assert other_sources not in (key, other_options)
+
+    def test_restore__after_commit(self, tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+        # arrange
+        cache = OutputCache(tmp_path / "cache")
+        out = tmp_path / "out.json"
+        assert not cache.restore("key", [out, None])
+
+        staged = cache.stage("key", 2)
+        staged[0].write_text("first")
+        staged[1].write_text("second")
+
+        # act
+        cache.commit("key", staged)
+        restored = cache.restore("key", [out, None])
+
+        # assert
+        assert restored
+        assert out.read_text() == "first"
+        assert capsys.readouterr().out == "second"
+        assert [path.name for path in (tmp_path / "cache").iterdir()] == ["key"]
+
+    def test_restore__utf8(self, tmp_path: Path) -> None:
+        # arrange
+        cache = OutputCache(tmp_path / "cache")
+        staged = cache.stage("key", 1)
+        staged[0].write_text("Café", encoding="utf-8")
+        cache.commit("key", staged)
+        code = (
+            "from pathlib import Path; from sqlalchemy_schema.command.cache import OutputCache; "
+            f"OutputCache(Path({str(tmp_path / 'cache')!r})).restore('key', [None])"
+        )
+        # an ASCII locale, with stdout still encoded as UTF-8
+        env = {
+            **os.environ,
+            "LC_ALL": "C",
+            "PYTHONCOERCECLOCALE": "0",
+            "PYTHONUTF8": "0",
+            "PYTHONIOENCODING": "utf-8",
+        }
+
+        # act
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, env=env)
+
+        # assert
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.decode("utf-8") == "Café"
+
+    def test_commit__keeps_the_first_entry(self, tmp_path: Path) -> None:
+        # arrange
+        cache = OutputCache(tmp_path / "cache")
+        first = cache.stage("key", 1)
+        first[0].write_text("first")
+        cache.commit("key", first)
+        # a concurrent run would stage into its own directory
+        second = [tmp_path / "cache" / "key.other.tmp" / "0"]
+        second[0].parent.mkdir()
+        second[0].write_text("second")
+
+        # act
+        cache.commit("key", second)
+
+        # assert
+        assert (cache.entry("key") / "0").read_text() == "first"
+        assert not second[0].parent.exists()
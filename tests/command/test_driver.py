@@ -11,13 +11,19 @@ import yaml
 from pytest_mock import MockerFixture
 from yaml import Loader
 
-from sqlalchemy_schema.command.driver import Driver
+from sqlalchemy_schema.command.driver import TRANSFORMER_MAP, Driver
 from sqlalchemy_schema.command.main import (
     DEFAULT_DECISION,
     DEFAULT_LAYOUT,
     DEFAULT_WALKER,
 )
+from sqlalchemy_schema.command.serializers import SerializerOptions
+from sqlalchemy_schema.schema_factory import SchemaFactory
 from sqlalchemy_schema.types import Decision, Format, Layout, Walker
+from sqlalchemy_schema.utils.discovery import models_of
+from tests.fixtures.models.address import Address
+from tests.fixtures.models.base import Base
+from tests.fixtures.models.user import Group, User
 
 
 @pytest.fixture
@@ -151,3 +157,264 @@ class TestDriver:
 
         # assert
         assert json.loads(actual) == expected
+
+    @pytest.mark.parametrize("layout", Layout)
+    @pytest.mark.parametrize(
+        "format, file_loader",
+        [
+            pytest.param(Format.JSON, json.loads),
+            pytest.param(Format.YAML, partial(yaml.load, Loader=Loader)),
+        ],
+    )
+    @pytest.mark.parametrize(
+        "targets",
+        [
+            ["tests.fixtures.models"],
+            ["tests.fixtures.models.user:User", "tests.fixtures.models.address"],
+            ["tests.fixtures.models.not_a_sa_model"],
+        ],
+    )
+    def test_run_stream(
+        self,
+        temp_filename: Path,
+        layout: Layout,
+        targets: Sequence[str],
+        format: Format,
+        file_loader: Callable[[str], Any],
+    ) -> None:
+        """
+        ARRANGE a list of targets
+        ACT run the driver with and without streaming
+        ASSERT both generate the same document
+        """
+        # arrange
+        driver = Driver(DEFAULT_WALKER, DEFAULT_DECISION, layout)
+        driver.run(targets, filename=temp_filename, format=format, stream=False)
+        expected = file_loader(temp_filename.read_text())
+
+        # act
+        driver.run(targets, filename=temp_filename, format=format)
+
+        # assert
+        assert file_loader(temp_filename.read_text()) == expected
+
+    def test_dump_iter(self, temp_filename: Path) -> None:
+        """
+        ARRANGE entries produced lazily
+        ACT dump them
+        ASSERT the entries are written inside the envelope
+        """
+        # arrange
+        driver = Driver(DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT)
+        entries = ((name, {"title": name}) for name in ["A", "B"])
+
+        # act
+        driver.dump_iter(entries, ("components", "schemas"), filename=temp_filename)
+
+        # assert
+        assert json.loads(temp_filename.read_text()) == {
+            "components": {"schemas": {"A": {"title": "A"}, "B": {"title": "B"}}}
+        }
+
+    @pytest.mark.parametrize("layout", Layout)
+    @pytest.mark.parametrize(
+        "targets, recursive",
+        [
+            pytest.param(["tests.fixtures.models.base:Base"], False, id="declarative base"),
+            pytest.param(["tests.fixtures.models.base:Base.registry"], False, id="registry"),
+            pytest.param(["tests.fixtures.models"], True, id="recursive package"),
+        ],
+    )
+    def test_run_discovery(
+        self, temp_filename: Path, layout: Layout, targets: Sequence[str], recursive: bool
+    ) -> None:
+        """
+        ARRANGE a declarative base, registry or package
+        ACT run the driver
+        ASSERT every model is generated, as if each was given as a target
+        """
+        # arrange
+        driver = Driver(DEFAULT_WALKER, DEFAULT_DECISION, layout)
+        # other test modules map models on the fixtures' Base as well
+        models = models_of(Base).models if not recursive else (Address, Group, User)
+        driver.run(
+            [f"{model.__module__}:{model.__qualname__}" for model in models],
+            filename=temp_filename,
+            stream=False,
+        )
+        expected = json.loads(temp_filename.read_text())
+
+        # act
+        driver.run(targets, filename=temp_filename, recursive=recursive)
+
+        # assert
+        actual = json.loads(temp_filename.read_text())
+        if layout == Layout.JSON_SCHEMA:
+            # several model targets are merged into one bare schema by this layout
+            assert list(actual["definitions"]) == [model.__name__ for model in models]
+        else:
+            assert actual == expected
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_run_outputs(self, mocker: MockerFixture, tmp_path: Path, stream: bool) -> None:
+        """
+        ARRANGE a layout and a file for every layout
+        ACT run the driver once for all of them
+        ASSERT each file matches a run with that layout alone
+            AND each model is generated once
+        """
+        # arrange
+        targets = ["tests.fixtures.models.user"]
+        outputs = [(layout, tmp_path / f"{layout.value}.json") for layout in Layout]
+        expected = {}
+        for layout, _ in outputs:
+            Driver(DEFAULT_WALKER, DEFAULT_DECISION, layout).run(
+                targets, filename=tmp_path / "expected.json", stream=stream
+            )
+            expected[layout] = json.loads((tmp_path / "expected.json").read_text())
+        generate = mocker.spy(SchemaFactory, "_generate")
+
+        # act
+        Driver(DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT).run(
+            targets, outputs=outputs, stream=stream
+        )
+
+        # assert
+        for layout, output in outputs:
+            assert json.loads(output.read_text()) == expected[layout]
+        assert generate.call_count == 2
+
+    @pytest.mark.parametrize(
+        "options",
+        [
+            SerializerOptions(compact=True),
+            SerializerOptions(indent=2, sort_keys=True),
+            SerializerOptions(indent=4),
+        ],
+    )
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_run_serializer_options(
+        self, mocker: MockerFixture, temp_filename: Path, options: SerializerOptions, stream: bool
+    ) -> None:
+        """
+        ARRANGE serializer options
+        ACT run the driver with them
+        ASSERT the document is written in that style
+            AND the file is closed
+        """
+        # arrange
+        driver = Driver(
+            DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT, serializer_options=options
+        )
+        path_open = mocker.spy(Path, "open")
+
+        # act
+        driver.run(["tests.fixtures.models.user"], filename=temp_filename, stream=stream)
+
+        # assert
+        assert path_open.spy_return.closed
+        actual = temp_filename.read_text()
+        assert actual == json.dumps(
+            json.loads(actual),
+            indent=options.indent,
+            sort_keys=bool(options.sort_keys),
+            separators=(",", ":") if options.compact else (",", ": "),
+        )
+
+    @pytest.mark.parametrize("layout", Layout)
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_run_yaml_stream(self, temp_filename: Path, layout: Layout, stream: bool) -> None:
+        """
+        ARRANGE a package of models
+        ACT run the driver writing a YAML stream
+        ASSERT there is a document per model
+            AND merged they are the YAML document
+        """
+        # arrange
+        targets = ["tests.fixtures.models.user", "tests.fixtures.models.address"]
+        driver = Driver(DEFAULT_WALKER, DEFAULT_DECISION, layout)
+        driver.run(targets, filename=temp_filename, format=Format.YAML)
+        expected = yaml.safe_load(temp_filename.read_text())
+
+        # act
+        driver.run(targets, filename=temp_filename, format=Format.YAML_STREAM, stream=stream)
+
+        # assert
+        documents = list(yaml.safe_load_all(temp_filename.read_text()))
+        assert len(documents) == 3
+        envelope = TRANSFORMER_MAP[layout].envelope
+        merged: dict[str, Any] = {}
+        for document in documents:
+            node, entries = merged, document
+            for key in envelope:
+                node, entries = node.setdefault(key, {}), entries[key]
+            assert len(entries) == 1
+            node.update(entries)
+        assert merged == expected
+
+    @pytest.mark.parametrize(
+        "format, options, streamed",
+        [
+            pytest.param(Format.JSON, SerializerOptions(), True, id="json"),
+            pytest.param(Format.JSON, SerializerOptions(sort_keys=True), False, id="sorted json"),
+            pytest.param(Format.YAML, SerializerOptions(), False, id="yaml"),
+            pytest.param(Format.YAML, SerializerOptions(sort_keys=False), True, id="model order"),
+            pytest.param(Format.YAML_STREAM, SerializerOptions(), True, id="yaml stream"),
+        ],
+    )
+    def test_run_sorted_is_not_streamed(
+        self,
+        mocker: MockerFixture,
+        temp_filename: Path,
+        format: Format,
+        options: SerializerOptions,
+        streamed: bool,
+    ) -> None:
+        """
+        ARRANGE a format whose entries may be sorted
+        ACT run the driver
+        ASSERT entries are streamed only when they are written in model order
+        """
+        # arrange
+        driver = Driver(
+            DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT, serializer_options=options
+        )
+        dump_iter = mocker.spy(driver, "dump_iter")
+
+        # act
+        driver.run(["tests.fixtures.models.user"], filename=temp_filename, format=format)
+
+        # assert
+        assert dump_iter.called == streamed
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_run_failure_keeps_the_previous_output(
+        self, mocker: MockerFixture, tmp_path: Path, stream: bool
+    ) -> None:
+        """
+        ARRANGE an output written by an earlier run
+            AND a transformer failing after its first model
+        ACT run the driver again
+        ASSERT the error is raised
+            AND the earlier output is left as it was, with no file next to it
+        """
+        # arrange
+        filename = tmp_path / "schema.json"
+        driver = Driver(DEFAULT_WALKER, DEFAULT_DECISION, Layout.JSON_SCHEMA)
+        driver.run(["tests.fixtures.models.user"], filename=filename)
+        expected = filename.read_text()
+
+        def failing(*args: Any) -> Iterator[tuple[str, Any]]:
+            yield "User", {"type": "object"}
+            raise RuntimeError("generation failed")
+
+        mocker.patch.object(driver.layout_transformer, "transform_iter", failing)
+        mocker.patch.object(driver.layout_transformer, "transform", side_effect=RuntimeError)
+
+        # act
+        with pytest.raises(RuntimeError):
+            driver.run(["tests.fixtures.models.user"], filename=filename, stream=stream)
+
+        # assert
+        assert filename.read_text() == expected
+        assert list(tmp_path.iterdir()) == [filename]
@@ -0,0 +1,53 @@
+from pytest_mock import MockerFixture
+
+from sqlalchemy_schema.command.intermediate import GeneratedSchemas, render
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.walkers import StructuralWalker
+from tests.fixtures.models.user import Group
+
+
+def test_render__moves_refs_to_the_new_prefix() -> None:
+    # Arrange
+    schema = {
+        "properties": {"users": {"type": "array", "items": {"$ref": "#/definitions/User"}}},
+        "allOf": [{"$ref": "#/definitions/Base"}, {"$ref": "other.json#/User"}],
+    }
+
+    # Act
+    actual = render(schema, "#/definitions/", "#/components/schemas/")
+
+    # Assert
+    assert actual == {
+        "properties": {"users": {"type": "array", "items": {"$ref": "#/components/schemas/User"}}},
+        "allOf": [{"$ref": "#/components/schemas/Base"}, {"$ref": "other.json#/User"}],
+    }
+    assert schema["properties"]["users"]["items"] == {"$ref": "#/definitions/User"}
+
+
+class TestGeneratedSchemas:
+    def test_views_share_one_generation(self, mocker: MockerFixture) -> None:
+        # Arrange
+        schema_factory = SchemaFactory(StructuralWalker)
+        expected = schema_factory(Group)
+        generate = mocker.spy(schema_factory, "_generate")
+        generated = GeneratedSchemas(schema_factory)
+
+        # Act
+        swagger = generated.view("#/definitions/")(Group)
+        openapi = generated.view("#/components/schemas/")(Group)
+
+        # Assert
+        assert swagger == expected
+        assert openapi["properties"]["users"]["items"] == {"$ref": "#/components/schemas/User"}
+        assert generate.call_count == 1
+
+    def test_views_return_copies(self) -> None:
+        # Arrange
+        generated = GeneratedSchemas(SchemaFactory(StructuralWalker))
+        view = generated.view("#/definitions/")
+
+        # Act
+        view(Group).pop("definitions")
+
+        # Assert
+        assert "definitions" in view(Group)
@@ -12,7 +12,8 @@ from sqlalchemy_schema.command.main import (
     DEFAULT_WALKER,
     main,
 )
-from sqlalchemy_schema.types import Decision, Format, Layout, Walker
+from sqlalchemy_schema.command.serializers import SerializerOptions
+from sqlalchemy_schema.types import Decision, Format, JSONBackend, Layout, Walker
 
 
 @pytest.fixture
@@ -37,9 +38,11 @@ def test_main_defaults(mock_driver: Mock, targets: Sequence[str]) -> None:
     # ASSERT
     assert actual.exit_code == 0
 
-    mock_driver.assert_called_once_with(DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT)
+    mock_driver.assert_called_once_with(
+        DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT, serializer_options=SerializerOptions()
+    )
     mock_driver.return_value.run.assert_called_once_with(
-        tuple(targets), filename=None, format=None
+        tuple(targets), filename=None, format=None, recursive=False
     )
 
 
@@ -87,7 +90,203 @@ def test_main(
     # ASSERT
     assert actual.exit_code == 0
 
-    mock_driver.assert_called_once_with(walker, decision, layout)
+    mock_driver.assert_called_once_with(
+        walker, decision, layout, serializer_options=SerializerOptions()
+    )
+    mock_driver.return_value.run.assert_called_once_with(
+        tuple(targets), filename=out, format=format, recursive=False
+    )
+
+
+def test_main_recursive(mock_driver: Mock) -> None:
+    """
+    ARRANGE CLI args with --recursive
+    ACT calling the driver's method
+    ASSERT recursive discovery is requested
+    """
+    # ARRANGE
+    runner = CliRunner()
+
+    # ACT
+    actual = runner.invoke(main, ["--recursive", "my_package"])
+
+    # ASSERT
+    assert actual.exit_code == 0
+
+    mock_driver.return_value.run.assert_called_once_with(
+        ("my_package",), filename=None, format=None, recursive=True
+    )
+
+
+def test_main_layout_out_pairs(mock_driver: Mock) -> None:
+    """
+    ARRANGE CLI args with several --layout/--out pairs
+    ACT calling the driver's method
+    ASSERT every layout is written to its own file in one run
+    """
+    # ARRANGE
+    runner = CliRunner()
+    swagger, openapi = Path("swagger.json").absolute(), Path("openapi.json").absolute()
+
+    # ACT
+    actual = runner.invoke(
+        main,
+        [
+            "--layout",
+            Layout.SWAGGER_2.value,
+            "--out",
+            swagger.as_posix(),
+            "--layout",
+            Layout.OPENAPI_3.value,
+            "--out",
+            openapi.as_posix(),
+            "my_module",
+        ],
+    )
+
+    # ASSERT
+    assert actual.exit_code == 0
+
+    mock_driver.assert_called_once_with(
+        DEFAULT_WALKER, DEFAULT_DECISION, Layout.SWAGGER_2, serializer_options=SerializerOptions()
+    )
     mock_driver.return_value.run.assert_called_once_with(
-        tuple(targets), filename=out, format=format
+        ("my_module",),
+        format=None,
+        recursive=False,
+        outputs=[(Layout.SWAGGER_2, swagger), (Layout.OPENAPI_3, openapi)],
+    )
+
+
+def test_main_layouts_without_outs(mock_driver: Mock) -> None:
+    """
+    ARRANGE CLI args with two layouts and a single --out
+    ACT calling the command
+    ASSERT it is a usage error
+    """
+    # ARRANGE
+    runner = CliRunner()
+
+    # ACT
+    actual = runner.invoke(
+        main,
+        ["--layout", Layout.SWAGGER_2.value, "--layout", Layout.OPENAPI_3.value, "my_module"],
+    )
+
+    # ASSERT
+    assert actual.exit_code == 2
+    mock_driver.return_value.run.assert_not_called()
+
+
+def test_main_cache_dir(mocker: MockerFixture, tmp_path: Path) -> None:
+    """
+    ARRANGE a cache directory filled by a first run
+    ACT run the command again with the same options
+    ASSERT the cached output is written without running the driver
+    """
+    # ARRANGE
+    runner = CliRunner()
+    cli_args = ["--cache-dir", (tmp_path / "cache").as_posix(), "tests.fixtures.models.user"]
+    first = runner.invoke(main, cli_args)
+    driver = mocker.patch("sqlalchemy_schema.command.main.Driver", autospec=True)
+
+    # ACT
+    second = runner.invoke(main, cli_args)
+
+    # ASSERT
+    assert first.exit_code == second.exit_code == 0
+    assert second.output == first.output
+    assert first.output.startswith('{"definitions": ')
+    driver.assert_not_called()
+
+
+def test_main_watch(mocker: MockerFixture, tmp_path: Path) -> None:
+    """
+    ARRANGE a patched Watcher
+    ACT run the command with --watch
+    ASSERT the watcher runs with the outputs of the command
+    """
+    # ARRANGE
+    runner = CliRunner()
+    driver = mocker.patch("sqlalchemy_schema.command.main.Driver", autospec=True)
+    watcher = mocker.patch("sqlalchemy_schema.command.main.Watcher", autospec=True)
+    out = tmp_path / "out.json"
+
+    # ACT
+    result = runner.invoke(
+        main, ["--watch", "--out", out.as_posix(), "tests.fixtures.models.user"]
+    )
+
+    # ASSERT
+    assert result.exit_code == 0
+    watcher.assert_called_once_with(
+        driver.return_value,
+        ("tests.fixtures.models.user",),
+        [(Layout.SWAGGER_2, out)],
+        format=None,
+        recursive=False,
+    )
+    watcher.return_value.watch.assert_called_once_with()
+
+
+@pytest.mark.parametrize(
+    "cli_args, expected",
+    [
+        pytest.param(["--compact"], SerializerOptions(compact=True), id="compact"),
+        pytest.param(
+            ["--indent", "4", "--sort-keys"],
+            SerializerOptions(indent=4, sort_keys=True),
+            id="indent and sorted keys",
+        ),
+        pytest.param(["--no-sort-keys"], SerializerOptions(sort_keys=False), id="unsorted keys"),
+        pytest.param(
+            ["--json-backend", "json"],
+            SerializerOptions(backend=JSONBackend.STDLIB),
+            id="backend",
+        ),
+    ],
+)
+def test_main_serializer_options(
+    mock_driver: Mock, cli_args: list[str], expected: SerializerOptions
+) -> None:
+    """
+    ARRANGE CLI args with serialization options
+    ACT calling the command
+    ASSERT the driver writes with those options
+    """
+    # ARRANGE
+    runner = CliRunner()
+
+    # ACT
+    actual = runner.invoke(main, [*cli_args, "my_module"])
+
+    # ASSERT
+    assert actual.exit_code == 0
+    mock_driver.assert_called_once_with(
+        DEFAULT_WALKER, DEFAULT_DECISION, DEFAULT_LAYOUT, serializer_options=expected
     )
+
+
+@pytest.mark.parametrize(
+    "cli_args",
+    [
+        pytest.param(["--compact", "--indent", "2"], id="compact and indented"),
+        pytest.param(["--compact", "--format", "yaml"], id="compact yaml"),
+        pytest.param(["--indent", "1", "--format", "yaml"], id="yaml indent out of range"),
+    ],
+)
+def test_main_serializer_options_invalid(mock_driver: Mock, cli_args: list[str]) -> None:
+    """
+    ARRANGE CLI args with serialization options that cannot be honoured
+    ACT calling the command
+    ASSERT it is a usage error
+    """
+    # ARRANGE
+    runner = CliRunner()
+
+    # ACT
+    actual = runner.invoke(main, [*cli_args, "my_module"])
+
+    # ASSERT
+    assert actual.exit_code == 2
+    mock_driver.assert_not_called()
@@ -0,0 +1,335 @@
+import io
+import json
+from collections.abc import Iterator
+from typing import Any, Optional
+
+import pytest
+import yaml
+from pytest_mock import MockerFixture
+
+from sqlalchemy_schema.command.serializers import (
+    JSONSerializer,
+    OrjsonSerializer,
+    Serializer,
+    SerializerOptions,
+    YAMLDocumentsSerializer,
+    YAMLSerializer,
+    build_serializer,
+)
+from sqlalchemy_schema.types import Format, JSONBackend
+
+ENTRIES = [
+    ("Zone", {"type": "object", "properties": {"name": {"type": "string", "maxLength": 10}}}),
+    ("Café", {"type": "object", "required": ["pk", "zone"], "properties": {}}),
+    ("Area", {"$ref": "#/definitions/Zone"}),
+]
+
+# scalars longer than a line, which YAML folds
+LONG_ENTRIES = [
+    (
+        "Order",
+        {
+            "type": "object",
+            "description": " ".join(["An order placed by a customer for one or more items."] * 4),
+            "properties": {
+                "note": {"type": "string", "description": "Free text: " + "a" * 30 + " b" * 60},
+            },
+        },
+    ),
+]
+
+JSON_STYLES = [
+    pytest.param({}, id="default"),
+    pytest.param({"compact": True}, id="compact"),
+    pytest.param({"indent": 2}, id="indent 2"),
+    pytest.param({"indent": 4}, id="indent 4"),
+    pytest.param({"indent": 0}, id="indent 0"),
+    pytest.param({"sort_keys": True}, id="sorted keys"),
+    pytest.param({"compact": True, "sort_keys": True}, id="compact and sorted keys"),
+    pytest.param({"indent": 2, "sort_keys": True}, id="indent and sorted keys"),
+]
+
+ORJSON_STYLES = [
+    pytest.param({"compact": True}, id="compact"),
+    pytest.param({"indent": 2}, id="indent 2"),
+    pytest.param({"compact": True, "sort_keys": True}, id="compact and sorted keys"),
+    pytest.param({"indent": 2, "sort_keys": True}, id="indent and sorted keys"),
+]
+
+orjson_installed = pytest.mark.skipif(
+    not OrjsonSerializer.is_available(), reason="orjson is not installed"
+)
+
+
+def document(entries: list[tuple[str, Any]], envelope: tuple[str, ...]) -> dict[str, Any]:
+    data: dict[str, Any] = dict(entries)
+    for key in reversed(envelope):
+        data = {key: data}
+    return data
+
+
+def write_entries(
+    serializer: Serializer, entries: list[tuple[str, Any]], envelope: tuple[str, ...]
+) -> str:
+    stream = io.StringIO()
+    serializer.write_entries(stream, iter(entries), envelope)
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("envelope", [("definitions",), ("components", "schemas")])
+@pytest.mark.parametrize(
+    "entries", [ENTRIES, LONG_ENTRIES, []], ids=["entries", "long scalars", "no entries"]
+)
+class TestWriteEntries:
+    @pytest.mark.parametrize("style", JSON_STYLES)
+    def test_json(
+        self,
+        style: dict[str, Any],
+        entries: list[tuple[str, Any]],
+        envelope: tuple[str, ...],
+    ) -> None:
+        # arrange
+        serializer = JSONSerializer(**style)
+
+        # act
+        actual = write_entries(serializer, entries, envelope)
+
+        # assert
+        assert actual == serializer.dumps(document(entries, envelope))
+
+    @orjson_installed
+    @pytest.mark.parametrize("style", ORJSON_STYLES)
+    def test_orjson_matches_json(
+        self,
+        style: dict[str, Any],
+        entries: list[tuple[str, Any]],
+        envelope: tuple[str, ...],
+    ) -> None:
+        # arrange
+        serializer = OrjsonSerializer(**style)
+
+        # act
+        actual = write_entries(serializer, entries, envelope)
+
+        # assert
+        expected = JSONSerializer(**style).dumps(document(entries, envelope))
+        assert actual == serializer.dumps(document(entries, envelope)) == expected
+
+    @pytest.mark.parametrize("indent", [None, 4])
+    @pytest.mark.parametrize("sort_keys", [False, True])
+    def test_yaml(
+        self,
+        indent: Optional[int],
+        sort_keys: bool,
+        entries: list[tuple[str, Any]],
+        envelope: tuple[str, ...],
+    ) -> None:
+        # arrange
+        serializer = YAMLSerializer(indent=indent, sort_keys=sort_keys)
+
+        # act
+        actual = write_entries(serializer, entries, envelope)
+
+        # assert
+        assert actual == serializer.dumps(document(entries, envelope))
+        assert yaml.safe_load(actual) == document(entries, envelope)
+
+
+class TestJSONSerializer:
+    def test_default_style_is_json_dumps(self) -> None:
+        # arrange
+        data = document(ENTRIES, ("definitions",))
+
+        # act
+        actual = JSONSerializer().dumps(data)
+
+        # assert
+        assert actual == json.dumps(data)
+
+    @pytest.mark.parametrize(
+        "style, expected",
+        [
+            pytest.param({"compact": True}, '{"Café":[1,2]}', id="compact"),
+            pytest.param({"indent": 2}, '{\n  "Café": [\n    1,\n    2\n  ]\n}', id="indent"),
+        ],
+    )
+    def test_styles(self, style: dict[str, Any], expected: str) -> None:
+        # act
+        actual = JSONSerializer(**style).dumps({"Café": [1, 2]})
+
+        # assert
+        assert actual == expected
+
+
+@orjson_installed
+class TestOrjsonSerializer:
+    def test_unsupported_style(self) -> None:
+        # act / assert
+        with pytest.raises(ValueError):
+            OrjsonSerializer(indent=4)
+
+    def test_falls_back_to_json(self) -> None:
+        # arrange
+        data = {"maximum": 2**70}
+
+        # act
+        actual = OrjsonSerializer(compact=True).dumps(data)
+
+        # assert
+        assert actual == '{"maximum":1180591620717411303424}'
+
+    def test_floats_differ_from_json(self) -> None:
+        # arrange
+        data = [1e16, 1e-7, float("nan")]
+
+        # act
+        actual = OrjsonSerializer(compact=True).dumps(data)
+
+        # assert
+        # the differences the README lists
+        assert actual == "[1e16,1e-7,null]"
+        assert JSONSerializer(compact=True).dumps(data) == "[1e+16,1e-07,NaN]"
+
+
+class TestYAMLSerializer:
+    @pytest.mark.skipif(not yaml.__with_libyaml__, reason="PyYAML is built without LibYAML")
+    def test_uses_libyaml(self) -> None:
+        # act
+        actual = YAMLSerializer()
+
+        # assert
+        assert actual.dumper is yaml.CSafeDumper
+
+    def test_matches_pure_python_dumper(self) -> None:
+        # arrange
+        data = document(ENTRIES, ("components", "schemas"))
+
+        # act
+        actual = YAMLSerializer().dumps(data)
+
+        # assert
+        assert actual == yaml.dump(data, Dumper=yaml.SafeDumper)
+
+
+class TestYAMLDocumentsSerializer:
+    @pytest.mark.parametrize("envelope", [("definitions",), ("components", "schemas")])
+    def test_write_entries(self, envelope: tuple[str, ...]) -> None:
+        # arrange
+        stream = io.StringIO()
+        written = []
+
+        def entries() -> Iterator[tuple[str, Any]]:
+            for entry in ENTRIES:
+                written.append(stream.getvalue().count("---"))
+                yield entry
+
+        # act
+        YAMLDocumentsSerializer().write_entries(stream, entries(), envelope)
+
+        # assert
+        # every document is written before the next entry is generated
+        assert written == [0, 1, 2]
+        assert list(yaml.safe_load_all(stream.getvalue())) == [
+            document([entry], envelope) for entry in ENTRIES
+        ]
+
+    def test_dump(self) -> None:
+        # arrange
+        data = {"type": "object"}
+
+        # act
+        actual = YAMLDocumentsSerializer().dumps(data)
+
+        # assert
+        assert actual == "---\ntype: object\n"
+
+
+class TestBuildSerializer:
+    @pytest.mark.parametrize(
+        "format, options, expected",
+        [
+            pytest.param(None, SerializerOptions(), JSONSerializer, id="default"),
+            pytest.param(
+                Format.JSON, SerializerOptions(indent=4), JSONSerializer, id="unsupported style"
+            ),
+            pytest.param(
+                Format.JSON,
+                SerializerOptions(backend=JSONBackend.STDLIB, compact=True),
+                JSONSerializer,
+                id="stdlib",
+            ),
+            pytest.param(Format.YAML, SerializerOptions(indent=4), YAMLSerializer, id="yaml"),
+            pytest.param(
+                Format.YAML_STREAM, SerializerOptions(), YAMLDocumentsSerializer, id="yaml stream"
+            ),
+        ],
+    )
+    def test_build_serializer(
+        self, format: Optional[Format], options: SerializerOptions, expected: type[Serializer]
+    ) -> None:
+        # act
+        actual = build_serializer(format, options)
+
+        # assert
+        assert type(actual) is expected
+
+    @orjson_installed
+    @pytest.mark.parametrize(
+        "options",
+        [
+            SerializerOptions(backend=JSONBackend.ORJSON, compact=True),
+            SerializerOptions(backend=JSONBackend.ORJSON, indent=2, sort_keys=True),
+        ],
+    )
+    def test_build_serializer__orjson(self, options: SerializerOptions) -> None:
+        # act
+        actual = build_serializer(Format.JSON, options)
+
+        # assert
+        assert type(actual) is OrjsonSerializer
+
+    @orjson_installed
+    @pytest.mark.parametrize(
+        "options",
+        [SerializerOptions(compact=True), SerializerOptions(indent=2, sort_keys=True)],
+    )
+    def test_build_serializer__orjson_only_when_asked(self, options: SerializerOptions) -> None:
+        # act
+        actual = build_serializer(Format.JSON, options)
+
+        # assert
+        # its output differs for some floats, so being installed is not enough
+        assert type(actual) is JSONSerializer
+
+    def test_build_serializer__orjson_missing(self, mocker: MockerFixture) -> None:
+        # arrange
+        mocker.patch.object(OrjsonSerializer, "is_available", return_value=False)
+
+        # act
+        actual = build_serializer(Format.JSON, SerializerOptions(compact=True))
+
+        # assert
+        assert type(actual) is JSONSerializer
+        with pytest.raises(ValueError):
+            build_serializer(Format.JSON, SerializerOptions(backend=JSONBackend.ORJSON))
+
+    @pytest.mark.parametrize(
+        "format, options",
+        [
+            pytest.param(Format.JSON, SerializerOptions(compact=True, indent=2), id="both"),
+            pytest.param(Format.YAML, SerializerOptions(compact=True), id="compact yaml"),
+            pytest.param(
+                Format.YAML_STREAM, SerializerOptions(compact=True), id="compact yaml stream"
+            ),
+            pytest.param(Format.YAML, SerializerOptions(indent=12), id="yaml indent"),
+            pytest.param(
+                Format.JSON,
+                SerializerOptions(backend=JSONBackend.ORJSON, indent=4),
+                id="unsupported orjson style",
+            ),
+        ],
+    )
+    def test_build_serializer__invalid(self, format: Format, options: SerializerOptions) -> None:
+        # act / assert
+        with pytest.raises(ValueError):
+            build_serializer(format, options)
@@ -0,0 +1,72 @@
+import subprocess
+import sys
+from collections.abc import Sequence
+
+import pytest
+
+# cumulative import time of the command, in microseconds; about 70ms when this was written,
+# against more than 500ms while it imported sqlalchemy
+IMPORT_BUDGET_US = 250_000
+
+HEAVY_MODULES = ("sqlalchemy", "yaml", "orjson", "loguru")
+
+
+def import_times(code: str, /, *, returncode: int = 0) -> dict[str, int]:
+    """The cumulative ``-X importtime`` of every module imported by running ``code``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True
+    )
+    assert result.returncode == returncode, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+
+    return times
+
+
+def is_heavy(name: str, /) -> bool:
+    return any(name == module or name.startswith(f"{module}.") for module in HEAVY_MODULES)
+
+
+@pytest.mark.parametrize(
+    "args, returncode",
+    [
+        pytest.param(["--help"], 0, id="help"),
+        pytest.param(["--compact", "--indent", "2", "my_module"], 2, id="usage error"),
+    ],
+)
+def test_command_startup(args: Sequence[str], returncode: int) -> None:
+    # arrange
+    code = f"from sqlalchemy_schema.command.main import main; main({list(args)!r})"
+
+    # act
+    times = import_times(code, returncode=returncode)
+
+    # assert
+    assert [name for name in times if is_heavy(name)] == []
+
+
+def test_command_import_budget() -> None:
+    # act
+    cumulative = min(
+        import_times("import sqlalchemy_schema.command.main")["sqlalchemy_schema.command.main"]
+        for _ in range(3)
+    )
+
+    # assert
+    assert cumulative < IMPORT_BUDGET_US
+
+
+def test_driver_imports() -> None:
+    # act
+    times = import_times("import sqlalchemy_schema.command.driver")
+
+    # assert
+    # dialects are only imported by the models that use them, serializers on first use
+    assert [name for name in times if name.startswith("sqlalchemy.dialects.")] == []
+    assert [name for name in times if name == "yaml" or name == "orjson"] == []
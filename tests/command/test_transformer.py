@@ -1,23 +1,59 @@
 from collections.abc import Sequence
-from types import ModuleType
+from types import ModuleType, SimpleNamespace
 from unittest.mock import ANY
 
 import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from pytest_mock import MockerFixture
 from pytest_unordered import unordered
 from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.orm import declarative_base
 
 from sqlalchemy_schema.command.transformer import (
     AsyncAPI2Transformer,
     JSONSchemaTransformer,
+    OpenAPI2Transformer,
     collect_models,
 )
 from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.utils.discovery import DiscoveredModels
 from sqlalchemy_schema.walkers import StructuralWalker
 from tests import fixtures
 from tests.fixtures import models
 from tests.fixtures.models.address import Address
 from tests.fixtures.models.user import Group, User
 
+Base = declarative_base()
+
+
+class TableNameMixin:
+    __tablename__ = "transformer_mixin"
+
+
+class Home(Base):
+    __tablename__ = "transformer_home"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    street = sa.Column(sa.String(255), nullable=False)
+
+
+class Office(Base):
+    __tablename__ = "transformer_office"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    street = sa.Column(sa.String(255), nullable=False)
+
+
+class Employee(Base):
+    __tablename__ = "transformer_employee"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    home_id = sa.Column(sa.Integer, sa.ForeignKey(Home.pk))
+    office_id = sa.Column(sa.Integer, sa.ForeignKey(Office.pk))
+    home = orm.relationship(Home)
+    office = orm.relationship(Office)
+
 
 @pytest.fixture
 def schema_factory() -> SchemaFactory:
@@ -78,6 +114,92 @@ class TestJSONSchemaTransformer:
             },
         }
 
+    def test_transform_iter_module(self, schema_factory: SchemaFactory) -> None:
+        # Arrange
+        transformer = JSONSchemaTransformer(schema_factory)
+
+        # Act
+        actual = transformer.transform_iter([models], None)
+
+        # Assert
+        assert dict(actual) == transformer.transform([models], None)["definitions"]
+
+    def test_transform_modules(self, schema_factory: SchemaFactory) -> None:
+        # Arrange
+        transformer = JSONSchemaTransformer(schema_factory)
+        targets = [models.user, models.address]
+
+        # Act
+        actual = transformer.transform(targets, None)
+
+        # Assert
+        assert list(actual["definitions"]) == ["Group", "User", "Address"]
+        assert actual["definitions"] == dict(transformer.transform_iter(targets, None))
+
+    def test_streamable_only_for_modules(self, schema_factory: SchemaFactory) -> None:
+        # Arrange
+        transformer = JSONSchemaTransformer(schema_factory)
+
+        # Act & Assert
+        assert transformer.streamable([models])
+        assert not transformer.streamable([models, User])
+
+
+class TestOpenAPI2Transformer:
+    @pytest.mark.parametrize(
+        "targets",
+        [
+            pytest.param([User], id="model"),
+            pytest.param([models], id="module"),
+            pytest.param([Address, models.user], id="model and module"),
+        ],
+    )
+    def test_transform_iter(
+        self, schema_factory: SchemaFactory, targets: Sequence[ModuleType]
+    ) -> None:
+        # Arrange
+        transformer = OpenAPI2Transformer(schema_factory)
+
+        # Act
+        actual = list(transformer.transform_iter(targets, None))
+
+        # Assert
+        assert dict(actual) == transformer.transform(targets, None)["definitions"]
+        assert len(actual) == len(dict(actual))
+
+    def test_transform_iter_models_win_over_definitions(
+        self, schema_factory: SchemaFactory
+    ) -> None:
+        # Arrange
+        transformer = OpenAPI2Transformer(schema_factory)
+
+        # Act
+        actual = dict(transformer.transform_iter([User, Group], None))
+
+        # Assert
+        assert list(actual) == ["Address", "User", "Group"]
+        assert actual["User"]["title"] == "User"
+        assert actual["Group"]["title"] == "Group"
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_identical_definitions_are_emitted_once(
+        self, schema_factory: SchemaFactory, stream: bool
+    ) -> None:
+        # Arrange
+        transformer = OpenAPI2Transformer(schema_factory)
+
+        # Act
+        if stream:
+            actual = dict(transformer.transform_iter([Employee], None))
+        else:
+            actual = transformer.transform([Employee], None)["definitions"]
+
+        # Assert
+        assert list(actual) == ["Home", "Employee"]
+        assert actual["Employee"]["properties"]["home"] == {"$ref": "#/definitions/Home"}
+        assert actual["Employee"]["properties"]["office"] == {"$ref": "#/definitions/Home"}
+        assert transformer.conflicts == []
+
 
 class TestCollectModels:
     @pytest.mark.parametrize(
@@ -87,6 +209,14 @@ class TestCollectModels:
             pytest.param(fixtures.models.not_a_sa_model, [], id="not a model"),
             pytest.param(fixtures.models, [User, Group, Address], id="__all__"),
             pytest.param(lambda x: x, [], id="function"),
+            pytest.param(
+                SimpleNamespace(Base=Base, Mixin=TableNameMixin, Home=Home),
+                [Home],
+                id="bases and mixins",
+            ),
+            pytest.param(
+                DiscoveredModels("models", (User, Group)), [User, Group], id="discovered"
+            ),
         ],
     )
     def test_collect_models(self, module: ModuleType, expected: Sequence[DeclarativeMeta]) -> None:
@@ -212,3 +342,34 @@ class TestAsyncAPI2Transformer:
                 }
             }
         }
+
+    def test_transform_iter(self, schema_factory: SchemaFactory) -> None:
+        # Arrange
+        transformer = AsyncAPI2Transformer(schema_factory)
+
+        # Act
+        actual = transformer.transform_iter([User], None)
+
+        # Assert
+        assert transformer.envelope == ("components", "schemas")
+        assert dict(actual) == transformer.transform([User], None)["components"]["schemas"]
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_ref_prefix__from_factory(self, mocker: MockerFixture, stream: bool) -> None:
+        # Arrange
+        transformer = AsyncAPI2Transformer(
+            SchemaFactory(StructuralWalker, ref_prefix=AsyncAPI2Transformer.ref_prefix)
+        )
+        replace_ref = mocker.spy(transformer, "replace_ref")
+
+        # Act
+        if stream:
+            actual = dict(transformer.transform_iter([Group], None))
+        else:
+            actual = transformer.transform([Group], None)["components"]["schemas"]
+
+        # Assert
+        assert actual["Group"]["properties"]["users"]["items"] == {
+            "$ref": "#/components/schemas/User"
+        }
+        assert replace_ref.call_count == 0
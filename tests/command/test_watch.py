@@ -0,0 +1,190 @@
+import json
+import os
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from sqlalchemy_schema.command.driver import Driver
+from sqlalchemy_schema.command.main import DEFAULT_DECISION, DEFAULT_WALKER
+from sqlalchemy_schema.command.watch import Watcher
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.types import Layout
+
+PACKAGE = "watched_models"
+
+SOURCES = {
+    "__init__.py": "",
+    "base.py": "from sqlalchemy.orm import declarative_base\n\nBase = declarative_base()\n",
+    "author.py": """\
+import sqlalchemy as sa
+
+from watched_models.base import Base
+
+
+class Author(Base):
+    __tablename__ = "watch_author"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+""",
+    "book.py": """\
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+
+from watched_models.base import Base
+
+
+class Book(Base):
+    __tablename__ = "watch_book"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    author_id = sa.Column(sa.Integer, sa.ForeignKey("watch_author.pk"))
+    author = orm.relationship("Author", backref="books")
+""",
+    "shelf.py": """\
+import sqlalchemy as sa
+
+from watched_models.base import Base
+
+
+class Shelf(Base):
+    __tablename__ = "watch_shelf"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+""",
+}
+
+
+@pytest.fixture
+def package(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    root = tmp_path / PACKAGE
+    root.mkdir()
+    for name, source in SOURCES.items():
+        (root / name).write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    yield root
+
+    for name in [name for name in sys.modules if name.split(".")[0] == PACKAGE]:
+        module = sys.modules.pop(name)
+        if name == f"{PACKAGE}.base":
+            module.Base.registry.dispose()
+
+
+def edit(path: Path, old: str, new: str) -> None:
+    path.write_text(path.read_text().replace(old, new))
+    # make sure the change is seen even on filesystems with coarse timestamps
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def add_column(path: Path, model: str) -> None:
+    edit(
+        path,
+        f'__tablename__ = "watch_{model}"\n',
+        f'__tablename__ = "watch_{model}"\n    name = sa.Column(sa.String(10))\n',
+    )
+
+
+@pytest.fixture
+def watcher(package: Path, tmp_path: Path) -> Watcher:
+    driver = Driver(DEFAULT_WALKER, DEFAULT_DECISION, Layout.SWAGGER_2)
+
+    return Watcher(
+        driver,
+        [PACKAGE],
+        [(Layout.SWAGGER_2, tmp_path / "out.json")],
+        recursive=True,
+        interval=0,
+    )
+
+
+def read_definitions(watcher: Watcher) -> dict:
+    path = watcher.outputs[0][1]
+    assert path is not None
+
+    return json.loads(path.read_text())["definitions"]
+
+
+class TestWatcher:
+    def test_generate__watches_the_loaded_modules(self, watcher: Watcher) -> None:
+        # act
+        watcher.generate()
+
+        # assert
+        assert list(read_definitions(watcher)) == ["Author", "Book", "Shelf"]
+        assert set(watcher.sources) == {
+            PACKAGE,
+            f"{PACKAGE}.author",
+            f"{PACKAGE}.base",
+            f"{PACKAGE}.book",
+            f"{PACKAGE}.shelf",
+        }
+        assert watcher.poll() == set()
+
+    def test_only_changed_models_are_regenerated(
+        self, mocker: MockerFixture, watcher: Watcher, package: Path
+    ) -> None:
+        # arrange
+        watcher.generate()
+        generate = mocker.spy(SchemaFactory, "_generate")
+        add_column(package / "shelf.py", "shelf")
+
+        # act
+        changed = watcher.poll()
+        watcher.reload(changed)
+        watcher.generate()
+
+        # assert
+        assert changed == {f"{PACKAGE}.shelf"}
+        assert [call.args[1].__name__ for call in generate.call_args_list] == ["Shelf"]
+        assert "name" in read_definitions(watcher)["Shelf"]["properties"]
+
+    def test_related_models_are_regenerated(
+        self, mocker: MockerFixture, watcher: Watcher, package: Path
+    ) -> None:
+        # arrange
+        watcher.generate()
+        generate = mocker.spy(SchemaFactory, "_generate")
+        add_column(package / "author.py", "author")
+
+        # act
+        watcher.reload(watcher.poll())
+        watcher.generate()
+
+        # assert
+        assert sorted(call.args[1].__name__ for call in generate.call_args_list) == [
+            "Author",
+            "Book",
+        ]
+        definitions = read_definitions(watcher)
+        assert "name" in definitions["Author"]["properties"]
+        assert definitions["Book"]["properties"]["author"] == {"$ref": "#/definitions/Author"}
+
+    def test_watch__survives_a_broken_module(
+        self, mocker: MockerFixture, watcher: Watcher, package: Path
+    ) -> None:
+        # arrange
+        edits = iter(
+            [
+                lambda: edit(package / "shelf.py", "class Shelf", "class Shelf("),
+                lambda: None,
+                lambda: edit(package / "shelf.py", "class Shelf(", "class Shelf"),
+            ]
+        )
+        mocker.patch(
+            "sqlalchemy_schema.command.watch.time.sleep", side_effect=lambda _: next(edits)()
+        )
+        regenerate = mocker.spy(watcher, "generate")
+
+        # act
+        watcher.watch(iterations=3)
+
+        # assert
+        # the first generation and the one after the fix; the broken save fails, and
+        # nothing is retried while the file stays unchanged
+        assert regenerate.call_count == 2
+        assert watcher.pending == set()
+        assert list(read_definitions(watcher)) == ["Author", "Book", "Shelf"]
@@ -0,0 +1,160 @@
+from itertools import chain, repeat
+from typing import Any
+
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import declarative_base
+
+from sqlalchemy_schema.budget import GenerationBudget
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.walkers import StructuralWalker
+
+Base = declarative_base()
+
+
+class Country(Base):
+    __tablename__ = "country"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    name = sa.Column(sa.String(255), nullable=False)
+
+
+class City(Base):
+    __tablename__ = "city"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    country_id = sa.Column(sa.Integer, sa.ForeignKey(Country.pk), nullable=False)
+    country = orm.relationship(Country, backref="cities")
+
+
+class Person(Base):
+    __tablename__ = "person"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    home_id = sa.Column(sa.Integer, sa.ForeignKey(City.pk), nullable=False)
+    work_id = sa.Column(sa.Integer, sa.ForeignKey(City.pk), nullable=False)
+    home = orm.relationship(City, foreign_keys=[home_id])
+    work = orm.relationship(City, foreign_keys=[work_id])
+
+
+@pytest.mark.parametrize("shared_definitions", [False, True])
+def test_unlimited_budget__same_as_no_budget(shared_definitions: bool) -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker, shared_definitions=shared_definitions)
+    budget = GenerationBudget()
+
+    # act
+    actual = target(Person, budget=budget)
+
+    # assert
+    assert actual == target(Person)
+    assert budget.truncated_paths == []
+    assert budget.nodes > 0
+
+
+def test_max_definitions__stops_expanding() -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker)
+    budget = GenerationBudget(max_definitions=1)
+
+    # act
+    actual = target(Person, budget=budget)
+
+    # assert
+    # the definition is spent as soon as it is expanded, before its own relationships
+    assert budget.exhausted
+    assert budget.definitions == 1
+    assert budget.truncated_paths == ["home.country", "work"]
+    assert actual["properties"]["work"] == {"$ref": "#/definitions/City"}
+    assert actual["definitions"]["City"]["properties"]["country"] == {
+        "$ref": "#/definitions/Country"
+    }
+    assert actual["definitions"]["Country"] == {"type": "object"}
+
+
+@pytest.mark.parametrize("shared_definitions", [False, True])
+@pytest.mark.parametrize("max_definitions", [1, 2, 3])
+def test_max_definitions__is_never_exceeded(
+    shared_definitions: bool, max_definitions: int
+) -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker, shared_definitions=shared_definitions)
+    budget = GenerationBudget(max_definitions=max_definitions)
+
+    # act
+    target(Person, budget=budget)
+
+    # assert
+    assert budget.definitions <= max_definitions
+
+
+def test_max_nodes__emits_placeholder_definitions() -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker)
+    budget = GenerationBudget(max_nodes=1)
+
+    # act
+    actual = target(Person, budget=budget)
+
+    # assert
+    assert budget.truncated_paths == ["home", "work"]
+    assert actual["properties"]["home"] == {"$ref": "#/definitions/City"}
+    assert actual["definitions"] == {"City": {"type": "object"}}
+
+
+def test_max_nodes__shared_definitions() -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker, shared_definitions=True)
+    budget = GenerationBudget(max_nodes=4)
+
+    # act
+    actual = target(Person, budget=budget)
+
+    # assert
+    assert budget.truncated_paths == ["home.country"]
+    assert actual["definitions"]["Country"] == {"type": "object"}
+    assert actual["definitions"]["City"]["properties"]["country"] == {
+        "$ref": "#/definitions/Country"
+    }
+
+
+def test_timeout__stops_expanding(mocker: MockerFixture) -> None:
+    # arrange
+    # construction and the start of the call read the clock, every later check is late
+    mocker.patch("sqlalchemy_schema.budget.monotonic", side_effect=chain([0.0, 0.0], repeat(2.0)))
+    target = SchemaFactory(StructuralWalker)
+    budget = GenerationBudget(timeout=1.0)
+
+    # act
+    actual = target(Person, budget=budget)
+
+    # assert
+    assert budget.truncated_paths == ["home", "work"]
+    assert actual["definitions"] == {"City": {"type": "object"}}
+
+
+def test_budget_is_reset_per_call() -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker)
+    budget = GenerationBudget(max_definitions=1)
+    target(Person, budget=budget)
+
+    # act
+    target(Country, budget=budget)
+
+    # assert
+    assert budget.truncated_paths == []
+
+
+def test_budgeted_calls_bypass_the_result_cache() -> None:
+    # arrange
+    target = SchemaFactory(StructuralWalker, cache_size=8)
+
+    # act
+    actual: Any = target(Person, budget=GenerationBudget(max_nodes=1))
+
+    # assert
+    assert actual["definitions"] == {"City": {"type": "object"}}
+    assert target.cache_info().currsize == 0
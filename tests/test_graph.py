@@ -0,0 +1,113 @@
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from sqlalchemy import inspect
+from sqlalchemy.orm import MANYTOONE, ONETOMANY, declarative_base
+
+from sqlalchemy_schema.decisions import (
+    RelationDecision,
+    UseForeignKeyIfPossibleDecision,
+)
+from sqlalchemy_schema.graph import RegistryGraph
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.walkers import StructuralWalker
+
+Base = declarative_base()
+
+
+class Country(Base):
+    __tablename__ = "graph_country"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+
+
+class Team(Base):
+    __tablename__ = "graph_team"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    country_id = sa.Column(sa.Integer, sa.ForeignKey(Country.pk))
+    country = orm.relationship(Country)
+
+
+class Member(Base):
+    __tablename__ = "graph_member"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    team_id = sa.Column(sa.Integer, sa.ForeignKey(Team.pk), nullable=False)
+    mentor_id = sa.Column(sa.Integer, sa.ForeignKey("graph_member.pk"))
+    team = orm.relationship(Team, backref="members")
+    mentor = orm.relationship("Member", remote_side=[pk])
+
+
+@pytest.fixture
+def graph() -> RegistryGraph:
+    return RegistryGraph(Base)
+
+
+def test_nodes__are_numbered_by_class_name(graph: RegistryGraph) -> None:
+    assert [mapper.class_ for mapper in graph.mappers] == [Country, Member, Team]
+    assert graph.id(inspect(Team)) == 2
+
+
+def test_nodes__from_registry_or_mappers() -> None:
+    from_registry = RegistryGraph(Base.registry)
+    from_mappers = RegistryGraph([inspect(Team)])
+
+    assert from_registry.mappers == RegistryGraph(Base).mappers
+    # targets of relationships are added as nodes
+    assert [mapper.class_ for mapper in from_mappers.mappers] == [Team, Country, Member]
+
+
+def test_relations__are_precomputed(graph: RegistryGraph) -> None:
+    team = inspect(Member).relationships["team"]
+
+    relation = graph.relation(team)
+
+    assert relation.source == graph.id(inspect(Member))
+    assert relation.target == graph.id(inspect(Team))
+    assert relation.direction == MANYTOONE
+    assert relation.local_columns == frozenset(team.local_columns)
+    assert relation.remote_side == frozenset(team.remote_side)
+    assert relation.local_column_names == ("team_id",)
+
+
+def test_relations_of__follow_mapper_order(graph: RegistryGraph) -> None:
+    relations = graph.relations_of(inspect(Team))
+
+    assert [relation.prop.key for relation in relations] == ["country", "members"]
+    assert relations[1].direction == ONETOMANY
+    assert graph.relations_of(inspect(Country)) == []
+
+
+def test_components__cycles_are_grouped(graph: RegistryGraph) -> None:
+    assert [
+        [mapper.class_ for mapper in component] for component in graph.cyclic_components()
+    ] == [[Member, Team]]
+    assert graph.is_cyclic(inspect(Member))
+    assert not graph.is_cyclic(inspect(Country))
+
+
+def test_topological_order__referenced_mappers_first(graph: RegistryGraph) -> None:
+    assert [mapper.class_ for mapper in graph.topological_order()] == [Country, Member, Team]
+
+
+@pytest.mark.parametrize("decision", [RelationDecision, UseForeignKeyIfPossibleDecision])
+@pytest.mark.parametrize("model", [Country, Team, Member])
+def test_schema__with_graph_is_unchanged(
+    graph: RegistryGraph, decision: type, model: type
+) -> None:
+    target = SchemaFactory(StructuralWalker, relation_decision=decision(), graph=graph)
+
+    result = target(model)
+
+    assert result == SchemaFactory(StructuralWalker, relation_decision=decision())(model)
+
+
+def test_schema__child_walkers_share_the_graph(graph: RegistryGraph) -> None:
+    walker = SchemaFactory(StructuralWalker, graph=graph).root_walker(Member)
+
+    child = walker.clone("team", inspect(Team))
+
+    assert walker.graph is graph
+    assert child.graph is graph
+    assert child.from_child(inspect(Country)).graph is graph
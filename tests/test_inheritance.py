@@ -0,0 +1,171 @@
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from jsonschema import ValidationError, validate
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import declarative_base
+
+from sqlalchemy_schema.exceptions import InvalidStatus
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.walkers import ForeignKeyWalker, StructuralWalker
+
+Base = declarative_base()
+
+
+class Owner(Base):
+    __tablename__ = "inheritance_owner"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+
+
+class Event(Base):
+    """base event"""
+
+    __tablename__ = "inheritance_event"
+
+    id = sa.Column(sa.Integer, primary_key=True)
+    kind = sa.Column(sa.String(20))
+    name = sa.Column(sa.String(10), nullable=False)
+    owner_id = sa.Column(sa.Integer, sa.ForeignKey(Owner.pk))
+    owner = orm.relationship(Owner)
+
+    __mapper_args__ = {"polymorphic_on": kind, "polymorphic_identity": "event"}
+
+
+class Click(Event):
+    __tablename__ = "inheritance_click"
+
+    id = sa.Column(sa.Integer, sa.ForeignKey(Event.id), primary_key=True)
+    x = sa.Column(sa.Integer, nullable=False)
+
+    __mapper_args__ = {"polymorphic_identity": "click"}
+
+
+class DoubleClick(Click):
+    __tablename__ = "inheritance_double_click"
+
+    id = sa.Column(sa.Integer, sa.ForeignKey(Click.id), primary_key=True)
+    gap = sa.Column(sa.Integer)
+
+    __mapper_args__ = {"polymorphic_identity": "double_click"}
+
+
+class Scroll(Event):
+    dy = sa.Column(sa.Integer)
+
+    __mapper_args__ = {"polymorphic_identity": "scroll"}
+
+
+EVENT = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "kind": {"type": "string", "maxLength": 20},
+        "name": {"type": "string", "maxLength": 10},
+        "owner": {"$ref": "#/definitions/Owner"},
+    },
+    "required": ["id", "name"],
+}
+
+
+def _makeOne() -> SchemaFactory:
+    return SchemaFactory(StructuralWalker, all_of_inheritance=True)
+
+
+def test_base_model__is_unchanged() -> None:
+    target = _makeOne()
+
+    assert target(Event) == SchemaFactory(StructuralWalker)(Event)
+
+
+def test_single_table__only_own_columns() -> None:
+    target = _makeOne()
+    result = target(Scroll)
+
+    assert list(result) == ["title", "definitions", "allOf"]
+    assert result["definitions"]["Event"] == EVENT
+    assert result["allOf"] == [
+        {"$ref": "#/definitions/Event"},
+        {"type": "object", "properties": {"dy": {"type": "integer"}}},
+    ]
+
+
+def test_joined_table__every_ancestor_is_a_definition() -> None:
+    target = _makeOne()
+    result = target(DoubleClick)
+
+    assert result["definitions"]["Event"] == EVENT
+    assert result["definitions"]["Click"] == {
+        "allOf": [
+            {"$ref": "#/definitions/Event"},
+            {"type": "object", "properties": {"x": {"type": "integer"}}, "required": ["x"]},
+        ]
+    }
+    assert result["allOf"] == [
+        {"$ref": "#/definitions/Click"},
+        {"type": "object", "properties": {"gap": {"type": "integer"}}},
+    ]
+
+
+def test_foreign_key_walker__only_own_columns() -> None:
+    target = SchemaFactory(ForeignKeyWalker, all_of_inheritance=True)
+    result = target(Click)
+
+    assert list(result["definitions"]["Event"]["properties"]) == ["id", "kind", "name", "owner_id"]
+    assert result["allOf"][1]["properties"] == {"x": {"type": "integer"}}
+
+
+def test_includes_and_overrides__apply_to_every_level() -> None:
+    target = _makeOne()
+    result = target(
+        Click, includes=["name", "x"], overrides={"name": {"maxLength": 5}, "x": {"minimum": 0}}
+    )
+
+    assert result["definitions"]["Event"]["properties"] == {
+        "name": {"type": "string", "maxLength": 5}
+    }
+    assert result["allOf"][1]["properties"] == {"x": {"type": "integer", "minimum": 0}}
+
+
+def test_ancestors__are_walked_once(mocker: MockerFixture) -> None:
+    target = _makeOne()
+    build_level = mocker.spy(target, "_build_inheritance_level")
+
+    result = [target(model) for model in [Click, Scroll, DoubleClick]]
+
+    # Click, Event; Scroll; DoubleClick, and Click as an ancestor
+    assert [call.args[0].class_ for call in build_level.call_args_list] == [
+        Click,
+        Event,
+        Scroll,
+        DoubleClick,
+        Click,
+    ]
+    assert result == [_makeOne()(model) for model in [Click, Scroll, DoubleClick]]
+
+
+def test_ancestors__reused_with_their_overrides() -> None:
+    target = _makeOne()
+    overrides = {"name": {"maxLength": 5}}
+    target(Click, overrides=overrides)
+
+    result = target(Scroll, overrides=overrides)
+
+    assert result["definitions"]["Event"]["properties"]["name"]["maxLength"] == 5
+    with pytest.raises(InvalidStatus):
+        target(Scroll, overrides={**overrides, "missing": {}})
+
+
+@pytest.mark.parametrize("model", [Click, DoubleClick, Scroll])
+def test_lazy__equals_eager_schema(model: type) -> None:
+    target = _makeOne()
+
+    assert target.lazy(model) == target(model)
+
+
+def test_validates_inherited_properties() -> None:
+    schema = _makeOne()(DoubleClick)
+
+    validate({"id": 1, "name": "click", "x": 1, "gap": 2}, schema)
+    with pytest.raises(ValidationError):
+        validate({"id": 1, "x": 1}, schema)
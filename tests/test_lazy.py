@@ -0,0 +1,165 @@
+from typing import Optional
+
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as orm
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import declarative_base
+
+from sqlalchemy_schema.decisions import UseForeignKeyIfPossibleDecision
+from sqlalchemy_schema.exceptions import InvalidStatus
+from sqlalchemy_schema.lazy import LazySchema
+from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.walkers import (
+    AbstractWalker,
+    ForeignKeyWalker,
+    NoForeignKeyWalker,
+    StructuralWalker,
+)
+
+Base = declarative_base()
+
+
+class Author(Base):
+    """author of posts"""
+
+    __tablename__ = "lazy_author"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    name = sa.Column(sa.String(255), nullable=False)
+
+
+class Post(Base):
+    __tablename__ = "lazy_post"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    title = sa.Column(sa.String(255), nullable=True)
+    author_id = sa.Column(sa.Integer, sa.ForeignKey(Author.pk), nullable=False)
+    author = orm.relationship(Author, backref="posts")
+
+
+class Comment(Base):
+    __tablename__ = "lazy_comment"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    body = sa.Column(sa.Text, nullable=False)
+    post_id = sa.Column(sa.Integer, sa.ForeignKey(Post.pk), nullable=False)
+    post = orm.relationship(Post, backref="comments")
+
+
+# an override of a column one relationship away from each model
+NESTED_OVERRIDES = {
+    Author: {"posts.title": {"maxLength": 1}},
+    Post: {"author.name": {"maxLength": 1}},
+    Comment: {"post.title": {"maxLength": 1}},
+}
+
+
+@pytest.mark.parametrize("walker", [StructuralWalker, ForeignKeyWalker, NoForeignKeyWalker])
+@pytest.mark.parametrize("shared_definitions", [False, True])
+@pytest.mark.parametrize("depth", [None, 0, 1, 2])
+@pytest.mark.parametrize("model", [Author, Post, Comment])
+@pytest.mark.parametrize("nested_overrides", [False, True])
+def test_lazy__equals_eager_schema(
+    walker: type[AbstractWalker],
+    shared_definitions: bool,
+    depth: Optional[int],
+    model: type,
+    nested_overrides: bool,
+) -> None:
+    target = SchemaFactory(walker, shared_definitions=shared_definitions)
+    overrides = NESTED_OVERRIDES[model] if nested_overrides else None
+
+    try:
+        expected = target(model, depth=depth, overrides=overrides)
+    except InvalidStatus:
+        # the relationship is not followed, so the override does not apply to anything
+        with pytest.raises(InvalidStatus):
+            target.lazy(model, depth=depth, overrides=overrides).materialize()
+        return
+
+    result = target.lazy(model, depth=depth, overrides=overrides)
+
+    assert isinstance(result, LazySchema)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_lazy__foreign_key_decision_equals_eager_schema() -> None:
+    target = SchemaFactory(StructuralWalker, relation_decision=UseForeignKeyIfPossibleDecision())
+
+    result = target.lazy(Comment, excludes=["body"])
+
+    assert result.materialize() == target(Comment, excludes=["body"])
+
+
+class TestMaterialization:
+    def test_keys_do_not_build_relationships(self, mocker: MockerFixture) -> None:
+        # arrange
+        target = SchemaFactory(StructuralWalker)
+        child_schema = mocker.spy(target.child_factory, "child_schema")
+
+        # act
+        result = target.lazy(Comment)
+        keys = list(result["properties"])
+
+        # assert
+        assert keys == ["pk", "body", "post"]
+        assert result["properties"]["body"] == {"type": "string"}
+        assert child_schema.call_count == 0
+
+    def test_relationship_is_built_on_access(self, mocker: MockerFixture) -> None:
+        # arrange
+        target = SchemaFactory(StructuralWalker)
+        child_schema = mocker.spy(target.child_factory, "child_schema")
+        result = target.lazy(Comment)
+
+        # act
+        post = result["properties"]["post"]
+
+        # assert
+        assert post == {"$ref": "#/definitions/Post"}
+        assert child_schema.call_count == 1
+
+    def test_values_are_built_once(self, mocker: MockerFixture) -> None:
+        # arrange
+        target = SchemaFactory(StructuralWalker)
+        child_schema = mocker.spy(target.child_factory, "child_schema")
+        result = target.lazy(Comment)
+
+        # act
+        first = result["properties"]["post"]
+        second = result["properties"]["post"]
+        result["definitions"]
+        result["definitions"]
+
+        # assert
+        assert first is second
+        assert child_schema.call_count == 1
+
+    def test_materialize_returns_plain_dicts(self) -> None:
+        target = SchemaFactory(StructuralWalker)
+
+        result = target.lazy(Post).materialize()
+
+        assert type(result) is dict
+        assert type(result["properties"]) is dict
+        assert result == target(Post)
+
+    def test_missing_key(self) -> None:
+        target = SchemaFactory(StructuralWalker)
+
+        result = target.lazy(Comment)
+
+        assert "description" not in result
+        with pytest.raises(KeyError):
+            result["properties"]["unknown"]
+
+
+def test_lazy__invalid_overrides_raise_once_materialized() -> None:
+    target = SchemaFactory(StructuralWalker)
+    result = target.lazy(Post, overrides={"unknown": {"maxLength": 20}})
+
+    assert result["properties"]["title"] == {"type": "string", "maxLength": 255}
+    with pytest.raises(InvalidStatus):
+        result.materialize()
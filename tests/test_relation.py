@@ -1,20 +1,36 @@
 from __future__ import annotations
 
-from collections.abc import Mapping
-from typing import Any
+import inspect
+import sys
+from collections.abc import Iterator, Mapping
+from typing import Any, Optional
 
+import pytest
 import sqlalchemy as sa
 import sqlalchemy.orm as orm
+from pytest_mock import MockerFixture
 from pytest_unordered import unordered
 from sqlalchemy.orm import Mapped, declarative_base
 
-from sqlalchemy_schema.decisions import UseForeignKeyIfPossibleDecision
-from sqlalchemy_schema.schema_factory import RelationDecision, SchemaFactory
+from sqlalchemy_schema.decisions import (
+    AbstractDecision,
+    UseForeignKeyIfPossibleDecision,
+)
+from sqlalchemy_schema.exceptions import InvalidStatus
+from sqlalchemy_schema.schema_factory import (
+    ChildFactory,
+    RelationDecision,
+    SchemaFactory,
+)
+from sqlalchemy_schema.types import ColumnPropertyType
 from sqlalchemy_schema.walkers import (
     AbstractWalker,
     ForeignKeyWalker,
+    NoForeignKeyWalker,
     StructuralWalker,
 )
+from tests.fixtures.models.address import Address
+from tests.fixtures.models.user import User as FixtureUser
 
 
 def get_reference(schema: Mapping[str, Any], root_schema: Mapping[str, Any]) -> Mapping[str, Any]:
@@ -223,3 +239,360 @@ def test_properties__infinite_loop2() -> None:
     assert list(result["properties"]) == unordered(["id", "y_id"])
 
     assert result["properties"]["y_id"] == {"type": "integer", "relation": "ys"}
+
+
+# shared definitions
+# L0 has two relationships to L1, L1 two to L2, ... so the number of paths doubles per layer
+class L3(Base):
+    __tablename__ = "L3"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+
+
+class L2(Base):
+    __tablename__ = "L2"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    left_id = sa.Column(sa.Integer, sa.ForeignKey(L3.pk), nullable=False)
+    right_id = sa.Column(sa.Integer, sa.ForeignKey(L3.pk), nullable=False)
+    left = orm.relationship(L3, foreign_keys=[left_id])
+    right = orm.relationship(L3, foreign_keys=[right_id])
+
+
+class L1(Base):
+    __tablename__ = "L1"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    left_id = sa.Column(sa.Integer, sa.ForeignKey(L2.pk), nullable=False)
+    right_id = sa.Column(sa.Integer, sa.ForeignKey(L2.pk), nullable=False)
+    left = orm.relationship(L2, foreign_keys=[left_id])
+    right = orm.relationship(L2, foreign_keys=[right_id])
+
+
+class L0(Base):
+    __tablename__ = "L0"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    left_id = sa.Column(sa.Integer, sa.ForeignKey(L1.pk), nullable=False)
+    right_id = sa.Column(sa.Integer, sa.ForeignKey(L1.pk), nullable=False)
+    left = orm.relationship(L1, foreign_keys=[left_id])
+    right = orm.relationship(L1, foreign_keys=[right_id])
+
+
+def test_shared_definitions__one_definition_per_mapper(mocker: MockerFixture) -> None:
+    target = _makeOne(StructuralWalker, shared_definitions=True)
+    spy = mocker.spy(target, "_iter_properties")
+
+    result = target(L0)
+
+    assert spy.call_count == 4
+    assert list(result["definitions"]) == ["L1", "L2", "L3"]
+    assert result["properties"]["left"] == {"$ref": "#/definitions/L1"}
+    assert result["properties"]["right"] == {"$ref": "#/definitions/L1"}
+    assert result["definitions"]["L2"] == {
+        "type": "object",
+        "properties": {
+            "pk": {"type": "integer"},
+            "left": {"$ref": "#/definitions/L3"},
+            "right": {"$ref": "#/definitions/L3"},
+        },
+        "required": ["pk"],
+    }
+
+
+def test_shared_definitions__default_mode_expands_every_path(mocker: MockerFixture) -> None:
+    target = _makeOne(StructuralWalker)
+    spy = mocker.spy(target, "_iter_properties")
+
+    target(L0)
+
+    assert spy.call_count == 1 + 2 + 4 + 8
+
+
+def test_shared_definitions__cycles_are_references() -> None:
+    target = _makeOne(StructuralWalker, shared_definitions=True)
+    result = target(Group)
+
+    assert result["properties"]["users"] == {
+        "type": "array",
+        "items": {"$ref": "#/definitions/User"},
+    }
+    assert result["definitions"]["User"]["properties"]["group"] == {"$ref": "#/definitions/Group"}
+    assert list(result["definitions"]) == ["User", "Group"]
+
+
+@pytest.mark.parametrize("shared_definitions", [False, True])
+def test_ref_prefix__is_used_for_every_reference(shared_definitions: bool) -> None:
+    target = _makeOne(
+        StructuralWalker,
+        shared_definitions=shared_definitions,
+        ref_prefix="#/components/schemas/",
+    )
+    result = target(X)
+
+    assert result["properties"]["ys"] == {"$ref": "#/components/schemas/Y"}
+    assert "#/definitions/" not in repr(result)
+
+
+def test_shared_definitions__all_references_resolve() -> None:
+    target = _makeOne(StructuralWalker, shared_definitions=True)
+    result = target(X)
+
+    def iter_refs(schema: Any) -> Iterator[Mapping[str, Any]]:
+        if isinstance(schema, dict):
+            if "$ref" in schema:
+                yield schema
+            for value in schema.values():
+                yield from iter_refs(value)
+
+    refs = list(iter_refs(result))
+
+    assert refs
+    for ref in refs:
+        assert get_reference(ref, result)["type"] == "object"
+
+
+def test_shared_definitions__depth_uses_the_shortest_path() -> None:
+    target = _makeOne(StructuralWalker, shared_definitions=True)
+    result = target(A0, depth=2)
+
+    assert result["definitions"]["A1"]["properties"]["children"] == {
+        "type": "array",
+        "items": {"$ref": "#/definitions/A2"},
+    }
+    assert result["definitions"]["A2"]["properties"] == {}
+
+
+@pytest.mark.parametrize("shared_definitions", [False, True])
+@pytest.mark.parametrize("depth", [None, 1, 2])
+def test_each_mapper_is_walked_once(
+    mocker: MockerFixture, shared_definitions: bool, depth: Optional[int]
+) -> None:
+    target = _makeOne(StructuralWalker, shared_definitions=shared_definitions)
+    iter_properties = mocker.spy(target, "_iter_properties")
+    walk = mocker.spy(StructuralWalker, "walk")
+
+    target(L0, depth=depth, adjust_required=lambda prop, required: required)
+
+    assert walk.call_count == iter_properties.call_count
+
+
+def test_nested_excludes__apply_to_the_child() -> None:
+    target = _makeOne(StructuralWalker)
+    result = target(Group, excludes=["pk", "users.pk"])
+
+    assert list(result["properties"]) == ["name", "users"]
+    assert list(result["definitions"]["User"]["properties"]) == ["name"]
+
+
+def test_nested_includes__keep_their_own_excludes() -> None:
+    target = _makeOne(StructuralWalker)
+    result = target(Group, includes=["pk", "users", "users.pk", "users.name"], excludes=["name"])
+
+    assert list(result["properties"]) == ["pk", "users"]
+    assert list(result["definitions"]["User"]["properties"]) == ["pk", "name"]
+
+
+def test_nested_includes_and_excludes__conflict_in_the_child() -> None:
+    target = _makeOne(StructuralWalker)
+
+    with pytest.raises(InvalidStatus):
+        target(Group, includes=["users", "users.pk"], excludes=["users.pk"])
+
+
+def test_required__only_for_walked_properties() -> None:
+    target = _makeOne(StructuralWalker)
+    result = target(User, includes=["pk", "group"])
+
+    assert result["definitions"]["Group"] == {"type": "object", "properties": {}, "required": []}
+
+
+def test_required__depth_exhausted_definition_keeps_required() -> None:
+    target = _makeOne(StructuralWalker)
+    result = target(A0, depth=1)
+
+    assert result["definitions"]["A1"] == {"type": "object", "properties": {}, "required": ["pk"]}
+
+
+def test_deep_relationship_chain__does_not_recurse() -> None:
+    ChainBase = declarative_base()
+    size = 300
+    models = []
+
+    for i in reversed(range(size)):
+        attrs: dict[str, Any] = {
+            "__tablename__": f"chain_{i}",
+            "pk": sa.Column(sa.Integer, primary_key=True),
+        }
+        if i + 1 < size:
+            attrs["next_id"] = sa.Column(sa.Integer, sa.ForeignKey(f"chain_{i + 1}.pk"))
+            attrs["next"] = orm.relationship(f"Chain{i + 1}")
+        models.append(type(f"Chain{i}", (ChainBase,), attrs))
+
+    orm.configure_mappers()
+    target = _makeOne(StructuralWalker)
+
+    # far fewer frames than one per level of the chain
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 100)
+    try:
+        result = target(models[-1])
+    finally:
+        sys.setrecursionlimit(limit)
+
+    assert len(result["definitions"]) == size - 1
+    assert result["definitions"][f"Chain{size - 1}"]["properties"] == {"pk": {"type": "integer"}}
+
+
+def test_custom_child_schema_is_still_called(mocker: MockerFixture) -> None:
+    class CustomChildFactory(ChildFactory):
+        def child_schema(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+            return super().child_schema(*args, **kwargs)
+
+    child_factory = CustomChildFactory()
+    spy = mocker.spy(child_factory, "child_schema")
+    target = _makeOne(StructuralWalker, child_factory=child_factory)
+
+    result = target(A0)
+
+    assert spy.call_count == 5
+    # required columns are detected for the override rather than expected from it
+    assert all(call.kwargs["required"] is None for call in spy.call_args_list)
+    assert result == _makeOne(StructuralWalker)(A0)
+
+
+def test_custom_child_schema_with_the_former_signature() -> None:
+    class CustomChildFactory(ChildFactory):
+        def child_schema(
+            self,
+            prop: Any,
+            schema_factory: Any,
+            root_schema: dict[str, Any],
+            walker: Any,
+            overrides: Any,
+            /,
+            *,
+            depth: int | None = None,
+            history: Any | None = None,
+        ) -> dict[str, Any]:
+            return super().child_schema(
+                prop, schema_factory, root_schema, walker, overrides, depth=depth, history=history
+            )
+
+    target = _makeOne(StructuralWalker, child_factory=CustomChildFactory())
+
+    result = target(A0)
+
+    assert result == _makeOne(StructuralWalker)(A0)
+    assert target.lazy(A0).materialize() == result
+
+
+article_tag = sa.Table(
+    "article_tag",
+    Base.metadata,
+    sa.Column("article_id", sa.ForeignKey("Article.pk"), primary_key=True),
+    sa.Column("tag_id", sa.ForeignKey("Tag.pk"), primary_key=True),
+)
+
+
+class Tag(Base):
+    __tablename__ = "Tag"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+
+
+class Article(Base):
+    __tablename__ = "Article"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    tags = orm.relationship(Tag, secondary=article_tag)
+
+
+class TestDecisionCache:
+    @pytest.mark.parametrize("decision", [RelationDecision, UseForeignKeyIfPossibleDecision])
+    def test_outcome_is_computed_once(self, mocker: MockerFixture, decision: type) -> None:
+        # arrange
+        target = _makeOne(StructuralWalker, relation_decision=decision())
+        spy = mocker.spy(target.relation_decision, "decision")
+        first = target(A0)
+        calls = spy.call_count
+
+        # act
+        second = target(A0)
+
+        # assert
+        assert second == first
+        assert spy.call_count == calls
+
+    def test_immediate_schema_is_copied(self) -> None:
+        # arrange
+        target = _makeOne(StructuralWalker, relation_decision=UseForeignKeyIfPossibleDecision())
+        first = target(Article)
+
+        # act
+        first["properties"]["tags"]["items"]["type"] = "integer"
+        second = target(Article)
+
+        # assert
+        assert second["properties"]["tags"] == {"type": "array", "items": {"type": "string"}}
+
+    def test_custom_decision_is_not_cached_by_default(self, mocker: MockerFixture) -> None:
+        # arrange
+        class CustomDecision(RelationDecision):
+            def cache_key(self, *args: Any, **kwargs: Any) -> None:
+                return None
+
+        target = _makeOne(StructuralWalker, relation_decision=CustomDecision())
+        spy = mocker.spy(target.relation_decision, "decision")
+        target(User)
+        calls = spy.call_count
+
+        # act
+        target(User)
+
+        # assert
+        assert spy.call_count == 2 * calls
+
+    @pytest.mark.parametrize("decision", [RelationDecision, UseForeignKeyIfPossibleDecision])
+    def test_overridden_decision_is_not_cached(self, decision: type[AbstractDecision]) -> None:
+        # arrange
+        class CustomDecision(decision):  # type: ignore[valid-type,misc]
+            def decision(self, walker: Any, prop: Any, /, *, toplevel: bool = False) -> Any:
+                if hasattr(prop, "mapper") and not toplevel:
+                    yield {"type": "string"}, prop, {}
+                else:
+                    yield from super().decision(walker, prop, toplevel=toplevel)
+
+        expected = _makeOne(StructuralWalker, relation_decision=CustomDecision())(Address)
+        target = _makeOne(StructuralWalker, relation_decision=CustomDecision())
+        # decides User.group at the top level first
+        target(FixtureUser)
+
+        # act
+        actual = target(Address)
+
+        # assert
+        assert actual == expected
+        assert actual["definitions"]["User"]["properties"]["group"] == {"type": "string"}
+
+    def test_custom_decision_opts_in_with_cache_key(self, mocker: MockerFixture) -> None:
+        # arrange
+        class CustomDecision(AbstractDecision):
+            def cache_key(self, walker: Any, prop: Any, /, *, toplevel: bool = False) -> Any:
+                return prop
+
+            def decision(self, walker: Any, prop: Any, /, *, toplevel: bool = False) -> Any:
+                yield ColumnPropertyType.FOREIGNKEY, prop, {}
+
+        decision = CustomDecision()
+        target = _makeOne(NoForeignKeyWalker, relation_decision=decision)
+        spy = mocker.spy(decision, "decision")
+        target(User)
+
+        # act
+        target(User)
+        decision.cache_clear()
+        target(User)
+
+        # assert
+        assert spy.call_count == 4
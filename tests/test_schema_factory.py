@@ -4,6 +4,7 @@ from typing import Any, Callable, Optional, Union
 
 import pytest
 import sqlalchemy as sa
+from pytest_mock import MockerFixture
 from sqlalchemy import BigInteger, FetchedValue, Integer, String, func
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -12,7 +13,9 @@ from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.sql.expression import ColumnElement
 from sqlalchemy.sql.type_api import TypeEngine
 
-from sqlalchemy_schema.schema_factory import SchemaFactory
+from sqlalchemy_schema.exceptions import InvalidStatus
+from sqlalchemy_schema.schema_factory import Classifier, SchemaFactory
+from sqlalchemy_schema.utils.cache import CacheInfo
 from sqlalchemy_schema.walkers import (
     AbstractWalker,
     ForeignKeyWalker,
@@ -357,3 +360,269 @@ class TestSchemaFactory:
             "title": "Model",
             "type": "object",
         }
+
+    @pytest.mark.parametrize("walker_cls", WALKER_CLASSES)
+    def test_restrictions__tuple_of_functions__applied_in_order(
+        self, walker_cls: type[AbstractWalker]
+    ) -> None:
+        # arrange
+        def first(column: Any, sub: dict[str, Any]) -> None:
+            sub["x-order"] = ["first"]
+
+        def second(column: Any, sub: dict[str, Any]) -> None:
+            sub["x-order"].append("second")
+
+        class Model(Base):
+            __tablename__ = f"model_restrictions_tuple_{walker_cls}"
+
+            pk = sa.Column(sa.Integer, primary_key=True)
+            name = sa.Column(sa.Unicode(10))
+
+        target = SchemaFactory(walker_cls, restriction_dict={sa.String: (first, second)})
+
+        # act
+        actual = target(Model)
+
+        # assert
+        assert actual["properties"]["name"] == {"type": "string", "x-order": ["first", "second"]}
+
+    def test_restrictions__compiled_once_per_type(self, mocker: MockerFixture) -> None:
+        # arrange
+        class Model(Base):
+            __tablename__ = "model_restrictions_compiled_once"
+
+            pk = sa.Column(sa.Integer, primary_key=True)
+            first_name = sa.Column(sa.String(10))
+            last_name = sa.Column(sa.String(20))
+
+        target = SchemaFactory(NoForeignKeyWalker)
+        spy = mocker.spy(target, "_compile_restrictions")
+
+        # act
+        target(Model)
+        actual = target(Model)
+
+        # assert
+        assert actual["properties"]["last_name"] == {"type": "string", "maxLength": 20}
+        assert sorted(call.args[0].__name__ for call in spy.call_args_list) == [
+            "Integer",
+            "String",
+        ]
+
+    def test_restrictions__reassigning_restriction_set__recompiles(self) -> None:
+        # arrange
+        class Model(Base):
+            __tablename__ = "model_restrictions_reassigned"
+
+            pk = sa.Column(sa.Integer, primary_key=True)
+            name = sa.Column(sa.String(10))
+
+        target = SchemaFactory(NoForeignKeyWalker)
+        target(Model)
+
+        # act
+        target.restriction_set = []
+        actual = target(Model)
+
+        # assert
+        assert actual["properties"]["name"] == {"type": "string"}
+
+
+class CachedModel(Base):
+    __tablename__ = "model_schema_factory_cache"
+
+    pk = sa.Column(sa.Integer, primary_key=True)
+    name = sa.Column(sa.String(10), nullable=False)
+
+
+class TestSchemaFactoryCache:
+    @pytest.fixture
+    def model(self) -> type:
+        return CachedModel
+
+    def test_disabled_by_default(self, model: Any) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker)
+
+        # act
+        target(model)
+        target(model)
+
+        # assert
+        assert target.cache is None
+        assert target.cache_info() == CacheInfo(hits=0, misses=0, maxsize=0, currsize=0)
+
+    def test_hit_returns_equal_schema(self, model: Any, mocker: MockerFixture) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=8)
+        spy = mocker.spy(target, "_generate")
+
+        # act
+        first = target(model, excludes=["name"])
+        second = target(model, excludes=["name"])
+
+        # assert
+        assert first == second
+        assert spy.call_count == 1
+        assert target.cache_info() == CacheInfo(hits=1, misses=1, maxsize=8, currsize=1)
+
+    def test_cached_entry_cannot_be_corrupted(self, model: Any) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=8)
+
+        # act
+        target(model)["properties"]["name"]["maxLength"] = 0
+        target(model).pop("required")
+        actual = target(model)
+
+        # assert
+        assert actual["properties"]["name"] == {"type": "string", "maxLength": 10}
+        assert actual["required"] == ["name", "pk"]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            pytest.param({"includes": ["pk"]}, id="includes"),
+            pytest.param({"excludes": ["pk"]}, id="excludes"),
+            pytest.param({"overrides": {"name": {"maxLength": 5}}}, id="overrides"),
+            pytest.param({"depth": 1}, id="depth"),
+            pytest.param({"adjust_required": lambda prop, required: False}, id="adjust"),
+        ],
+    )
+    def test_arguments_are_part_of_the_key(self, model: Any, kwargs: dict[str, Any]) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=8)
+        target(model)
+
+        # act
+        target(model, **kwargs)
+
+        # assert
+        assert target.cache_info().misses == 2
+
+    @pytest.mark.parametrize(
+        "first, second",
+        [
+            pytest.param({"default": 1}, {"default": True}, id="int and bool"),
+            pytest.param({"default": 1}, {"default": 1.0}, id="int and float"),
+            pytest.param({"examples": {"a": 1}}, {"examples": [["a", 1]]}, id="dict and pairs"),
+            pytest.param({"enum": {1: "a"}}, {"enum": {"1": "a"}}, id="int and str keys"),
+        ],
+    )
+    def test_unequal_overrides_are_different_keys(
+        self, model: Any, first: dict[str, Any], second: dict[str, Any]
+    ) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=8)
+        target(model, overrides={"name": first})
+
+        # act
+        actual = target(model, overrides={"name": second})
+
+        # assert
+        assert target.cache_info().misses == 2
+        assert actual["properties"]["name"] == {"type": "string", "maxLength": 10, **second}
+
+    def test_least_recently_used_is_evicted(self, model: Any) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=2)
+
+        # act
+        target(model, includes=["pk"])
+        target(model, includes=["name"])
+        target(model, includes=["pk"])
+        target(model)
+        target(model, includes=["name"])
+
+        # assert
+        assert target.cache_info() == CacheInfo(hits=1, misses=4, maxsize=2, currsize=2)
+
+    def test_cache_clear(self, model: Any) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=8)
+        target(model)
+
+        # act
+        target.cache_clear()
+
+        # assert
+        assert target.cache_info() == CacheInfo(hits=0, misses=0, maxsize=8, currsize=0)
+
+    def test_failed_generation_is_not_cached(self, model: Any) -> None:
+        # arrange
+        target = SchemaFactory(NoForeignKeyWalker, cache_size=8)
+
+        # act & assert
+        with pytest.raises(InvalidStatus):
+            target(model, overrides={"*missing-field*": {"maxLength": 1}})
+
+        assert target.cache_info().currsize == 0
+
+
+class TestClassifier:
+    def test_resolution_is_cached_per_type_class(self) -> None:
+        # arrange
+        classifier = Classifier()
+
+        # act
+        first = classifier[sa.String(10)]
+        second = classifier[sa.String(20)]
+
+        # assert
+        assert first == second == (sa.String, "string")
+        assert classifier.cache_info() == CacheInfo(hits=1, misses=1, maxsize=None, currsize=1)
+
+    def test_resolution_follows_type_decorator_impl(self) -> None:
+        # arrange
+        class Decorated(sa.TypeDecorator):
+            impl = sa.Unicode
+            cache_ok = True
+
+        classifier = Classifier()
+
+        # act
+        classifier[Decorated()]
+        actual = classifier[Decorated()]
+
+        # assert
+        assert actual == (Decorated, "string")
+        assert classifier.hits == 1
+        assert classifier.misses == 1
+
+    def test_unknown_type_is_cached_and_raises(self) -> None:
+        # arrange
+        classifier = Classifier({})
+
+        # act & assert
+        for _ in range(2):
+            with pytest.raises(InvalidStatus):
+                classifier[sa.Integer()]
+
+        assert classifier.cache_info().misses == 1
+
+    def test_reassigning_mapping_invalidates_cache(self) -> None:
+        # arrange
+        classifier = Classifier({sa.Integer: "integer"})
+        classifier[sa.Integer()]
+
+        # act
+        classifier.mapping = {sa.Integer: "number"}
+        actual = classifier[sa.Integer()]
+
+        # assert
+        assert actual == (sa.Integer, "number")
+        assert classifier.cache_info().currsize == 1
+
+    def test_cache_clear_after_in_place_mutation(self) -> None:
+        # arrange
+        mapping: dict[type[TypeEngine], str] = {sa.Integer: "integer"}
+        classifier = Classifier(mapping)
+        classifier[sa.Integer()]
+
+        # act
+        mapping[sa.Integer] = "number"
+        classifier.cache_clear()
+        actual = classifier[sa.Integer()]
+
+        # assert
+        assert actual == (sa.Integer, "number")
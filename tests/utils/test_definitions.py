@@ -0,0 +1,67 @@
+from sqlalchemy_schema.utils.definitions import DefinitionIndex, digest
+
+ADDRESS = {"type": "object", "properties": {"street": {"type": "string"}}}
+
+
+def test_digest__ignores_key_order() -> None:
+    """
+    ARRANGE two schemas with the same content in a different key order
+    ACT call the `digest` function on both
+    ASSERT the digests are equal, and differ from another schema's
+    """
+    reordered = {"properties": {"street": {"type": "string"}}, "type": "object"}
+
+    assert digest(ADDRESS) == digest(reordered)
+    assert digest(ADDRESS) != digest({"type": "object"})
+
+
+class TestDefinitionIndex:
+    def test_identical_definition_is_an_alias(self) -> None:
+        # arrange
+        index = DefinitionIndex()
+        user = {"type": "object", "properties": {"office": {"$ref": "#/definitions/Office"}}}
+
+        # act
+        emitted = [
+            index.add("Home", dict(ADDRESS)),
+            index.add("Office", dict(ADDRESS)),
+            index.add("User", user),
+        ]
+
+        # assert
+        assert emitted == [True, False, True]
+        assert index.aliases == {"Office": "Home"}
+        assert user["properties"]["office"] == {"$ref": "#/definitions/Home"}
+        assert index.conflicts == []
+
+    def test_same_name_with_other_content_is_a_conflict(self) -> None:
+        # arrange
+        index = DefinitionIndex()
+        index.add("Address", dict(ADDRESS))
+
+        # act
+        same = index.add("Address", dict(ADDRESS))
+        other = index.add("Address", {"type": "object"})
+
+        # assert
+        assert (same, other) == (False, False)
+        assert index.conflicts == ["Address"]
+
+    def test_rewrite_refs__uses_the_ref_prefix(self) -> None:
+        # arrange
+        index = DefinitionIndex(ref_prefix="#/components/schemas/")
+        index.add("Home", dict(ADDRESS))
+        index.add("Office", dict(ADDRESS))
+        schema = {
+            "type": "array",
+            "items": [{"$ref": "#/components/schemas/Office"}, {"$ref": "#/definitions/Office"}],
+        }
+
+        # act
+        index.rewrite_refs(schema)
+
+        # assert
+        assert schema["items"] == [
+            {"$ref": "#/components/schemas/Home"},
+            {"$ref": "#/definitions/Office"},
+        ]
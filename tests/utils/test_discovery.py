@@ -0,0 +1,107 @@
+import pytest
+from pytest_mock import MockerFixture
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from sqlalchemy_schema.utils import discovery
+from sqlalchemy_schema.utils.discovery import (
+    DiscoveredModels,
+    DiscoveryIndex,
+    models_of,
+    registry_of,
+)
+from tests.fixtures import models
+from tests.fixtures.models.address import Address
+from tests.fixtures.models.base import Base
+from tests.fixtures.models.user import Group, User
+
+
+class EmptyBase(DeclarativeBase):
+    pass
+
+
+class LocalBase(DeclarativeBase):
+    pass
+
+
+class Tree(LocalBase):
+    __tablename__ = "discovery_tree"
+
+    pk: Mapped[int] = mapped_column(primary_key=True)
+
+
+class Leaf(LocalBase):
+    __tablename__ = "discovery_leaf"
+
+    pk: Mapped[int] = mapped_column(primary_key=True)
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        pytest.param(Base, Base.registry, id="declarative base"),
+        pytest.param(Base.registry, Base.registry, id="registry"),
+        pytest.param(EmptyBase, EmptyBase.registry, id="DeclarativeBase subclass"),
+        pytest.param(User, None, id="model"),
+        pytest.param(models, None, id="module"),
+    ],
+)
+def test_registry_of(source: object, expected: object) -> None:
+    """
+    ARRANGE a declarative base, registry, model or module
+    ACT call the `registry_of` function
+    ASSERT only bases and registries name a registry
+    """
+    assert registry_of(source) is expected
+
+
+def test_models_of() -> None:
+    """
+    ARRANGE a declarative base
+    ACT call the `models_of` function
+    ASSERT every mapped model is returned, ordered by module and class name
+    """
+    assert models_of(LocalBase) == DiscoveredModels("LocalBase", (Leaf, Tree))
+    assert models_of(LocalBase.registry) == DiscoveredModels("registry", (Leaf, Tree))
+    assert models_of(EmptyBase).models == ()
+
+    with pytest.raises(TypeError):
+        models_of(User)
+
+
+class TestDiscoveryIndex:
+    def test_package__finds_models_of_every_submodule(self) -> None:
+        # arrange
+        index = DiscoveryIndex()
+
+        # act
+        actual = index(models)
+
+        # assert
+        assert actual == DiscoveredModels("tests.fixtures.models", (Address, Group, User))
+        assert index.modules["tests.fixtures.models.not_a_sa_model"] == ()
+
+    def test_subpackages_and_modules_use_the_index(self, mocker: MockerFixture) -> None:
+        # arrange
+        index = DiscoveryIndex()
+        walk_packages = mocker.spy(discovery.pkgutil, "walk_packages")
+        index(models)
+
+        # act
+        actual = index(models.user)
+        index(models)
+
+        # assert
+        assert actual.models == (Group, User)
+        assert walk_packages.call_count == 1
+
+    def test_clear(self) -> None:
+        # arrange
+        index = DiscoveryIndex()
+        index(models)
+
+        # act
+        index.clear()
+
+        # assert
+        assert not index.is_indexed("tests.fixtures.models")
+        assert index.modules == {}
@@ -5,7 +5,7 @@ import pytest
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 from sqlalchemy_schema.utils.imports import load_module_or_symbol
-from tests.fixtures.models import user
+from tests.fixtures.models import base, user
 
 
 @pytest.mark.parametrize(
@@ -13,6 +13,10 @@ from tests.fixtures.models import user
     [
         pytest.param("tests.fixtures.models.user:User", user.User, id="symbol specified"),
         pytest.param("tests.fixtures.models.user", user, id="symbol not specified"),
+        pytest.param("tests.fixtures.models.base:Base", base.Base, id="declarative base"),
+        pytest.param(
+            "tests.fixtures.models.base:Base.registry", base.Base.registry, id="registry"
+        ),
     ],
 )
 def test_load_module_or_symbol(